@@ -35,6 +35,7 @@ public partial class SundayTrades : ComponentBase, IDisposable
     private bool showSymbolDropdown = false;
     private List<string> filteredSymbols = new();
     private Timer? hideDropdownTimer;
+    private string[]? bundledSymbols;
     
     private string? userMessage;
     private bool isRunningPredictions = false;
@@ -265,7 +266,7 @@ public partial class SundayTrades : ComponentBase, IDisposable
         foreach (PredictionRecord record in _mustBuyList)
         {
             // Get the latest price for the symbol
-            var latestPriceReturn = PythonEnv.GLlmKnowledge().LookupLatestPrice(TraderTraining.UserDataDirectory, record.Symbol);
+            var latestPriceReturn = PythonEnv.PipelineService().ServiceLatestPrice(TraderTraining.UserDataDirectory, record.Symbol);
             string iso = latestPriceReturn.Item1.GetAttr("isoformat").Call().As<string>();
             DateTime latestPriceDate = DateTime.Parse(iso);
 
@@ -285,7 +286,7 @@ public partial class SundayTrades : ComponentBase, IDisposable
                 try
                 {
                     // Call Python function to get latest price
-                    (PyObject, double) result = PythonEnv.GLlmKnowledge().LookupLatestPrice(TraderTraining.UserDataDirectory, trade.Symbol);
+                    (PyObject, double) result = PythonEnv.PipelineService().ServiceLatestPrice(TraderTraining.UserDataDirectory, trade.Symbol);
                     // result is a tuple of (date, price)
                     var price = result.Item2; // Get the price from the tuple
                     trade.LatestPrice = price;
@@ -576,12 +577,8 @@ public partial class SundayTrades : ComponentBase, IDisposable
 
             // Get the trading plan instructions as the system message
             string systemMessage = _tradingPlanInstructions;
-            
-            // TODO: Make LLM call here
-            // For now, create a placeholder response
-            await Task.Delay(2000); // Simulate LLM processing time
 
-            // Use CallOpenaiModel wiyth o4 mini model
+            // Stream the o4-mini response so the plan appears as it is generated
             // Set the OPENAI_API_KEY environment variable from config
             var openAiKey = Configuration["OpenAI:ApiKey"];
 
@@ -592,7 +589,20 @@ public partial class SundayTrades : ComponentBase, IDisposable
             }
             else
             {
-                _tradingPlan = PythonEnv.GLlmKnowledge().CallOpenaiModel("o4-mini", _tradingPlan, prompt, openAiKey);
+                _tradingPlan = string.Empty;
+                await Task.Run(async () =>
+                {
+                    var stream = PythonEnv.GLlmKnowledge().StreamOpenaiModel("o4-mini", systemMessage, prompt, openAiKey, baseDir: TraderTraining.UserDataDirectory);
+                    while (stream.MoveNext())
+                    {
+                        var chunk = stream.Current;
+                        await InvokeAsync(() =>
+                        {
+                            _tradingPlan += chunk;
+                            StateHasChanged();
+                        });
+                    }
+                });
             }
         }
         catch (Exception ex)
@@ -671,9 +681,18 @@ public partial class SundayTrades : ComponentBase, IDisposable
     /// </summary>
     public string[] GetSymbols()
     {
-        var symbols = PythonEnv.ADownloadSp500Data().LoadSp500Symbols();
+        // Before the first download the user data has no symbol list: use the app's
+        // bundled list (loaded once) so the autocomplete is not empty
+        if (!File.Exists(Path.Combine(TraderTraining.UserDataDirectory, "sp500_symbols.csv")))
+        {
+            bundledSymbols ??= PythonEnv.ADownloadSp500Data().LoadSp500Symbols().Order().ToArray();
+            return bundledSymbols;
+        }
+
+        // Served from the resident pipeline service (no disk read per keystroke)
+        var symbols = PythonEnv.PipelineService().ServiceSymbols(TraderTraining.UserDataDirectory);
 
-        return symbols.Order().ToArray();
+        return symbols.ToArray();
     }
 
     public void Dispose()
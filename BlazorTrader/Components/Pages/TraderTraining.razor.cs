@@ -19,11 +19,13 @@ public partial class TraderTraining : ComponentBase
     private bool isDownloading = false;
     private long downloadProgress = 0;
     private int totalSymbols = 503;
+    private string? downloadStatus = null;
     private string? downloadCompletionMessage = null;
 
     // Loading state for the create indicators operation
     private bool isCreatingIndicators = false;
     private long indicatorsProgress = 0;
+    private string? indicatorsStatus = null;
     private string? indicatorsCompletionMessage = null;
 
     // Loading state for the create training data operation
@@ -76,8 +78,9 @@ public partial class TraderTraining : ComponentBase
         (modelTrained ? 1 : 0);
 
     private int aiCompletionPercentage => (int)Math.Round((double)completedSteps / 4 * 100);
-    private int downloadProgressPercentage => totalSymbols > 0 ? (int)Math.Round((double)downloadProgress / totalSymbols * 100) : 0;
-    private int indicatorsProgressPercentage => totalSymbols > 0 ? (int)Math.Round((double)indicatorsProgress / totalSymbols * 100) : 0;
+    // The Python stages yield 0-100; done/total, rate and ETA come from pipeline_progress
+    private int downloadProgressPercentage => (int)downloadProgress;
+    private int indicatorsProgressPercentage => (int)indicatorsProgress;
 
     protected override async Task OnInitializedAsync()
     {
@@ -140,6 +143,7 @@ public partial class TraderTraining : ComponentBase
         // Set loading state
         isDownloading = true;
         downloadProgress = 0;
+        downloadStatus = null;
         downloadCompletionMessage = null; // Clear any previous message
         StateHasChanged(); // Update UI to show spinner
 
@@ -150,11 +154,13 @@ public partial class TraderTraining : ComponentBase
             {
                 foreach (var progress in PythonEnv.ADownloadSp500Data().LoadOrDownload(UserDataDirectory))
                 {
+                    var status = PythonEnv.PipelineProgress().FormatProgress("load_or_download");
                     // Update progress using InvokeAsync to marshal to UI thread
                     await InvokeAsync(() =>
                     {
                         downloadProgress = progress;
-                        Console.WriteLine($"Download progress: {progress} of {totalSymbols}");
+                        downloadStatus = status;
+                        Console.WriteLine($"Download progress: {progress}% ({status})");
                         StateHasChanged();
                     });
                 }
@@ -162,7 +168,7 @@ public partial class TraderTraining : ComponentBase
 
             // Mark as completed
             dataDownloaded = true;
-            downloadProgress = totalSymbols; // Ensure progress shows 100%
+            downloadProgress = 100; // Ensure progress shows 100%
             downloadCompletionMessage = $"✅ All S&P 500 data downloaded successfully! ({totalSymbols} symbols processed, 500 companies)";
             Console.WriteLine($"Download completed: {totalSymbols} symbols processed");
         }
@@ -184,6 +190,7 @@ public partial class TraderTraining : ComponentBase
         // Set loading state
         isCreatingIndicators = true;
         indicatorsProgress = 0;
+        indicatorsStatus = null;
         indicatorsCompletionMessage = null; // Clear any previous message
         StateHasChanged(); // Update UI to show spinner
 
@@ -196,10 +203,12 @@ public partial class TraderTraining : ComponentBase
                 while (pythonGenerator.MoveNext())
                 {
                     var progress = pythonGenerator.Current;
+                    var status = PythonEnv.PipelineProgress().FormatProgress("process_all_files");
                     await InvokeAsync(() =>
                     {
                         indicatorsProgress = (long)(int)progress;
-                        Console.WriteLine($"Indicators progress: {progress} of {totalSymbols}");
+                        indicatorsStatus = status;
+                        Console.WriteLine($"Indicators progress: {progress}% ({status})");
                         StateHasChanged();
                     });
                 }
@@ -207,7 +216,7 @@ public partial class TraderTraining : ComponentBase
 
             // Mark as completed
             indicatorsCreated = true;
-            indicatorsProgress = totalSymbols; // Ensure progress shows 100%
+            indicatorsProgress = 100; // Ensure progress shows 100%
             indicatorsCompletionMessage = $"✅ All technical indicators calculated successfully! ({totalSymbols} symbols processed)";
             Console.WriteLine($"Indicators completed: {totalSymbols} symbols processed");
         }
@@ -73,6 +73,9 @@ namespace BlazorTrader
 
                 Console.WriteLine($"Packages finished installing - {sw.ElapsedMilliseconds} ms...");
 
+                // Warm the resident pipeline service (imports, prices, model) in the background
+                pythonEnv.PipelineService().StartService(Components.Pages.TraderTraining.UserDataDirectory, true);
+
                 // Configure the HTTP request pipeline.
                 if (!app.Environment.IsDevelopment())
                 {
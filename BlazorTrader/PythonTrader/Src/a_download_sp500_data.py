@@ -1,9 +1,13 @@
-import yfinance as yf
 from datetime import datetime, timedelta
 import os
 import pandas as pd
 import time
 from typing import Generator
+from pipeline_metrics import timed, profiled_stage
+from pipeline_checkpoint import StageJournal, file_signature, remove_temp_files, write_csv_atomic
+from pipeline_progress import ProgressTracker
+
+PRICE_COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
 
 # Fetch the current S&P 500 symbol list from Wikipedia
 def fetch_and_save_sp500_symbols(csv_path: str = 'sp500_symbols.csv') -> None:
@@ -19,7 +23,9 @@ def fetch_and_save_sp500_symbols(csv_path: str = 'sp500_symbols.csv') -> None:
     # Ensure the directory exists
     os.makedirs(os.path.dirname(csv_path) if os.path.dirname(csv_path) else '.', exist_ok=True)
     
-    df[['Symbol']].to_csv(csv_path, index=False)
+    # Keep the GICS sector for sector-neutral features (panel_features)
+    columns = {'Symbol': 'Symbol', 'GICS Sector': 'Sector'}
+    write_csv_atomic(df[[c for c in columns if c in df.columns]].rename(columns=columns), csv_path, index=False)
     print(f"Saved S&P 500 symbols to {csv_path}")
 
 # Load symbols from CSV
@@ -39,6 +45,23 @@ def load_sp500_symbols(csv_path: str = 'sp500_symbols.csv') -> list[str]:
     df = pd.read_csv(csv_path)
     return df['Symbol'].tolist()
 
+def is_complete_price_file(csv_path: str) -> bool:
+    """
+    Best-effort check of a file not in the journal (e.g. written before writes
+    were atomic): it parses, has every price column, and does not end in a cut-off row.
+    """
+    try:
+        with open(csv_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                return False
+        df = pd.read_csv(csv_path)
+    except Exception:
+        return False
+    return (not df.empty and set(PRICE_COLUMNS).issubset(df.columns)
+            and bool(df[PRICE_COLUMNS].iloc[-1].notna().all()))
+
+@profiled_stage("load_or_download")
 def load_or_download(base_directory: str, years: int = 5) -> Generator[int, None, None]:
     """
     Download S&P 500 historical data for the given number of years.
@@ -46,14 +69,18 @@ def load_or_download(base_directory: str, years: int = 5) -> Generator[int, None
         base_directory (str): Base directory where symbols CSV and data will be stored.
         years (int): Number of years of historical data to download.
     Yields:
-        int: Progress from 0 to 500 as download progresses.
+        int: Progress from 0 to 100 (throttled; details via pipeline_progress.get_progress).
+
+    Files are written atomically and recorded in a checkpoint journal; an existing
+    file is only skipped if the journal (or a check of its contents) confirms it
+    is complete, so a download interrupted by a crash is fetched again.
     """
     # Use base_directory for symbols CSV path
     symbols_csv_path = os.path.join(base_directory, 'sp500_symbols.csv')
     tickers = load_sp500_symbols(symbols_csv_path)
     total = len(tickers)
     if total == 0:
-        yield 500
+        yield 100
         return
     end_date = datetime.today()
     start_date = end_date - timedelta(days=years*365)
@@ -61,30 +88,41 @@ def load_or_download(base_directory: str, years: int = 5) -> Generator[int, None
     # Use base_directory for output directory
     output_dir = os.path.join(base_directory, 'sp500_data')
     os.makedirs(output_dir, exist_ok=True)
-    
-    for idx, symbol in enumerate(tickers):
+    remove_temp_files(output_dir)
+    # Never finished: the journal is the ledger of verified downloads
+    journal = StageJournal(base_directory, "load_or_download")
+
+    progress = ProgressTracker("load_or_download", total)
+    for symbol in tickers:
+        progress.current = symbol
         csv_path = os.path.join(output_dir, f"{symbol}.csv")
-        if os.path.exists(csv_path):
+        signature = file_signature(csv_path)
+        if signature is not None and not journal.is_done(symbol, signature) and is_complete_price_file(csv_path):
+            journal.done(symbol, signature)
+        if journal.is_done(symbol, signature, csv_path):
             print(f"Skipping {symbol}: {csv_path} already exists.")
         else:
+            if signature is not None:
+                print(f"{csv_path} is incomplete, downloading again.")
             print(f"Downloading data for {symbol}...")
             try:
-                data = yf.download(symbol, start=start_date.strftime('%Y-%m-%d'), end=end_date.strftime('%Y-%m-%d'), interval='1d')
+                import yfinance as yf               # slow to import; only needed here
+                with timed("load_or_download", "download", symbol):
+                    data = yf.download(symbol, start=start_date.strftime('%Y-%m-%d'), end=end_date.strftime('%Y-%m-%d'), interval='1d')
                 if not data.empty:
                     data = data.reset_index()
                     if isinstance(data.columns, pd.MultiIndex):
                         data.columns = [col[0] for col in data.columns]
-                    columns_to_keep = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
-                    data = data[columns_to_keep]
-                    data.to_csv(csv_path, index=False)
+                    data = data[PRICE_COLUMNS]
+                    with timed("load_or_download", "write", symbol):
+                        write_csv_atomic(data, csv_path, index=False)
+                    journal.done(symbol, file_signature(csv_path))
                     print(f"Saved {symbol} data to {csv_path}")
                 else:
                     print(f"No data found for {symbol}.")
             except Exception as e:
                 print(f"Error downloading {symbol}: {e}")
-        # Yield progress as an integer from 0 to 500
-        progress = int((idx + 1) / total * 500)
-        yield progress
+        yield from progress.step()
     print("Download complete.")
 
 
@@ -94,7 +132,7 @@ def main():
     years = 5  # Number of years of historical data
     
     for progress in load_or_download(base_dir, years=years):
-        print(f"Progress: {progress} of 500")
+        print(f"Progress: {progress}%")
 
 
 if __name__ == '__main__':
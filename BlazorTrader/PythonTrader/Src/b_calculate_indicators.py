@@ -26,6 +26,11 @@ Volume Features:
 Volatility Feature:
 - atr_rank: Cross-sectional percentile rank of normalized ATR for each date (0=least volatile, 1=most volatile)
 
+Cross-Sectional Features (panel_features, computed across all symbols per date):
+- cs_ret5_z, cs_rsi_z, cs_vol_ratio_z: z-scores across symbols, typically -3 to 3
+- cs_ret5_sector_rank, cs_sma20_sector_rank: percentile within the symbol's sector, 0 to 1
+- breadth_above_sma20, breadth_advancers: share of the universe above SMA20 / up on the day, 0 to 1
+
 Technical Indicators (from pandas_ta):
 - rsi_14: Relative Strength Index, 0 to 100
 - stoch: Stochastic Oscillator %K and %D, 0 to 100
@@ -45,21 +50,31 @@ Technical Indicators (from pandas_ta):
 
 All features are calculated per symbol and date, and are suitable for use as features in machine learning classifiers/regressors.
 
-Note: atr_rank requires cross-sectional computation across all symbols for each date. This is a placeholder and should be computed in a post-processing step after merging all symbols' data by date.
+Note: atr_rank and the other cross-sectional features need every symbol for each date. calculate_indicators
+leaves atr_rank as a placeholder; process_all_files fills it (and adds the cs_/breadth_ columns) with
+panel_features once all symbols are written.
 """
 
 from pathlib import Path
 import numpy as np
 import pandas as pd
-import pandas_ta as ta
-from tqdm import tqdm
-from typing import Generator
+from typing import Any, Generator
 import warnings
 import os
-
-# Suppress the pkg_resources deprecation warning from pandas_ta
-warnings.filterwarnings("ignore", message="pkg_resources is deprecated as an API")
-warnings.filterwarnings("ignore", category=DeprecationWarning, module="pkg_resources")
+from pipeline_metrics import timed, profiled_stage
+from pipeline_checkpoint import StageJournal, file_signature, remove_temp_files, write_csv_atomic
+from pipeline_progress import ProgressTracker
+from panel_features import calculate_panel_features
+from data_quality import validate_price_store
+from trading_calendar import TradingCalendar, SharedArrays, attach_shared_arrays, build_calendar, load_benchmark_close
+
+def _ta():
+    """pandas_ta, imported on first use (it is slow to import and only needed here)."""
+    # Suppress the pkg_resources deprecation warning from pandas_ta
+    warnings.filterwarnings("ignore", message="pkg_resources is deprecated as an API")
+    warnings.filterwarnings("ignore", category=DeprecationWarning, module="pkg_resources")
+    import pandas_ta
+    return pandas_ta
 
 # --------------------------------------------------------------------------- #
 # Configuration
@@ -97,6 +112,7 @@ def _add_ta_features(df: pd.DataFrame, symbol: str, error_log: list) -> pd.DataF
         ("cmf",        dict(length=20)),                 # Chaikin Money Flow
         # ("obv",        {}),                            # On-Balance Volume (removed)
     ]
+    ta = _ta()
     ta_df_parts = []
 
     for name, params in TA_FEATURES:
@@ -173,7 +189,7 @@ def _add_custom_features(df: pd.DataFrame, atr_col: str, spy_close: pd.Series) -
     out["vol_ma_ratio_20"] = df["Volume"] / df["Volume"].rolling(20).mean()
 
     # 6. Bollinger Band features (percentile and width)
-    bb = ta.bbands(df["Close"], length=20)
+    bb = _ta().bbands(df["Close"], length=20)
     if bb is not None and all(col in bb.columns for col in ["BBL_20_2.0", "BBU_20_2.0", "BBB_20_2.0"]):
         out["bb_percent"] = (df["Close"] - bb["BBL_20_2.0"]) / (bb["BBU_20_2.0"] - bb["BBL_20_2.0"])
         out["bb_width"] = bb["BBB_20_2.0"]
@@ -236,17 +252,27 @@ def _add_custom_features(df: pd.DataFrame, atr_col: str, spy_close: pd.Series) -
     return out
 
 
-def calculate_indicators(price_df: pd.DataFrame, spy_series: pd.Series | None, symbol: str, error_log: list) -> pd.DataFrame:
-    ta_df = _add_ta_features(price_df, symbol, error_log)
+def calculate_indicators(price_df: pd.DataFrame, spy_series: pd.Series | np.ndarray | None, symbol: str, error_log: list) -> pd.DataFrame:
+    """
+    spy_series is either the benchmark close as a Series (reindexed to the symbol's
+    dates) or an array already aligned row-for-row with price_df (see trading_calendar).
+    """
+    if isinstance(spy_series, np.ndarray):
+        spy_close = pd.Series(spy_series, index=price_df.index)
+    else:
+        spy_close = spy_series.reindex(price_df.index) if spy_series is not None else None
+    with timed("process_all_files", "ta_features", symbol):
+        ta_df = _add_ta_features(price_df, symbol, error_log)
     atr_col = next((col for col in ta_df.columns if col.startswith("ATRr_") or col.startswith("ATR_")), None)
     custom_df = pd.DataFrame(index=price_df.index)
     if atr_col is not None:
         try:
-            custom_df = _add_custom_features(
-                pd.concat([price_df, ta_df], axis=1),
-                atr_col=atr_col,
-                spy_close=spy_series.reindex(price_df.index) if spy_series is not None else None,
-            )
+            with timed("process_all_files", "custom_features", symbol):
+                custom_df = _add_custom_features(
+                    pd.concat([price_df, ta_df], axis=1),
+                    atr_col=atr_col,
+                    spy_close=spy_close,
+                )
         except Exception as e:
             error_log.append(f"{symbol}: custom_features - {e}")
     else:
@@ -261,17 +287,89 @@ def calculate_indicators(price_df: pd.DataFrame, spy_series: pd.Series | None, s
 # --------------------------------------------------------------------------- #
 # Batch runner
 # --------------------------------------------------------------------------- #
-def process_all_files(base_directory: str = ".") -> Generator[int, None, None]:
+def _process_file(csv_path: Path, base_directory: str, calendar: TradingCalendar,
+                  benchmark: np.ndarray | None) -> tuple[str, list, str | None]:
+    """Calculates and writes one symbol's indicators. Returns (symbol, error log, fatal error)."""
+    symbol = csv_path.stem
+    error_log = []
+    try:
+        with timed("process_all_files", "read", symbol):
+            df_prices = pd.read_csv(csv_path, parse_dates=["Date"]).set_index("Date")
+        # Check for required columns
+        required_cols = {"Open", "High", "Low", "Close", "Volume"}
+        if not required_cols.issubset(df_prices.columns):
+            raise ValueError(f"Missing columns: {required_cols - set(df_prices.columns)}")
+        # Benchmark aligned through the shared calendar: a slice for contiguous symbols
+        spy_close = calendar.align(benchmark, df_prices.index.to_numpy()) if benchmark is not None else None
+        fe_df = calculate_indicators(df_prices, spy_close, symbol, error_log)
+        out_path = get_indicator_dir(base_directory) / (symbol + get_output_suffix())
+        with timed("process_all_files", "write", symbol):
+            write_csv_atomic(fe_df, out_path, index=False)
+        print(f"✅  Saved → {out_path.name}  ({len(fe_df):,} rows)")
+        return symbol, error_log, None
+    except Exception as e:
+        error_log.append(f"{symbol}: {e}")
+        print(f"❌  Error for {symbol}: {e}")
+        return symbol, error_log, str(e)
+
+_worker_state = {}
+
+def _init_worker(base_directory: str, calendar_dates: np.ndarray, handle: dict[str, Any]):
+    shared = attach_shared_arrays(handle)
+    _worker_state.update(base_directory=base_directory,
+                         calendar=TradingCalendar(calendar_dates),
+                         benchmark=shared.get("benchmark"))
+
+def _process_file_worker(csv_path: Path):
+    return _process_file(csv_path, _worker_state["base_directory"],
+                         _worker_state["calendar"], _worker_state["benchmark"])
+
+def _run_parallel(csv_files, base_directory, calendar, benchmark, workers):
+    """Yields _process_file results as worker processes finish them."""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    arrays = {"benchmark": benchmark} if benchmark is not None else {}
+    with SharedArrays(arrays) as shared, ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(base_directory, calendar.dates, shared.handle)) as pool:
+        futures = [pool.submit(_process_file_worker, csv_path) for csv_path in csv_files]
+        for future in as_completed(futures):
+            yield future.result()
+
+@profiled_stage("process_all_files")
+def process_all_files(base_directory: str = ".", workers: int = 1, validate: bool = True,
+                      repair: bool = False, quarantine: bool = False) -> Generator[int, None, None]:
     """
     Process all CSV files and yield progress updates.
     Args:
         base_directory (str): Base directory where the sp500_data folder is located.
+        workers (int): Worker processes. Above 1, symbols are processed in a process
+            pool that maps the benchmark series from shared memory. Needs a regular
+            Python executable (multiprocessing spawns sys.executable), so an embedded
+            host should keep the default of 1.
+        validate (bool): Run data_quality first and write its report (log/data_quality.*).
+        repair (bool): Let data_quality rewrite price files with repairable problems.
+        quarantine (bool): Let data_quality move symbols that cannot be repaired to
+            sp500_data/quarantine/, so no indicators are computed for them.
     Yields:
-        int: Progress from 0 to total number of files as processing progresses.
+        int: Progress from 0 to 100 (throttled; 90 when every symbol is written,
+            100 after the cross-sectional features). Details via pipeline_progress.
+
+    Completed symbols are recorded in a checkpoint journal (pipeline_checkpoint);
+    after a crash the next call resumes with the symbols that are still missing.
     """
     get_indicator_dir(base_directory).mkdir(parents=True, exist_ok=True)
-    # Remove previous errors.txt if it exists
-    if get_error_file(base_directory).exists():
+    remove_temp_files(get_indicator_dir(base_directory))
+    if validate:
+        try:
+            for _ in validate_price_store(base_directory, repair=repair, quarantine=quarantine):
+                pass
+        except Exception as e:
+            print(f"WARNING: Data quality validation failed: {e}")
+    spy_path = get_data_dir(base_directory) / get_benchmark_file()
+    # Every symbol depends on the benchmark, so a new SPY file starts a fresh run
+    journal = StageJournal(base_directory, "process_all_files", str(file_signature(spy_path)))
+    # Remove previous errors.txt if it exists (a resumed run keeps appending to it)
+    if not journal.resumed and get_error_file(base_directory).exists():
         get_error_file(base_directory).unlink()
 
     csv_path = get_data_dir(base_directory)
@@ -279,12 +377,13 @@ def process_all_files(base_directory: str = ".") -> Generator[int, None, None]:
     print(f"indicator dir: {get_indicator_dir(base_directory)}")        
     
     errors = []
-    spy_series = None
-    spy_path = get_data_dir(base_directory) / get_benchmark_file()
-    
+    # One trading calendar for all symbols; SPY close lives on it as a flat array
+    calendar = build_calendar(base_directory)
+    benchmark = None
+
     if spy_path.exists():
         try:
-            spy_series = pd.read_csv(spy_path, parse_dates=["Date"]).set_index("Date")["Close"]
+            benchmark = load_benchmark_close(base_directory, calendar)
         except Exception as e:
             errors.append((get_benchmark_file(), f"Failed to load benchmark: {e}"))
 
@@ -295,28 +394,23 @@ def process_all_files(base_directory: str = ".") -> Generator[int, None, None]:
     ]
     
     total_files = len(csv_files)
-    processed_count = 0
-
-
-    
-    for csv_path in csv_files:
-        symbol = csv_path.stem
-        error_log = []
-        try:
-            df_prices = pd.read_csv(csv_path, parse_dates=["Date"]).set_index("Date")
-            # Check for required columns
-            required_cols = {"Open", "High", "Low", "Close", "Volume"}
-            if not required_cols.issubset(df_prices.columns):
-                raise ValueError(f"Missing columns: {required_cols - set(df_prices.columns)}")
-            fe_df = calculate_indicators(df_prices, spy_series, symbol, error_log)
-            out_path = get_indicator_dir(base_directory) / (symbol + get_output_suffix())
-            fe_df.to_csv(out_path, index=False)
-            print(f"✅  Saved → {out_path.name}  ({len(fe_df):,} rows)")
-        except Exception as e:
-            error_msg = f"{symbol}: {e}"
-            errors.append((symbol, str(e)))
-            error_log.append(error_msg)
-            print(f"❌  Error for {symbol}: {e}")
+    inputs = {p.stem: file_signature(p) for p in csv_files}
+    pending = [p for p in csv_files if not journal.is_done(
+        p.stem, inputs[p.stem], get_indicator_dir(base_directory) / (p.stem + get_output_suffix()))]
+    progress = ProgressTracker("process_all_files", total_files, end=90, done=total_files - len(pending))
+    if progress.done:
+        print(f"Resuming: {progress.done} of {total_files} symbols already done.")
+        yield progress.percent
+
+    if workers > 1 and len(pending) > 1:
+        results = _run_parallel(pending, base_directory, calendar, benchmark, workers)
+    else:
+        results = (_process_file(p, base_directory, calendar, benchmark) for p in pending)
+    for symbol, error_log, error in results:
+        if error is not None:
+            errors.append((symbol, error))
+        else:
+            journal.done(symbol, inputs[symbol])
         
         # Write all errors for this symbol to the error file
         if error_log:
@@ -324,8 +418,18 @@ def process_all_files(base_directory: str = ".") -> Generator[int, None, None]:
                 for entry in error_log:
                     ef.write(entry + "\n")
         
-        processed_count += 1
-        yield processed_count  # Yield progress after each file
+        yield from progress.step(current=symbol)
+
+    # Cross-sectional features need the whole universe, so they run last
+    try:
+        for _ in calculate_panel_features(base_directory):
+            pass
+        if not errors:
+            journal.finish()
+    except Exception as e:
+        errors.append(("panel_features", str(e)))
+        print(f"❌  Error computing cross-sectional features: {e}")
+    yield 100
     
     # Show all errors at the end
     if errors or get_error_file(base_directory).exists():
@@ -0,0 +1,306 @@
+"""
+Two-Stage Signal Backtest
+───────────────────────────────────────────────────────────────
+Replays the Strong / Must Buy signals of a trained model over the
+indicator store:
+
+  signal  every Friday row of every symbol, scored in one batch
+          with the native bundle (stage-1 probability + stage-2 class)
+  entry   next session's Open
+  exit    Close five sessions later   (= five_day_long_profit)
+  costs   cost_bps per side, applied multiplicatively
+
+Inference runs once per model version; every variant (stage-1
+threshold × traded labels × cost) is then evaluated from cumulative
+sums over the rows sorted by probability, so a grid of thousands of
+variants costs about as much as a single sort.
+
+Results are written to models/backtest/<model version>/.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Generator
+import numpy as np
+import pandas as pd
+from native_predictor import get_model_version, load_bundle, scale_features, predict_buy_proba, predict_strength_proba
+from feature_importance import TEST_INDEX_FILE
+from pipeline_checkpoint import atomic_write, write_csv_atomic
+
+BACKTEST_DIR  = "backtest"
+REPORT_FILE   = "report.json"
+GRID_FILE     = "grid.csv"
+RETURN_COL    = "five_day_long_profit"
+TRADE_LABELS  = ("Strong Buy", "Must Buy")
+LABEL_SETS    = {"Strong Buy": ("Strong Buy",), "Must Buy": ("Must Buy",), "Strong+Must": TRADE_LABELS}
+WEEKS_PER_YEAR = 52
+
+_SIGNAL_CACHE = {}                             # (base dir, version, test_only) -> (store signature, signals)
+
+# ──────────────────────────────────────────────────────────────
+def get_backtest_dir(base_directory: str = ".", version: str = "") -> Path:
+    version = version or get_model_version(base_directory)
+    return Path(base_directory) / "models" / BACKTEST_DIR / version
+
+def _indicator_files(base_directory: str) -> list[Path]:
+    return sorted((Path(base_directory) / "sp500_data" / "indicators").glob("*_Indicators.csv"))
+
+def _store_signature(files: list[Path]) -> tuple:
+    return tuple((f.name, f.stat().st_mtime_ns) for f in files)
+
+def _test_keys(base_directory: str) -> pd.MultiIndex | None:
+    """(Symbol, Date) of the rows held out from training, if the split was saved."""
+    test_index_path = Path(base_directory) / "models" / TEST_INDEX_FILE
+    training_path = Path(base_directory) / "sp500_data" / "indicators" / "training_data.csv"
+    if not test_index_path.exists() or not training_path.exists():
+        return None
+    keys = pd.read_csv(training_path, usecols=lambda c: c in ("Symbol", "Date"))
+    if "Symbol" not in keys.columns:
+        return None
+    keys = keys.loc[np.load(test_index_path)]
+    return pd.MultiIndex.from_arrays([keys["Symbol"], pd.to_datetime(keys["Date"])])
+
+def load_signals(base_directory: str = ".", test_only: bool = True) -> Generator[int, None, pd.DataFrame]:
+    """
+    Reads the Friday rows of every indicator file and scores them in one batch.
+    Args:
+        base_directory (str): Directory holding models/ and sp500_data/.
+        test_only (bool): Keep only rows from the held-out test split (when the
+            split is known), so the result is out of sample.
+    Yields:
+        int: Progress from 0 to 100.
+    Returns:
+        DataFrame with Symbol, Date, ret (gross 5-day return), p_buy and one
+        probability column per stage-2 label, plus 'label' (stage-2 argmax).
+    """
+    version = get_model_version(base_directory)
+    if not version:
+        raise FileNotFoundError("No native model bundle found. Train the model first.")
+    files = _indicator_files(base_directory)
+    signature = _store_signature(files)
+    cache_key = (str(Path(base_directory).resolve()), version, test_only)
+    cached = _SIGNAL_CACHE.get(cache_key)
+    if cached is not None and cached[0] == signature:
+        yield 100
+        return cached[1]
+
+    bundle = load_bundle(base_directory)
+    wanted = set(bundle["feature_names"]) | {"Date", RETURN_COL}
+    parts = []
+    for idx, file in enumerate(files):
+        df = pd.read_csv(file, usecols=lambda c: c in wanted)
+        df["Date"] = pd.to_datetime(df["Date"])
+        df = df[df["Date"].dt.weekday == 4]  # 4 = Friday
+        df.insert(0, "Symbol", file.name.replace("_Indicators.csv", ""))
+        parts.append(df)
+        yield int(70 * (idx + 1) / len(files))
+    if not parts:
+        raise FileNotFoundError("No indicator files found. Calculate indicators first.")
+    df = pd.concat(parts, ignore_index=True)
+
+    # Same row filter as training: every feature the model uses must be present
+    present = [c for c in bundle["feature_names"] if c in df.columns]
+    df = df.dropna(subset=present + [RETURN_COL]).reset_index(drop=True)
+    if test_only:
+        keys = _test_keys(base_directory)
+        if keys is not None:
+            df = df[pd.MultiIndex.from_arrays([df["Symbol"], df["Date"]]).isin(keys)].reset_index(drop=True)
+        else:
+            print("WARNING: No saved test split found; backtesting on all rows (in sample).")
+    yield 75
+
+    X_scaled = scale_features(bundle, df)
+    p_strength = predict_strength_proba(bundle, X_scaled)
+    signals = pd.DataFrame({
+        "Symbol": df["Symbol"].to_numpy(),
+        "Date":   df["Date"].to_numpy(),
+        "ret":    df[RETURN_COL].to_numpy(dtype=np.float64),
+        "p_buy":  predict_buy_proba(bundle, X_scaled),
+    })
+    for k, label in enumerate(bundle["labels"]):
+        signals[f"p_{label}"] = p_strength[:, k]
+    signals["label"] = bundle["labels"][p_strength.argmax(1)]
+    _SIGNAL_CACHE[cache_key] = (signature, signals)
+    yield 100
+    return signals
+
+# ──────────────────────────────────────────────────────────────
+def _cost_factors(cost_bps: float) -> tuple[float, float]:
+    """net = a * gross + b for a round trip paying cost_bps on entry and exit."""
+    c = cost_bps / 10_000.0
+    a = (1.0 - c) / (1.0 + c)
+    return a, a - 1.0
+
+def net_returns(gross: np.ndarray, cost_bps: float) -> np.ndarray:
+    a, b = _cost_factors(cost_bps)
+    return a * gross + b
+
+def evaluate_grid(signals: pd.DataFrame, thresholds=None, cost_bps=(0.0, 5.0, 10.0, 20.0),
+                  label_sets: dict[str, tuple[str, ...]] | None = None) -> pd.DataFrame:
+    """
+    Per-trade statistics for every (threshold, label set, cost) variant.
+    A row is traded when p_buy >= threshold and its stage-2 label is in the set.
+    Returns:
+        DataFrame with threshold, labels, cost_bps, trades, mean, std, hit_rate,
+        total and t_stat (mean / standard error) per variant.
+    """
+    thresholds = np.linspace(0.05, 0.95, 91) if thresholds is None else np.asarray(thresholds, dtype=np.float64)
+    label_sets = label_sets or LABEL_SETS
+    frames = []
+    for name, labels in label_sets.items():
+        rows = signals[signals["label"].isin(labels)]
+        order = np.argsort(-rows["p_buy"].to_numpy(), kind="stable")
+        p = rows["p_buy"].to_numpy()[order]
+        r = rows["ret"].to_numpy()[order]
+        # Rows with p_buy >= t form a prefix of the descending order
+        n = np.searchsorted(-p, -thresholds, side="right")
+        s1 = np.concatenate([[0.0], np.cumsum(r)])[n]
+        s2 = np.concatenate([[0.0], np.cumsum(r * r)])[n]
+        for cost in cost_bps:
+            a, b = _cost_factors(cost)
+            hits = np.concatenate([[0], np.cumsum(a * r + b > 0)])[n]
+            total = a * s1 + n * b
+            sumsq = a * a * s2 + 2 * a * b * s1 + n * b * b
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = total / n
+                var = np.maximum(sumsq / n - mean * mean, 0.0) * n / np.maximum(n - 1, 1)
+                std = np.sqrt(var)
+                frames.append(pd.DataFrame({
+                    "threshold": thresholds,
+                    "labels":    name,
+                    "cost_bps":  cost,
+                    "trades":    n,
+                    "mean":      mean,
+                    "std":       std,
+                    "hit_rate":  hits / n,
+                    "total":     total,
+                    "t_stat":    mean / (std / np.sqrt(n)),
+                }))
+    return pd.concat(frames, ignore_index=True)
+
+def backtest_variant(signals: pd.DataFrame, threshold: float, labels=TRADE_LABELS,
+                     cost_bps: float = 10.0) -> dict[str, Any]:
+    """
+    Full report for one variant: trade return distribution, per-label stats and
+    the weekly equal-weight portfolio (cash in weeks without a signal).
+    """
+    trades = signals[(signals["p_buy"] >= threshold) & signals["label"].isin(labels)]
+    net = net_returns(trades["ret"].to_numpy(), cost_bps)
+
+    weeks = pd.DatetimeIndex(np.sort(signals["Date"].unique()))
+    weekly = pd.Series(net, index=trades["Date"].to_numpy()).groupby(level=0).mean()
+    weekly = weekly.reindex(weeks, fill_value=0.0)
+    equity = (1.0 + weekly).cumprod()
+    drawdown = equity / equity.cummax() - 1.0
+    weekly_std = weekly.std()
+
+    def dist(x):
+        if len(x) == 0:
+            return {"trades": 0}
+        q = np.percentile(x, [5, 25, 50, 75, 95])
+        return {
+            "trades": int(len(x)), "mean": float(x.mean()), "std": float(x.std(ddof=1)) if len(x) > 1 else 0.0,
+            "hit_rate": float((x > 0).mean()), "min": float(x.min()), "max": float(x.max()),
+            "p05": float(q[0]), "p25": float(q[1]), "median": float(q[2]), "p75": float(q[3]), "p95": float(q[4]),
+        }
+
+    return {
+        "threshold": float(threshold),
+        "labels": list(labels),
+        "cost_bps": float(cost_bps),
+        "trades": dist(net),
+        "by_label": {label: dist(net[trades["label"].to_numpy() == label]) for label in labels},
+        "portfolio": {
+            "weeks": int(len(weekly)),
+            "weeks_invested": int((weekly != 0).sum()),
+            "total_return": float(equity.iloc[-1] - 1.0) if len(equity) else 0.0,
+            "mean_weekly": float(weekly.mean()) if len(weekly) else 0.0,
+            "sharpe": float(weekly.mean() / weekly_std * np.sqrt(WEEKS_PER_YEAR)) if weekly_std > 0 else 0.0,
+            "max_drawdown": float(drawdown.min()) if len(drawdown) else 0.0,
+        },
+    }
+
+# ──────────────────────────────────────────────────────────────
+def _scaled_progress(gen: Generator, lo: int, hi: int) -> Generator[int, None, Any]:
+    """Re-maps a 0-100 progress generator onto lo-hi and passes its return value through."""
+    while True:
+        try:
+            progress = next(gen)
+        except StopIteration as stop:
+            return stop.value
+        yield lo + (hi - lo) * progress // 100
+
+def run_backtest(base_directory: str = ".", cost_bps: float = 10.0, test_only: bool = True) -> Generator[int, None, dict[str, Any]]:
+    """
+    Backtests the current model's signals at its own stage-1 threshold and
+    evaluates the threshold × label set × cost grid.
+    Args:
+        base_directory (str): Directory holding models/ and sp500_data/.
+        cost_bps (float): Cost per side in basis points for the headline report.
+        test_only (bool): Only use rows held out from training.
+    Yields:
+        int: Progress from 0 to 100.
+    Returns:
+        dict: The headline report (see backtest_variant) plus 'model_version',
+        'rows' and 'best_variant' (highest t-stat in the grid with at least 30 trades).
+    """
+    signals = yield from _scaled_progress(load_signals(base_directory, test_only), 0, 90)
+    bundle = load_bundle(base_directory)
+
+    grid = evaluate_grid(signals, cost_bps=sorted({0.0, 5.0, 10.0, 20.0, float(cost_bps)}))
+    report = backtest_variant(signals, bundle["threshold"], TRADE_LABELS, cost_bps)
+    candidates = grid[(grid["cost_bps"] == cost_bps) & (grid["trades"] >= 30)]
+    best = candidates.loc[candidates["t_stat"].idxmax()] if len(candidates) else None
+    report["model_version"] = get_model_version(base_directory)
+    report["rows"] = int(len(signals))
+    report["out_of_sample"] = bool(test_only and _test_keys(base_directory) is not None)
+    report["best_variant"] = None if best is None else {
+        "threshold": float(best["threshold"]), "labels": best["labels"],
+        "trades": int(best["trades"]), "mean": float(best["mean"]), "hit_rate": float(best["hit_rate"]),
+    }
+    yield 95
+
+    out_dir = get_backtest_dir(base_directory, report["model_version"])
+    out_dir.mkdir(parents=True, exist_ok=True)
+    write_csv_atomic(grid, out_dir / GRID_FILE, index=False)
+    with atomic_write(out_dir / REPORT_FILE) as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved backtest for model {report['model_version']} → {out_dir}")
+    yield 100
+    return report
+
+def load_backtest_report(base_directory: str = ".") -> dict[str, Any]:
+    """The saved headline report for the current model, or {} if none was run."""
+    version = get_model_version(base_directory)
+    path = get_backtest_dir(base_directory, version) / REPORT_FILE
+    if not version or not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def format_backtest_report(base_directory: str = ".") -> str:
+    """Plain-text summary of the saved backtest, as used in the LLM explanation prompt."""
+    report = load_backtest_report(base_directory)
+    if not report or not report["trades"].get("trades"):
+        return ""
+    t, p = report["trades"], report["portfolio"]
+    lines = [
+        f"Signals: {', '.join(report['labels'])} at stage-1 threshold {report['threshold']:.3f}, "
+        f"{report['cost_bps']:.0f} bps cost per side, "
+        f"{'out-of-sample test rows' if report['out_of_sample'] else 'all rows (in sample)'}",
+        f"Trades: {t['trades']}, mean {t['mean']:.2%}, median {t['median']:.2%}, hit rate {t['hit_rate']:.1%}",
+        f"Trade return 5th / 95th percentile: {t['p05']:.2%} / {t['p95']:.2%}",
+        f"Weekly equal-weight portfolio: total {p['total_return']:.2%}, Sharpe {p['sharpe']:.2f}, "
+        f"max drawdown {p['max_drawdown']:.2%} over {p['weeks']} weeks",
+    ]
+    for label, stats in report["by_label"].items():
+        if stats.get("trades"):
+            lines.append(f"{label}: {stats['trades']} trades, mean {stats['mean']:.2%}, hit rate {stats['hit_rate']:.1%}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    import os
+    base_dir = os.path.abspath(os.path.dirname(__file__))
+    for progress in run_backtest(base_dir):
+        pass
+    print(format_backtest_report(base_dir))
@@ -0,0 +1,309 @@
+"""
+Pipeline Benchmark
+───────────────────────────────────────────────────────────────
+Generates a synthetic OHLCV universe (symbols × years) in a scratch
+directory and runs the BlazorTrader stages end to end:
+
+  b  process_all_files
+  c  create_training_data
+  d  train_models
+  f  predict_latest_for_all_symbols
+
+For every stage it records wall time, CPU time, peak RSS and rows/sec,
+and writes them to a JSON results file that can be compared across runs:
+
+  python benchmark_pipeline.py --symbols 100 --years 5
+  python benchmark_pipeline.py --symbols 100 --years 5 --compare benchmarks/baseline.json
+
+--metrics adds the per-sub-step totals from pipeline_metrics to the results
+and --profile-dir dumps a cProfile file per stage.
+
+Peak RSS is sampled per stage with psutil when it is installed; otherwise
+the process-lifetime peak from the resource module is reported (not on Windows).
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Generator
+
+import numpy as np
+import pandas as pd
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:                            # Windows
+    resource = None
+
+RESULTS_DIR = "benchmarks"
+
+# ──────────────────────────────────────────────────────────────
+# Synthetic universe
+# ──────────────────────────────────────────────────────────────
+def generate_synthetic_universe(base_directory: str, symbols: int = 50, years: int = 5, seed: int = 42) -> int:
+    """
+    Writes sp500_data/{SYMBOL}.csv files with the same columns as load_or_download
+    (Date, Open, High, Low, Close, Volume), plus SPY.csv and AAPL.csv which the
+    indicator and training stages expect.
+    Args:
+        base_directory (str): Directory that receives the sp500_data folder.
+        symbols (int): Number of symbols to generate (including AAPL).
+        years (int): Years of business-day history per symbol.
+        seed (int): Random seed, so runs with the same size are comparable.
+    Returns:
+        int: Total number of price rows written (excluding SPY).
+    """
+    rng = np.random.default_rng(seed)
+    data_dir = Path(base_directory) / "sp500_data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=years * 252)
+    n = len(dates)
+
+    # Market factor shared by every symbol so relative strength is meaningful
+    market = rng.normal(0.0003, 0.01, n)
+    names = ["SPY", "AAPL"] + [f"SYN{i:04d}" for i in range(max(symbols - 1, 0))]
+    total_rows = 0
+    for name in names:
+        beta = 1.0 if name == "SPY" else rng.uniform(0.5, 1.5)
+        vol = 0.0 if name == "SPY" else rng.uniform(0.01, 0.03)
+        ret = beta * market + rng.normal(0.0, vol, n)
+        close = 100.0 * np.exp(np.cumsum(ret))
+        gap = rng.normal(0.0, 0.004, n)
+        open_ = np.concatenate([[close[0]], close[:-1]]) * (1.0 + gap)
+        wick = np.abs(rng.normal(0.0, 0.008, (2, n)))
+        high = np.maximum(open_, close) * (1.0 + wick[0])
+        low = np.minimum(open_, close) * (1.0 - wick[1])
+        volume = rng.lognormal(15.0, 0.4, n).astype(np.int64)
+        pd.DataFrame({
+            "Date": dates.strftime("%Y-%m-%d"),
+            "Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume,
+        }).to_csv(data_dir / f"{name}.csv", index=False)
+        if name != "SPY":
+            total_rows += n
+    return total_rows
+
+def _count_rows(files) -> int:
+    rows = 0
+    for file in files:
+        with open(file, "rb") as f:
+            rows += max(sum(1 for _ in f) - 1, 0)   # minus header
+    return rows
+
+# ──────────────────────────────────────────────────────────────
+# Measurement
+# ──────────────────────────────────────────────────────────────
+class _PeakRssSampler:
+    """Polls the process RSS on a background thread while a stage runs."""
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        if psutil is not None:
+            proc = psutil.Process()
+            self.peak = proc.memory_info().rss
+            def run():
+                while not self._stop.wait(self.interval):
+                    self.peak = max(self.peak, proc.memory_info().rss)
+            self._thread = threading.Thread(target=run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self.peak = max(self.peak, psutil.Process().memory_info().rss)
+        return False
+
+    def peak_mb(self) -> float | None:
+        if psutil is not None:
+            return self.peak / 2**20
+        if resource is not None:
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # ru_maxrss is bytes on macOS, kilobytes on Linux
+            return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+        return None
+
+def _drain(gen: Generator) -> Any:
+    """Consumes a stage generator the way the C# host does and returns its return value."""
+    while True:
+        try:
+            next(gen)
+        except StopIteration as stop:
+            return stop.value
+
+def run_stage(name: str, func: Callable[[], Any], rows: int, verbose: bool = False) -> dict[str, Any]:
+    """
+    Runs one stage and returns its metrics.
+    Args:
+        name (str): Stage name used in the results file.
+        func: Zero-argument callable that runs the stage to completion.
+        rows (int): Number of input rows the stage processes, for rows/sec.
+        verbose (bool): Show the stage's own print output.
+    """
+    out = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    error = None
+    with _PeakRssSampler() as sampler, out:
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            func()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+    peak_mb = sampler.peak_mb()
+    result = {
+        "wall_s": round(wall, 4),
+        "cpu_s": round(cpu, 4),
+        "peak_rss_mb": round(peak_mb, 1) if peak_mb is not None else None,
+        "rows": rows,
+        "rows_per_s": round(rows / wall, 1) if wall > 0 else None,
+    }
+    if error:
+        result["error"] = error
+    print(f"{name:<32} wall {wall:8.2f}s  cpu {cpu:8.2f}s  "
+          f"rss {result['peak_rss_mb'] or 0:8.1f} MB  {result['rows_per_s'] or 0:12,.0f} rows/s"
+          + (f"  ERROR {error}" if error else ""))
+    return result
+
+# ──────────────────────────────────────────────────────────────
+# Benchmark runner
+# ──────────────────────────────────────────────────────────────
+def run_benchmark(symbols: int = 50, years: int = 5, seed: int = 42, work_dir: str | None = None,
+                  verbose: bool = False, metrics: bool = False, profile_dir: str = "") -> dict[str, Any]:
+    """
+    Generates a synthetic universe and runs stages b, c, d and f against it.
+    Returns:
+        dict: {"meta": {...}, "stages": {stage name: metrics}, "substeps": {...}}
+    """
+    import pipeline_metrics
+    # Imported here so module import time is not billed to the first stage
+    from b_calculate_indicators import process_all_files, get_indicator_dir
+    from c_create_training_data import create_training_data
+    from d_train_xgboost import train_models, predict_latest_for_all_symbols
+
+    base_dir = work_dir or tempfile.mkdtemp(prefix="blazortrader_bench_")
+    keep = work_dir is not None
+    stages = {}
+    if metrics or profile_dir:
+        pipeline_metrics.reset_metrics()
+        pipeline_metrics.enable_metrics(profile_dir)
+    try:
+        wall0 = time.perf_counter()
+        price_rows = generate_synthetic_universe(base_dir, symbols, years, seed)
+        print(f"Generated {symbols} symbols × {years} years ({price_rows:,} rows) "
+              f"in {time.perf_counter() - wall0:.2f}s → {base_dir}")
+
+        stages["process_all_files"] = run_stage(
+            "process_all_files", lambda: _drain(process_all_files(base_dir)), price_rows, verbose)
+
+        indicator_dir = get_indicator_dir(base_dir)
+        indicator_rows = _count_rows(indicator_dir.glob("*_Indicators.csv"))
+        stages["create_training_data"] = run_stage(
+            "create_training_data", lambda: _drain(create_training_data(base_dir)), indicator_rows, verbose)
+
+        training_file = indicator_dir / "training_data.csv"
+        training_rows = _count_rows([training_file]) if training_file.exists() else 0
+        def train():
+            ok, message = _drain(train_models(base_dir))
+            if not ok:
+                raise RuntimeError(message)
+        stages["train_models"] = run_stage("train_models", train, training_rows, verbose)
+
+        stages["predict_latest_for_all_symbols"] = run_stage(
+            "predict_latest_for_all_symbols",
+            lambda: _drain(predict_latest_for_all_symbols(base_dir)),
+            symbols, verbose)
+    finally:
+        substeps = pipeline_metrics.get_summary() if pipeline_metrics.is_metrics_enabled() else {}
+        pipeline_metrics.disable_metrics()
+        if not keep:
+            shutil.rmtree(base_dir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "symbols": symbols,
+            "years": years,
+            "seed": seed,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+        },
+        "stages": stages,
+        "substeps": substeps,
+    }
+
+def compare_results(baseline: dict[str, Any], current: dict[str, Any]) -> str:
+    """
+    Formats a per-stage comparison of two results files. Every column is
+    oriented so that ratios below 1.0 mean the current run is better: wall,
+    cpu and rss are current / baseline, rows/s is baseline / current.
+    """
+    lines = [f"{'stage':<32}{'wall':>10}{'cpu':>10}{'rss':>10}{'rows/s':>10}"]
+    for name, cur in current["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if base is None:
+            lines.append(f"{name:<32}{'(new)':>10}")
+            continue
+        def ratio(key, higher_is_better=False):
+            if not base.get(key) or not cur.get(key):
+                return f"{'n/a':>10}"
+            value = base[key] / cur[key] if higher_is_better else cur[key] / base[key]
+            return f"{value:>9.2f}x"
+        lines.append(f"{name:<32}{ratio('wall_s')}{ratio('cpu_s')}{ratio('peak_rss_mb')}"
+                     f"{ratio('rows_per_s', higher_is_better=True)}")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the BlazorTrader pipeline on a synthetic universe.")
+    parser.add_argument("--symbols", type=int, default=50, help="number of symbols to generate")
+    parser.add_argument("--years", type=int, default=5, help="years of daily history per symbol")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--work-dir", help="keep the generated universe in this directory")
+    parser.add_argument("--output", help="results JSON path (default benchmarks/bench_<timestamp>.json)")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--verbose", action="store_true", help="show the stages' own output")
+    parser.add_argument("--metrics", action="store_true", help="record per-sub-step timings")
+    parser.add_argument("--profile-dir", default="", help="dump a cProfile file per stage here")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.symbols, args.years, args.seed, args.work_dir, args.verbose,
+                            args.metrics, args.profile_dir)
+
+    out_path = Path(args.output) if args.output else (
+        Path(os.path.dirname(os.path.abspath(__file__))) / RESULTS_DIR /
+        f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{args.symbols}x{args.years}.json")
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {out_path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare} (current / baseline):")
+        print(compare_results(baseline, results))
+
+
+if __name__ == "__main__":
+    main()
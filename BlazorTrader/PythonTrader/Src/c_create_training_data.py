@@ -1,14 +1,27 @@
 import pandas as pd
 from pathlib import Path
 import os
-from tqdm import tqdm
 from typing import Generator
+from pipeline_metrics import timed, profiled_stage
+from pipeline_checkpoint import StageJournal, files_signature, remove_temp_files, write_csv_atomic
+from pipeline_progress import ProgressTracker
 
+@profiled_stage("create_training_data")
 def create_training_data(base_directory: str = ".") -> Generator[int, None, None]:
+    from tqdm import tqdm
     INDICATOR_DIR = Path(base_directory) / "sp500_data" / "indicators"
     OUTPUT_FILE = INDICATOR_DIR / "training_data.csv"
     STATS_FILE = INDICATOR_DIR / "stats.csv"
 
+    # Find all indicator files
+    indicator_files = list(INDICATOR_DIR.glob("*_Indicators.csv"))
+    symbols = [file.name.replace('_Indicators.csv', '') for file in indicator_files]
+    total_files = len(indicator_files)
+    # Resume after a crash only if the indicator files are unchanged
+    journal = StageJournal(base_directory, "create_training_data", files_signature(indicator_files))
+    if INDICATOR_DIR.exists():
+        remove_temp_files(INDICATOR_DIR)
+
     # Delete stats.csv if it exists to ensure it's always recalculated
     if STATS_FILE.exists():
         try:
@@ -23,38 +36,44 @@ def create_training_data(base_directory: str = ".") -> Generator[int, None, None
             return
     yield 5  # Progress after deleting stats
 
-    # Find all indicator files
-    indicator_files = list(INDICATOR_DIR.glob("*_Indicators.csv"))
-    total_files = len(indicator_files)
     all_dfs = []
-    symbols = []
-    for idx, file in enumerate(tqdm(indicator_files, desc="Processing indicator files")):
-        df = pd.read_csv(file)
-        # Drop the five_day_long_profit column if present
-        if 'five_day_long_profit' in df.columns:
-            df = df.drop(columns=['five_day_long_profit'])
-        # Only keep rows where Date is a Friday
-        if 'Date' in df.columns:
-            df['Date'] = pd.to_datetime(df['Date'])
-            df = df[df['Date'].dt.weekday == 4]  # 4 = Friday
+    training_done = journal.is_done("training_data", output=OUTPUT_FILE)
+    if training_done:
+        print(f"Resuming: {OUTPUT_FILE} is already up to date.")
+    progress = ProgressTracker("create_training_data", 0 if training_done else total_files, start=5, end=50)
+    for idx, file in enumerate(tqdm([] if training_done else indicator_files, desc="Processing indicator files")):
+        symbol = symbols[idx]
+        with timed("create_training_data", "read", symbol):
+            df = pd.read_csv(file)
+            # Drop the five_day_long_profit column if present
+            if 'five_day_long_profit' in df.columns:
+                df = df.drop(columns=['five_day_long_profit'])
+            # Only keep rows where Date is a Friday
+            if 'Date' in df.columns:
+                df['Date'] = pd.to_datetime(df['Date'])
+                df = df[df['Date'].dt.weekday == 4]  # 4 = Friday
+            df['Symbol'] = symbol
         all_dfs.append(df)
-        symbols.append(file.name.replace('_Indicators.csv', ''))
-        # Yield progress for each file processed (0-50%)
-        yield int(5 + 45 * (idx + 1) / total_files) if total_files > 0 else 5
+        # Progress for the files processed (5-50%)
+        yield from progress.step(current=symbol)
 
     # Combine all data
-    if all_dfs:
-        combined = pd.concat(all_dfs, ignore_index=True)
-        # Drop columns that are all NaN (never calculated for any symbol)
-        combined = combined.dropna(axis=1, how='all')
-        # Only keep rows with no missing values
-        combined = combined.dropna(axis=0, how='any')
-        # Save to CSV
-        try:
-            combined.to_csv(OUTPUT_FILE, index=False)
-            print(f"Saved combined training data to {OUTPUT_FILE} ({len(combined)} rows, {len(combined.columns)} columns)")
-        except Exception as e:
-            print(f"WARNING: Could not create {OUTPUT_FILE}. It is most likely open in Excel. Error: {e}")
+    if indicator_files:
+        if all_dfs:
+            with timed("create_training_data", "combine"):
+                combined = pd.concat(all_dfs, ignore_index=True)
+                # Drop columns that are all NaN (never calculated for any symbol)
+                combined = combined.dropna(axis=1, how='all')
+                # Only keep rows with no missing values
+                combined = combined.dropna(axis=0, how='any')
+            # Save to CSV
+            try:
+                with timed("create_training_data", "write"):
+                    write_csv_atomic(combined, OUTPUT_FILE, index=False)
+                journal.done("training_data")
+                print(f"Saved combined training data to {OUTPUT_FILE} ({len(combined)} rows, {len(combined.columns)} columns)")
+            except Exception as e:
+                print(f"WARNING: Could not create {OUTPUT_FILE}. It is most likely open in Excel. Error: {e}")
         yield 60  # Progress after saving combined data
 
         # --- Create stats.csv ---
@@ -65,16 +84,18 @@ def create_training_data(base_directory: str = ".") -> Generator[int, None, None
         stats_rows = []
         class_totals = {label: 0 for label in class_labels}
         total_rows = 0
-        for idx, (file, symbol) in enumerate(tqdm(list(zip(indicator_files, symbols)), desc="Generating stats")):
-            df = pd.read_csv(file)
-            # Only keep rows with all features present (as in training data)
-            if 'five_day_long_profit' in df.columns:
-                df = df.drop(columns=['five_day_long_profit'])
-            if 'Date' in df.columns:
-                df['Date'] = pd.to_datetime(df['Date'])
-                df = df[df['Date'].dt.weekday == 4]
-            df = df.dropna(axis=1, how='all')
-            df = df.dropna(axis=0, how='any')
+        progress = ProgressTracker("create_training_data", total_files, start=60, end=95)
+        for file, symbol in tqdm(list(zip(indicator_files, symbols)), desc="Generating stats"):
+            with timed("create_training_data", "stats_read", symbol):
+                df = pd.read_csv(file)
+                # Only keep rows with all features present (as in training data)
+                if 'five_day_long_profit' in df.columns:
+                    df = df.drop(columns=['five_day_long_profit'])
+                if 'Date' in df.columns:
+                    df['Date'] = pd.to_datetime(df['Date'])
+                    df = df[df['Date'].dt.weekday == 4]
+                df = df.dropna(axis=1, how='all')
+                df = df.dropna(axis=0, how='any')
             row = {'Symbol': symbol}
             for label in class_labels:
                 count = (df['five_day_class'] == label).sum() if 'five_day_class' in df.columns else 0
@@ -83,8 +104,8 @@ def create_training_data(base_directory: str = ".") -> Generator[int, None, None
             row['Total'] = sum(row[label] for label in class_labels)
             total_rows += row['Total']
             stats_rows.append(row)
-            # Yield progress for each stats file processed (60-95%)
-            yield int(60 + 35 * (idx + 1) / total_files) if total_files > 0 else 60
+            # Progress for the stats files processed (60-95%)
+            yield from progress.step(current=symbol)
         # Add total row
         total_row = {'Symbol': 'Total'}
         for label in class_labels:
@@ -98,7 +119,8 @@ def create_training_data(base_directory: str = ".") -> Generator[int, None, None
         # Write to CSV
         stats_df = pd.DataFrame(stats_rows + [total_row, percent_row])
         try:
-            stats_df.to_csv(STATS_FILE, index=False)
+            write_csv_atomic(stats_df, STATS_FILE, index=False)
+            journal.finish()
             print(f"Saved stats to {STATS_FILE}")
         except Exception as e:
             print(f"WARNING: Could not create {STATS_FILE}. It is most likely open in Excel. Error: {e}")
@@ -0,0 +1,148 @@
+"""
+Import-Time Check
+───────────────────────────────────────────────────────────────
+Imports every PythonTrader module in a fresh interpreter
+(python -X importtime) and fails when a module
+
+  - takes longer than its IMPORT_BUDGET_MS entry (cumulative, best of
+    --repeat runs), or
+  - pulls in one of the heavy libraries listed in HEAVY_MODULES
+    (xgboost, sklearn, pandas_ta, yfinance, openai, ...), which must only
+    be imported inside the functions that need them.
+
+The host loads these modules on startup and on the first click, so
+every import-time regression is paid by the UI:
+
+  python check_import_time.py
+  python check_import_time.py --repeat 5 --json import_times.json
+
+Exits with status 1 when a budget is exceeded or a heavy module leaks in.
+Budgets are generous (pandas alone is ~0.4 s); --scale adjusts them for
+slower machines.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any
+
+# Cumulative import time budget per module, in milliseconds
+IMPORT_BUDGET_MS = {
+    "llm_client":                 250,
+    "native_predictor":           300,
+    "pipeline_metrics":           100,
+    "pipeline_progress":          100,
+    "pipeline_checkpoint":        100,
+    "trading_calendar":           800,
+    "a_download_sp500_data":      900,
+    "b_calculate_indicators":     900,
+    "panel_features":             900,
+    "data_quality":               900,
+    "c_create_training_data":     900,
+    "d_train_xgboost":            900,
+    "f_predict":                  900,
+    "e_explain_xgboost_results":  900,
+    "g_llm_knowledge":            900,
+    "feature_importance":         900,
+    "backtest":                   900,
+    "trade_simulation":           900,
+    "pipeline_service":           900,
+}
+
+# Libraries that must not be loaded by a plain import of any module above
+HEAVY_MODULES = ["xgboost", "sklearn", "joblib", "pandas_ta", "yfinance", "openai", "tqdm", "matplotlib"]
+
+def measure_import(module: str, src_dir: str) -> dict[str, Any]:
+    """
+    Imports `module` in a fresh interpreter. Returns the cumulative import time
+    of the module itself, its slowest direct imports and the heavy
+    modules that ended up in sys.modules.
+    """
+    code = (f"import sys, json; import {module}; "
+            f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=src_dir, capture_output=True, text=True,
+                          env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"})
+    if proc.returncode != 0:
+        return {"error": (proc.stderr.strip().splitlines() or ["import failed"])[-1]}
+
+    # Lines look like "import time:   self [us] | cumulative | <indent>package"
+    total_us, children, pending = None, [], []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        cumulative = int(parts[1])
+        # A package is listed after its own imports, one level deeper
+        if depth == 1:
+            pending.append((name.strip(), cumulative))
+        elif depth == 0:
+            if name.strip() == module:
+                total_us, children = cumulative, pending
+            pending = []
+    heavy = json.loads(proc.stdout.strip().splitlines()[-1])
+    children.sort(key=lambda c: c[1], reverse=True)
+    return {
+        "ms": (total_us or 0) / 1000.0,
+        "heaviest": [(name, us / 1000.0) for name, us in children[:3]],
+        "heavy_modules": heavy,
+    }
+
+def check_import_times(modules: list[str], src_dir: str, repeat: int = 3, scale: float = 1.0) -> tuple[bool, dict[str, Any]]:
+    """Measures every module (best of `repeat`) and compares it against its budget."""
+    results, ok = {}, True
+    for module in modules:
+        runs = [measure_import(module, src_dir) for _ in range(max(repeat, 1))]
+        failed = next((r for r in runs if "error" in r), None)
+        if failed is not None:
+            results[module] = {**failed, "ok": False}
+            ok = False
+            continue
+        best = min(runs, key=lambda r: r["ms"])
+        budget = IMPORT_BUDGET_MS.get(module, max(IMPORT_BUDGET_MS.values())) * scale
+        best["budget_ms"] = budget
+        best["ok"] = best["ms"] <= budget and not best["heavy_modules"]
+        ok &= best["ok"]
+        results[module] = best
+    return ok, results
+
+def format_results(results: dict[str, Any]) -> str:
+    lines = [f"{'module':<28}{'ms':>9}{'budget':>9}  status"]
+    for module, r in results.items():
+        if "error" in r:
+            lines.append(f"{module:<28}{'-':>9}{'-':>9}  ERROR  {r['error']}")
+            continue
+        status = "ok" if r["ok"] else "FAIL"
+        if r["heavy_modules"]:
+            status += f"  loads {', '.join(r['heavy_modules'])}"
+        elif r["ms"] > r["budget_ms"]:
+            status += "  over budget"
+        heaviest = ", ".join(f"{name} {ms:.0f}" for name, ms in r["heaviest"])
+        lines.append(f"{module:<28}{r['ms']:>9.0f}{r['budget_ms']:>9.0f}  {status:<12} ({heaviest})")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time of the PythonTrader modules.")
+    parser.add_argument("modules", nargs="*", help="modules to check (default: all in IMPORT_BUDGET_MS)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per module; the fastest counts")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget by this factor")
+    parser.add_argument("--json", default="", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    ok, results = check_import_times(args.modules or list(IMPORT_BUDGET_MS), src_dir, args.repeat, args.scale)
+    print(format_results(results))
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
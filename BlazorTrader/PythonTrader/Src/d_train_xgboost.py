@@ -6,24 +6,24 @@ Stage 2 :  (runs only on Stage 1 positives)
           → Must Buy / Strong Buy / No-Buy-FP
 """
 
-import pandas as pd, numpy as np, sys, xgboost, sklearn
+import pandas as pd, numpy as np, sys
 from pathlib import Path
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import (accuracy_score, f1_score, fbeta_score, recall_score,
-                             precision_recall_fscore_support, average_precision_score,
-                             confusion_matrix, classification_report)
-from xgboost import XGBClassifier
-from sklearn.calibration import CalibratedClassifierCV
-import joblib
+# xgboost, sklearn and joblib are imported inside the functions that use them,
+# so importing this module for prediction stays cheap (see check_import_time.py)
 from datetime import datetime
 from typing import Generator, Tuple, Any
-import os
+import os, json
 from g_llm_knowledge import lookup_latest_price
+from pipeline_metrics import timed, profiled_stage
+from pipeline_checkpoint import atomic_write, write_csv_atomic
+from pipeline_progress import ProgressTracker
+from feature_importance import compute_feature_importance, TEST_INDEX_FILE
+from backtest import run_backtest
+from native_predictor import has_native_bundle, load_bundle, predict_buy_strength_native, NATIVE_DIR, BUNDLE_FILE, STAGE2_LABELS
 
 DATA_PATH  = Path("sp500_data/indicators/training_data.csv")
 TARGET_COL = "five_day_class"
-DROP_COLS  = [TARGET_COL, "Date", "Open", "High", "Low", "Close"]
+DROP_COLS  = [TARGET_COL, "Date", "Open", "High", "Low", "Close", "Symbol"]
 BUY_POS    = {"Strong Buy", "Must Buy"}        # "Buy" for Stage 1
 POS_MULT   = 4                                 # weight multiplier
 
@@ -37,24 +37,29 @@ def balanced_weights(y, pos_label=1, mult=1):
 
 # ──────────────────────────────────────────────────────────────
 def train_stage1(X_tr, y_tr, X_val, y_val, sw_tr, sw_val):
+    from xgboost import XGBClassifier
+    from sklearn.calibration import CalibratedClassifierCV
     clf = XGBClassifier(
         n_estimators=800, learning_rate=0.05, max_depth=6,
         subsample=0.8, colsample_bytree=0.8,
         objective="binary:logistic", eval_metric="aucpr",
         random_state=42, n_jobs=-1, early_stopping_rounds=40
     )
-    clf.fit(X_tr, y_tr,
-            sample_weight=sw_tr,
-            eval_set=[(X_val, y_val)],
-            verbose=False)
+    with timed("train_models", "fit_stage1"):
+        clf.fit(X_tr, y_tr,
+                sample_weight=sw_tr,
+                eval_set=[(X_val, y_val)],
+                verbose=False)
 
     # isotonic calibration
-    cal = CalibratedClassifierCV(clf, method="isotonic", cv="prefit")
-    cal.fit(X_val, y_val, sample_weight=sw_val)
+    with timed("train_models", "calibrate"):
+        cal = CalibratedClassifierCV(clf, method="isotonic", cv="prefit")
+        cal.fit(X_val, y_val, sample_weight=sw_val)
     return cal
 
 # ──────────────────────────────────────────────────────────────
 def best_threshold(proba, y_true):
+    from sklearn.metrics import f1_score
     best_t, best_f1 = 0, 0
     for t in np.geomspace(0.02, 0.5, 25):
         f1 = f1_score(y_true, proba >= t)
@@ -68,6 +73,8 @@ def best_threshold(proba, y_true):
 
 # ──────────────────────────────────────────────────────────────
 def train_stage2(X_s2, y_s2):
+    from xgboost import XGBClassifier
+    from sklearn.model_selection import train_test_split
     # Encode  →  0 = No-Buy-FP, 1 = Strong, 2 = Must
     lbl_map = {"No-Buy":0, "Strong Buy":1, "Must Buy":2}
     y_enc   = np.vectorize(lbl_map.get)(y_s2)
@@ -87,14 +94,80 @@ def train_stage2(X_s2, y_s2):
         objective="multi:softprob", num_class=3,
         eval_metric="mlogloss", random_state=42, early_stopping_rounds=40
     )
-    clf2.fit(X_tr2, y_tr2, sample_weight=sw_tr2,
-             eval_set=[(X_val2, y_val2)],
-             verbose=False)
+    with timed("train_models", "fit_stage2"):
+        clf2.fit(X_tr2, y_tr2, sample_weight=sw_tr2,
+                 eval_set=[(X_val2, y_val2)],
+                 verbose=False)
 
     return clf2, lbl_map
 
 # ──────────────────────────────────────────────────────────────
+def _unwrap_xgb(est):
+    # CalibratedClassifierCV may hold the booster directly or inside a FrozenEstimator
+    while not hasattr(est, "get_booster"):
+        est = est.estimator
+    return est
+
+def _best_iteration(clf):
+    try:
+        return int(clf.best_iteration)
+    except AttributeError:                     # trained without early stopping
+        return None
+
+def export_native_bundle(clf1, clf2, scaler, feature_names, thresh, models_dir) -> Path:
+    """
+    Writes the two-stage model as a sklearn-free bundle in models/native:
+    both boosters in XGBoost's native JSON format, the Stage-1 isotonic
+    calibration as a lookup table and the scaler as mean/scale arrays.
+    Loaded by native_predictor.load_bundle.
+    """
+    native_dir = Path(models_dir) / NATIVE_DIR
+    native_dir.mkdir(parents=True, exist_ok=True)
+
+    cal   = clf1.calibrated_classifiers_[0]    # cv="prefit" → single calibrator
+    base1 = _unwrap_xgb(cal.estimator if hasattr(cal, "estimator") else cal.base_estimator)
+    iso   = cal.calibrators[0]
+
+    for name, booster in (("stage1_booster.json", base1.get_booster()), ("stage2_booster.json", clf2.get_booster())):
+        with atomic_write(native_dir / name, "wb") as f:
+            f.write(booster.save_raw(raw_format="json"))
+
+    bundle = {
+        "format_version": 1,
+        "feature_names":  list(feature_names),
+        "threshold":      float(thresh),
+        "scaler": {
+            "mean":  scaler.mean_.tolist(),
+            "scale": scaler.scale_.tolist(),
+        },
+        "stage1": {
+            "model_file":     "stage1_booster.json",
+            "best_iteration": _best_iteration(base1),
+            "calibration": {
+                "x": iso.X_thresholds_.tolist(),
+                "y": iso.y_thresholds_.tolist(),
+            },
+        },
+        "stage2": {
+            "model_file":     "stage2_booster.json",
+            "best_iteration": _best_iteration(clf2),
+            "labels":         STAGE2_LABELS,
+        },
+    }
+    # Write the manifest last so a half-written export is never picked up
+    with atomic_write(native_dir / BUNDLE_FILE) as f:
+        json.dump(bundle, f)
+    return native_dir
+
+# ──────────────────────────────────────────────────────────────
+@profiled_stage("train_models")
 def train_models(base_directory: str = ".") -> Generator[int, None, Tuple[bool, str]]:
+    import joblib
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.metrics import (accuracy_score, f1_score, fbeta_score, recall_score,
+                                 precision_recall_fscore_support, average_precision_score,
+                                 confusion_matrix, classification_report)
     try:
         # Remove previous xgboost_report.txt if it exists
         log_dir = Path(base_directory) / 'log'
@@ -103,17 +176,19 @@ def train_models(base_directory: str = ".") -> Generator[int, None, Tuple[bool,
             report_path.unlink()
         DATA_PATH  = Path(base_directory) / "sp500_data" / "indicators" / "training_data.csv"
         #────────────────  Stage 1  ────────────────
-        df  = pd.read_csv(DATA_PATH)
+        with timed("train_models", "read"):
+            df  = pd.read_csv(DATA_PATH)
         yield 10  # Progress after loading data
         y1  = df[TARGET_COL].isin(BUY_POS).astype(int)
         X   = df.drop(columns=DROP_COLS, errors="ignore")
 
-        X_tr, X_te, y_tr, y_te = train_test_split(
-            X, y1, test_size=0.20, stratify=y1, random_state=42)
+        with timed("train_models", "split_scale"):
+            X_tr, X_te, y_tr, y_te = train_test_split(
+                X, y1, test_size=0.20, stratify=y1, random_state=42)
 
-        scaler = StandardScaler()
-        X_tr_sc = scaler.fit_transform(X_tr)
-        X_te_sc = scaler.transform(X_te)
+            scaler = StandardScaler()
+            X_tr_sc = scaler.fit_transform(X_tr)
+            X_te_sc = scaler.transform(X_te)
 
         # hold-out 10 % of train for val
         X_tr_sc, X_val_sc, y_tr, y_val = train_test_split(
@@ -125,8 +200,9 @@ def train_models(base_directory: str = ".") -> Generator[int, None, Tuple[bool,
         clf1 = train_stage1(X_tr_sc, y_tr, X_val_sc, y_val, sw_tr, sw_val)
         yield 40  # Progress after training stage 1
 
-        p_val = clf1.predict_proba(X_val_sc)[:,1]
-        thresh, f1_val = best_threshold(p_val, y_val)
+        with timed("train_models", "threshold"):
+            p_val = clf1.predict_proba(X_val_sc)[:,1]
+            thresh, f1_val = best_threshold(p_val, y_val)
         print(f"\nStage-1 threshold = {thresh:.3f}   (val F1 = {f1_val:.3f}")
 
         print(f"[DEBUG] Recall on validation: {recall_score(y_val, p_val>=thresh)}")
@@ -138,9 +214,10 @@ def train_models(base_directory: str = ".") -> Generator[int, None, Tuple[bool,
 
         #────────────────  Stage 2  ────────────────
         # Route *all* rows through Stage-1 to build Stage-2 dataset
-        X_all_sc = scaler.transform(X)
-        p_all    = clf1.predict_proba(X_all_sc)[:,1]
-        buy_idx  = p_all >= thresh
+        with timed("train_models", "route_stage2"):
+            X_all_sc = scaler.transform(X)
+            p_all    = clf1.predict_proba(X_all_sc)[:,1]
+            buy_idx  = p_all >= thresh
 
         strength_label = np.where(
             df[TARGET_COL].isin(BUY_POS),
@@ -188,13 +265,33 @@ def train_models(base_directory: str = ".") -> Generator[int, None, Tuple[bool,
         # Save models and artefacts
         models_dir = Path(base_directory) / 'models'
         models_dir.mkdir(parents=True, exist_ok=True)
-        joblib.dump(clf1, models_dir / 'stage1_model.joblib')
-        joblib.dump(clf2, models_dir / 'stage2_model.joblib')
-        joblib.dump(scaler, models_dir / 'scaler.joblib')
-        joblib.dump(list(X.columns), models_dir / 'feature_names.joblib')
-        with open(models_dir / 'stage1_threshold.txt', 'w') as f:
-            f.write(str(thresh))
+        with timed("train_models", "save"):
+            for name, obj in (('stage1_model.joblib', clf1), ('stage2_model.joblib', clf2),
+                              ('scaler.joblib', scaler), ('feature_names.joblib', list(X.columns))):
+                with atomic_write(models_dir / name, 'wb') as f:
+                    joblib.dump(obj, f)
+            with atomic_write(models_dir / 'stage1_threshold.txt') as f:
+                f.write(str(thresh))
+            with atomic_write(models_dir / TEST_INDEX_FILE, 'wb') as f:
+                np.save(f, y_te.index.to_numpy())
         print("\nModels and artefacts saved in 'models': stage1_model.joblib, stage2_model.joblib, scaler.joblib, stage1_threshold.txt, feature_names.joblib")
+        with timed("train_models", "export"):
+            native_dir = export_native_bundle(clf1, clf2, scaler, X.columns, thresh, models_dir)
+        print(f"Native inference bundle saved in '{native_dir}'")
+        # TreeSHAP importance, computed once per trained model and cached by version
+        try:
+            with timed("train_models", "explain"):
+                for _ in compute_feature_importance(base_directory):
+                    pass
+        except Exception as e:
+            print(f"WARNING: Feature importance could not be computed: {e}")
+        # Out-of-sample backtest of the Strong/Must Buy signals, cached by version
+        try:
+            with timed("train_models", "backtest"):
+                for _ in run_backtest(base_directory):
+                    pass
+        except Exception as e:
+            print(f"WARNING: Backtest could not be run: {e}")
         yield 90  # Progress after saving models
 
         # Test: Run recall on last 20 Fridays of AAPL
@@ -228,10 +325,14 @@ def train_models(base_directory: str = ".") -> Generator[int, None, Tuple[bool,
 def predict_buy_strength(X, base_directory: str = "."):
     """
     Predicts No-Buy, Strong Buy, or Must Buy for each row in X (feature DataFrame).
-    Loads scaler, stage 1 model, stage 2 model, threshold, and feature names from disk.
+    Uses the native bundle (models/native) when present, otherwise loads scaler,
+    stage 1 model, stage 2 model, threshold, and feature names from disk.
     Returns: numpy array of predicted labels ("No-Buy", "Strong Buy", "Must Buy")
     """
+    if has_native_bundle(base_directory):
+        return predict_buy_strength_native(X, base_directory)
     # Load artefacts
+    import joblib
     models_dir = Path(base_directory) / 'models'
     scaler = joblib.load(models_dir / 'scaler.joblib')
     clf1 = joblib.load(models_dir / 'stage1_model.joblib')
@@ -255,6 +356,7 @@ def predict_buy_strength(X, base_directory: str = "."):
         result[is_buy] = strength_lbls
     return result
 
+@profiled_stage("predict_latest_for_all_symbols")
 def predict_latest_for_all_symbols(base_directory: str = ".") -> Generator[int, None, list[dict[str, Any]]]:
     """
     For each *_Indicators.csv file, predict the classification for the latest (most recent) row.
@@ -265,25 +367,33 @@ def predict_latest_for_all_symbols(base_directory: str = ".") -> Generator[int,
     indicators_dir = Path(base_directory) / 'sp500_data' / 'indicators'
     log_dir = Path(base_directory) / 'log'
     log_dir.mkdir(parents=True, exist_ok=True)
-    feature_names = joblib.load(models_dir / 'feature_names.joblib')
+    if has_native_bundle(base_directory):
+        feature_names = load_bundle(base_directory)["feature_names"]
+    else:
+        import joblib
+        feature_names = joblib.load(models_dir / 'feature_names.joblib')
     results = []
     indicator_files = list(indicators_dir.glob("*_Indicators.csv"))
-    total = len(indicator_files)
-    for idx, file_path in enumerate(indicator_files):
+    progress = ProgressTracker("predict_latest_for_all_symbols", len(indicator_files))
+    for file_path in indicator_files:
         symbol = file_path.name.replace('_Indicators.csv', '')
         try:
-            df = pd.read_csv(file_path)
+            with timed("predict_latest_for_all_symbols", "read", symbol):
+                df = pd.read_csv(file_path)
             if df.empty:
+                progress.advance()
                 continue
             # Get the latest row by Date
             df['Date'] = pd.to_datetime(df['Date'])
             latest_row = df.sort_values('Date').iloc[-1:]
             X_latest = latest_row.drop(columns=[TARGET_COL, 'Date', 'Open', 'High', 'Low', 'Close'], errors='ignore')
             X_latest = X_latest.reindex(columns=feature_names, fill_value=0)
-            pred = predict_buy_strength(X_latest, base_directory)[0]
+            with timed("predict_latest_for_all_symbols", "predict", symbol):
+                pred = predict_buy_strength(X_latest, base_directory)[0]
             # Get latest price for the symbol
             try:
-                latest_date, latest_price = lookup_latest_price(base_directory, symbol)
+                with timed("predict_latest_for_all_symbols", "latest_price", symbol):
+                    latest_date, latest_price = lookup_latest_price(base_directory, symbol)
                 results.append({
                     'Symbol': symbol,
                     'Date': str(latest_row['Date'].iloc[0]),
@@ -300,11 +410,10 @@ def predict_latest_for_all_symbols(base_directory: str = ".") -> Generator[int,
                 })
         except Exception as e:
             print(f"[DEBUG] Error processing {file_path}: {e}")
-            continue
-        yield int(100 * (idx + 1) / total) if total > 0 else 100
+        yield from progress.step(current=symbol)
     df_results = pd.DataFrame(results, columns=['Symbol', 'Date', 'Prediction', 'LatestPrice'])
     out_path = log_dir / 'latest_predictions.csv'
-    df_results.to_csv(out_path, index=False)
+    write_csv_atomic(df_results, out_path, index=False)
     print(f"[DEBUG] Saved latest predictions to {out_path}")
     yield 100
     return df_results.to_dict("records")
@@ -0,0 +1,344 @@
+"""
+Price Data Quality
+───────────────────────────────────────────────────────────────
+Validates every price file in sp500_data/ before the indicator and
+training stages spend time on it. By default it only reports; files are
+rewritten or moved only when repair / quarantine is requested. All files are stacked into flat
+arrays (one row per bar, tagged with a symbol id) and each check is
+one vectorized expression over the whole universe; per-symbol counts
+come from np.bincount.
+
+Checks (per bar unless noted):
+
+  missing        NaN / unparsable value in Date or OHLCV        repair: drop
+  non_positive   Open/High/Low/Close <= 0                       repair: drop
+  zero_volume    Volume == 0 (halts, holidays in some feeds)    reported
+  high_low       High < Low                                     repair: rebuild range
+  out_of_range   Open or Close outside [Low, High]              repair: rebuild range
+  duplicate      same date twice for a symbol                   repair: keep last
+  unsorted       date earlier than the previous bar             repair: sort
+  jump           open and close both off the previous close by a
+                 common split factor (2, 3, 4, … or inverse) and
+                 the volume level shifting the other way: a
+                 split the prices were not adjusted for         quarantine
+  gap            run of more than MAX_GAP_BARS trading days
+                 missing inside the symbol's history            reported
+  too_short      fewer than MIN_ROWS usable bars (per symbol)   quarantine
+
+With repair=True, repaired files are rewritten atomically. With
+quarantine=True, quarantined files are moved to sp500_data/quarantine/
+(outside the *.csv scan of the later stages) together with their stale
+indicator file. The benchmark (SPY) is
+repaired but never quarantined. The report is written to
+log/data_quality.csv (one row per symbol) and log/data_quality.json.
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Generator
+import numpy as np
+import pandas as pd
+from pipeline_checkpoint import atomic_write, write_csv_atomic
+from pipeline_metrics import timed, profiled_stage
+from pipeline_progress import ProgressTracker
+from trading_calendar import TradingCalendar
+
+PRICE_COLUMNS    = ["Date", "Open", "High", "Low", "Close", "Volume"]
+BENCHMARK_FILE   = "SPY.csv"
+QUARANTINE_DIR   = "quarantine"
+REPORT_CSV       = "data_quality.csv"
+REPORT_JSON      = "data_quality.json"
+INDICATOR_SUFFIX = "_Indicators.csv"
+
+# 3:2 splits are left out: a 33% gap is an ordinary earnings or news move
+SPLIT_FACTORS    = np.array([2.0, 3.0, 4.0, 5.0, 8.0, 10.0, 20.0])
+SPLIT_TOLERANCE  = 0.08                        # relative distance to a split factor
+VOLUME_WINDOW    = 20                          # bars on each side compared for the volume shift
+VOLUME_SHIFT     = 0.5                         # volume must move >= this share of the factor (in log terms)
+MAX_GAP_BARS     = 5                           # missing trading days in a row before it counts as a gap
+MIN_ROWS         = 100                         # indicators need ~30 bars of warm-up
+MAX_BAD_FRACTION = 0.05                        # more dropped bars than this → quarantine
+
+REPAIRABLE = ["missing", "non_positive", "high_low", "out_of_range", "duplicate", "unsorted"]
+CHECKS     = REPAIRABLE + ["zero_volume", "jump", "gap"]
+
+# ──────────────────────────────────────────────────────────────
+# Loading
+# ──────────────────────────────────────────────────────────────
+def _price_files(base_directory: str) -> list[Path]:
+    return sorted((Path(base_directory) / "sp500_data").glob("*.csv"))
+
+def load_price_store(files: list[Path]) -> tuple[dict[str, np.ndarray], dict[str, str]]:
+    """
+    Reads the files as they are (no sorting or cleaning) into flat arrays:
+    sym_id, date (datetime64[D], NaT if unparsable), open … volume.
+    Returns (arrays, {symbol: reason}) for files that could not be read at all.
+    """
+    parts, names, unreadable = [], [], {}
+    for file in files:
+        try:
+            df = pd.read_csv(file)
+        except Exception as e:
+            unreadable[file.stem] = f"unreadable: {e}"
+            continue
+        missing = [c for c in PRICE_COLUMNS if c not in df.columns]
+        if missing:
+            unreadable[file.stem] = f"missing columns: {', '.join(missing)}"
+            continue
+        parts.append(df[PRICE_COLUMNS])
+        names.append(file.stem)
+    lengths = np.array([len(p) for p in parts], dtype=np.int64)
+    df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=PRICE_COLUMNS)
+    arrays = {
+        "symbols": np.array(names, dtype=object),
+        "sym_id":  np.repeat(np.arange(len(parts), dtype=np.int64), lengths),
+        "date":    pd.to_datetime(df["Date"], errors="coerce").to_numpy().astype("datetime64[D]"),
+    }
+    for col in PRICE_COLUMNS[1:]:
+        arrays[col.lower()] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64)
+    return arrays, unreadable
+
+# ──────────────────────────────────────────────────────────────
+# Checks
+# ──────────────────────────────────────────────────────────────
+def _near_split_factor(ratio: np.ndarray) -> np.ndarray:
+    factor = np.maximum(ratio, 1.0 / ratio)
+    return (np.abs(factor[:, None] / SPLIT_FACTORS - 1.0) < SPLIT_TOLERANCE).any(axis=1)
+
+def _volume_confirms_split(sym: np.ndarray, volume: np.ndarray, ratio: np.ndarray,
+                           candidates: np.ndarray) -> np.ndarray:
+    """
+    An unadjusted split moves the volume level by the inverse of the price factor
+    (a 2:1 split halves the price and doubles the volume); a news gap does not.
+    Compares the median volume of VOLUME_WINDOW bars before and after each
+    candidate (same symbol, bars in date order).
+    """
+    starts = np.searchsorted(sym, sym[candidates], side="left")
+    ends = np.searchsorted(sym, sym[candidates], side="right")
+    confirmed = np.zeros(len(candidates), dtype=bool)
+    for k, i in enumerate(candidates):
+        before = volume[max(starts[k], i - VOLUME_WINDOW):i]
+        after = volume[i:min(ends[k], i + VOLUME_WINDOW)]
+        pre, post = np.median(before), np.median(after)
+        if pre > 0 and post > 0:
+            confirmed[k] = np.log(post / pre) / -np.log(ratio[i]) >= VOLUME_SHIFT
+    return confirmed
+
+def find_issues(a: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """
+    Boolean mask per check over the stacked bars (file order). Also returns
+    "order" (bars sorted by symbol, then date) and "drop" (bars a repair removes).
+    """
+    sym, date = a["sym_id"], a["date"]
+    o, h, l, c, v = a["open"], a["high"], a["low"], a["close"], a["volume"]
+    n = len(sym)
+    issues = {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        issues["missing"]      = np.isnat(date) | np.isnan(np.stack([o, h, l, c, v])).any(axis=0)
+        issues["non_positive"] = (np.stack([o, h, l, c]) <= 0).any(axis=0)
+        issues["zero_volume"]  = v == 0
+        issues["high_low"]     = h < l
+        lo, hi = np.minimum(l, h), np.maximum(l, h)
+        tol = 1e-9 * np.abs(hi)
+        issues["out_of_range"] = ~issues["high_low"] & (
+            (o < lo - tol) | (o > hi + tol) | (c < lo - tol) | (c > hi + tol))
+
+        same_sym = np.zeros(n, dtype=bool)
+        same_sym[1:] = sym[1:] == sym[:-1]
+        issues["unsorted"] = np.zeros(n, dtype=bool)
+        issues["unsorted"][1:] = same_sym[1:] & (date[1:] < date[:-1])
+
+        # Sorted view: symbol, then date (NaT last); the last copy of a date wins
+        order = np.lexsort((np.arange(n), date, sym))
+        s_sym, s_date = sym[order], date[order]
+        dup_sorted = np.zeros(n, dtype=bool)
+        dup_sorted[:-1] = (s_sym[:-1] == s_sym[1:]) & (s_date[:-1] == s_date[1:]) & ~np.isnat(s_date[:-1])
+        issues["duplicate"] = np.zeros(n, dtype=bool)
+        issues["duplicate"][order] = dup_sorted
+
+        drop = issues["missing"] | issues["non_positive"] | issues["duplicate"]
+
+        # Jumps and gaps on the bars that survive a repair, in date order
+        kept = order[~drop[order]]
+        k_sym, k_close, k_open, k_volume = sym[kept], c[kept], o[kept], v[kept]
+        prev_same = np.zeros(len(kept), dtype=bool)
+        prev_same[1:] = k_sym[1:] == k_sym[:-1]
+        ratio = np.ones(len(kept))
+        ratio[1:] = k_close[1:] / k_close[:-1]
+        open_ratio = np.ones(len(kept))
+        open_ratio[1:] = k_open[1:] / k_close[:-1]
+        # A split shows as a split-factor jump that is already there at the open,
+        # with the volume level moving the opposite way
+        jump_kept = prev_same & _near_split_factor(ratio) & _near_split_factor(open_ratio)
+        candidates = np.flatnonzero(jump_kept)
+        jump_kept[candidates] = _volume_confirms_split(k_sym, k_volume, ratio, candidates)
+
+        calendar = TradingCalendar(date[kept])
+        ids = calendar.ids(date[kept])
+        gap_kept = np.zeros(len(kept), dtype=bool)
+        gap_kept[1:] = prev_same[1:] & (ids[1:] - ids[:-1] - 1 > MAX_GAP_BARS)
+
+    issues["jump"] = np.zeros(n, dtype=bool)
+    issues["jump"][kept[jump_kept]] = True
+    issues["gap"] = np.zeros(n, dtype=bool)
+    issues["gap"][kept[gap_kept]] = True
+    issues["order"] = order
+    issues["drop"] = drop
+    return issues
+
+def summarize(a: dict[str, np.ndarray], issues: dict[str, np.ndarray], unreadable: dict[str, str]) -> pd.DataFrame:
+    """One row per symbol: bar count, count per check, usable bars and the action."""
+    n_sym = len(a["symbols"])
+    sym = a["sym_id"]
+    table = pd.DataFrame({"Symbol": a["symbols"], "rows": np.bincount(sym, minlength=n_sym)})
+    for check in CHECKS:
+        table[check] = np.bincount(sym[issues[check]], minlength=n_sym)
+    table["usable_rows"] = table["rows"] - np.bincount(sym[issues["drop"]], minlength=n_sym)
+
+    bad_fraction = 1 - table["usable_rows"] / table["rows"].clip(lower=1)
+    quarantine = (table["jump"] > 0) | (table["usable_rows"] < MIN_ROWS) | (bad_fraction > MAX_BAD_FRACTION)
+    repair = table[REPAIRABLE].sum(axis=1) > 0
+    table["action"] = np.where(quarantine, "quarantine", np.where(repair, "repair", "ok"))
+    reasons = []
+    for row in table.itertuples(index=False):
+        found = [f"{check}={getattr(row, check)}" for check in CHECKS if getattr(row, check)]
+        if row.usable_rows < MIN_ROWS:
+            found.append(f"too_short={row.usable_rows}")
+        reasons.append(" ".join(found))
+    table["detail"] = reasons
+    if unreadable:
+        bad = pd.DataFrame({"Symbol": list(unreadable), "action": "quarantine", "detail": list(unreadable.values())})
+        table = pd.concat([table, bad], ignore_index=True)
+    int_cols = ["rows", "usable_rows"] + CHECKS
+    table[int_cols] = table[int_cols].fillna(0).astype(np.int64)
+    return table
+
+# ──────────────────────────────────────────────────────────────
+# Actions
+# ──────────────────────────────────────────────────────────────
+def repaired_frame(a: dict[str, np.ndarray], issues: dict[str, np.ndarray], j: int) -> pd.DataFrame:
+    """Symbol j's bars with the repairable problems fixed (date order)."""
+    rows = issues["order"][a["sym_id"][issues["order"]] == j]
+    rows = rows[~issues["drop"][rows]]
+    o, h, l, c, v = (a[k][rows] for k in ("open", "high", "low", "close", "volume"))
+    bars = np.stack([o, h, l, c])
+    return pd.DataFrame({
+        "Date":   pd.DatetimeIndex(a["date"][rows]).strftime("%Y-%m-%d"),
+        "Open":   o,
+        "High":   bars.max(axis=0),
+        "Low":    bars.min(axis=0),
+        "Close":  c,
+        "Volume": v.astype(np.int64) if np.all(v == np.round(v)) else v,
+    })
+
+def quarantine_symbol(base_directory: str, symbol: str) -> Path:
+    """Moves the price file to sp500_data/quarantine/ and removes its stale indicators."""
+    data_dir = Path(base_directory) / "sp500_data"
+    target = data_dir / QUARANTINE_DIR / f"{symbol}.csv"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    shutil.move(str(data_dir / f"{symbol}.csv"), str(target))
+    indicator_file = data_dir / "indicators" / (symbol + INDICATOR_SUFFIX)
+    if indicator_file.exists():
+        indicator_file.unlink()
+    return target
+
+@profiled_stage("data_quality")
+def validate_price_store(base_directory: str = ".", repair: bool = False,
+                         quarantine: bool = False) -> Generator[int, None, dict[str, Any]]:
+    """
+    Runs every check over all price files and writes the quality report.
+    With the defaults nothing in sp500_data is changed; the report lists the
+    action each symbol would get.
+    Args:
+        base_directory (str): Base directory where the sp500_data folder is located.
+        repair (bool): Rewrite files with repairable problems.
+        quarantine (bool): Move files that cannot be repaired to sp500_data/quarantine/.
+    Yields:
+        int: Progress from 0 to 100.
+    Returns:
+        dict: Summary (symbols, bars, counts per check, repaired and quarantined symbols).
+    """
+    files = _price_files(base_directory)
+    with timed("data_quality", "read"):
+        arrays, unreadable = load_price_store(files)
+    yield 40
+    with timed("data_quality", "checks"):
+        issues = find_issues(arrays)
+        table = summarize(arrays, issues, unreadable)
+    yield 60
+
+    benchmark = Path(BENCHMARK_FILE).stem
+    index = {s: j for j, s in enumerate(arrays["symbols"])}
+    repaired, quarantined = [], []
+    todo = table[table["action"] != "ok"]
+    progress = ProgressTracker("data_quality", len(todo), start=60, end=95)
+    for row in todo.itertuples(index=False):
+        symbol = row.Symbol
+        if row.action == "quarantine" and symbol != benchmark:
+            if quarantine:
+                with timed("data_quality", "quarantine", symbol):
+                    quarantine_symbol(base_directory, symbol)
+                quarantined.append(symbol)
+                print(f"⚠️  Quarantined {symbol}: {row.detail}")
+            else:
+                print(f"⚠️  {symbol} should be quarantined (not moved): {row.detail}")
+        elif repair and symbol in index and row.usable_rows > 0:
+            with timed("data_quality", "repair", symbol):
+                write_csv_atomic(repaired_frame(arrays, issues, index[symbol]),
+                                 Path(base_directory) / "sp500_data" / f"{symbol}.csv", index=False)
+            repaired.append(symbol)
+            print(f"🔧  Repaired {symbol}: {row.detail}")
+        yield from progress.step(current=symbol)
+
+    summary = {
+        "timestamp":   datetime.now().isoformat(timespec="seconds"),
+        "symbols":     int(len(table)),
+        "bars":        int(table["rows"].sum()),
+        "issues":      {check: int(table[check].sum()) for check in CHECKS},
+        "ok":          int((table["action"] == "ok").sum()),
+        "repaired":    repaired,
+        "quarantined": quarantined,
+        "flagged":     table.loc[table["action"] != "ok", ["Symbol", "action", "detail"]].to_dict("records"),
+    }
+    log_dir = Path(base_directory) / "log"
+    log_dir.mkdir(parents=True, exist_ok=True)
+    write_csv_atomic(table, log_dir / REPORT_CSV, index=False)
+    with atomic_write(log_dir / REPORT_JSON) as f:
+        json.dump(summary, f, indent=2)
+    print(format_quality_summary(summary))
+    yield 100
+    return summary
+
+def load_quality_report(base_directory: str = ".") -> dict[str, Any]:
+    """Summary of the last validation run (empty dict if it never ran)."""
+    path = Path(base_directory) / "log" / REPORT_JSON
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def format_quality_summary(summary: dict[str, Any]) -> str:
+    if not summary:
+        return ""
+    lines = [f"Data quality: {summary['symbols']} symbols, {summary['bars']:,} bars, "
+             f"{summary['ok']} clean, {len(summary['repaired'])} repaired, "
+             f"{len(summary['quarantined'])} quarantined"]
+    found = {check: n for check, n in summary["issues"].items() if n}
+    if found:
+        lines.append("  bars flagged: " + ", ".join(f"{check} {n:,}" for check, n in found.items()))
+    for entry in summary["flagged"][:20]:
+        lines.append(f"  {entry['Symbol']:<8} {entry['action']:<10} {entry['detail']}")
+    if len(summary["flagged"]) > 20:
+        lines.append(f"  … {len(summary['flagged']) - 20} more in {REPORT_CSV}")
+    return "\n".join(lines)
+
+def format_quality_report(base_directory: str = ".") -> str:
+    return format_quality_summary(load_quality_report(base_directory))
+
+if __name__ == "__main__":
+    base_dir = os.path.abspath(os.path.dirname(__file__))
+    for progress in validate_price_store(base_dir):
+        pass
@@ -1,12 +1,14 @@
 import os
 from dotenv import load_dotenv
-import openai
 from pathlib import Path
+from llm_client import complete
+from feature_importance import format_feature_importance
+from backtest import format_backtest_report
 
-def explain_xgboost_results(base_directory: str = ".", openai_api_key: str = None, instructions: str = None) -> str:
+def explain_xgboost_results(base_directory: str = ".", openai_api_key: str = None, instructions: str = None,
+                            use_cache: bool = True) -> str:
     if not openai_api_key:
         raise ValueError("OPENAI_API_KEY must be provided as a parameter.")
-    openai.api_key = openai_api_key
 
     # Read the latest xgboost report
     report_path = Path(base_directory) / "log" / "xgboost_report.txt"
@@ -32,6 +34,20 @@ def explain_xgboost_results(base_directory: str = ".", openai_api_key: str = Non
             "If we enter trades with a two to one risk reward ratio, what is the expected return in percentage?\n\n"
         )
 
+    importance = format_feature_importance(base_directory)
+    if importance:
+        last_report += (
+            "\n\nStage-1 feature importance (mean absolute SHAP contribution, log-odds):\n"
+            + importance
+        )
+
+    backtest = format_backtest_report(base_directory)
+    if backtest:
+        last_report += (
+            "\n\nBacktest of the buy signals (buy next open, sell close 5 days later, after costs):\n"
+            + backtest
+        )
+
     prompt = f"""
 {instructions}
 
@@ -43,13 +59,9 @@ Here is the report:
 """
 
     # Call OpenAI GPT-4o-mini model (changed from o4-mini to gpt-4o-mini and removed temperature parameter)
-    response = openai.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
-        max_completion_tokens=500
-    )
-
-    explanation = response.choices[0].message.content.strip()
+    # An unchanged report + instructions is answered from log/llm_cache.sqlite
+    explanation = complete("gpt-4o-mini", "", prompt, openai_api_key, max_tokens=500,
+                           base_directory=base_directory, use_cache=use_cache)
 
     # Save explanation to file
     explanation_path = Path(base_directory) / "log" / "xgboost_explanation.txt"
@@ -0,0 +1,141 @@
+"""
+Stage-1 Feature Importance (TreeSHAP)
+───────────────────────────────────────────────────────────────
+Computes XGBoost's native TreeSHAP contributions (pred_contribs) for
+the Stage-1 booster over the held-out test rows, in batches so memory
+stays bounded while xgboost spreads each batch over all cores.
+
+Aggregates:
+  global      mean |SHAP| and mean SHAP per feature
+  per symbol  mean |SHAP| per feature for every symbol
+
+Results are cached in models/explain/<model version>/ and computed
+once per training run; later calls just read the cache.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Generator
+import numpy as np
+import pandas as pd
+from native_predictor import get_native_dir, get_model_version, load_bundle, scale_features, BUNDLE_FILE
+from pipeline_checkpoint import atomic_write, write_csv_atomic
+
+EXPLAIN_DIR     = "explain"
+GLOBAL_FILE     = "global_importance.json"
+PER_SYMBOL_FILE = "symbol_importance.csv"
+TEST_INDEX_FILE = "test_index.npy"             # written by d_train_xgboost.train_models
+BATCH_SIZE      = 20_000
+
+# ──────────────────────────────────────────────────────────────
+def get_explain_dir(base_directory: str = ".", version: str = "") -> Path:
+    version = version or get_model_version(base_directory)
+    return Path(base_directory) / "models" / EXPLAIN_DIR / version
+
+def _contributions(booster, X_scaled: np.ndarray, best_iteration, batch_size: int):
+    import xgboost
+    iteration_range = (0, best_iteration + 1) if best_iteration is not None else (0, 0)
+    for start in range(0, len(X_scaled), batch_size):
+        dm = xgboost.DMatrix(X_scaled[start:start + batch_size])
+        # (rows × features+1); last column is the bias term
+        yield start, booster.predict(dm, pred_contribs=True, iteration_range=iteration_range)[:, :-1]
+
+def compute_feature_importance(base_directory: str = ".", batch_size: int = BATCH_SIZE) -> Generator[int, None, dict[str, float]]:
+    """
+    Computes (or loads from cache) the Stage-1 TreeSHAP importance for the current model.
+    Args:
+        base_directory (str): Directory holding models/ and sp500_data/.
+        batch_size (int): Rows per pred_contribs call.
+    Yields:
+        int: Progress from 0 to 100.
+    Returns:
+        dict[str, float]: Global mean |SHAP| per feature, largest first.
+    """
+    version = get_model_version(base_directory)
+    if not version:
+        raise FileNotFoundError("No native model bundle found. Train the model first.")
+    explain_dir = get_explain_dir(base_directory, version)
+    if (explain_dir / GLOBAL_FILE).exists():
+        yield 100
+        return load_feature_importance(base_directory)
+
+    import xgboost
+    native_dir = get_native_dir(base_directory)
+    with open(native_dir / BUNDLE_FILE) as f:
+        meta = json.load(f)
+    bundle = load_bundle(base_directory)
+    booster = xgboost.Booster(model_file=str(native_dir / meta["stage1"]["model_file"]))
+    booster.set_param({"nthread": os.cpu_count() or 1})
+
+    df = pd.read_csv(Path(base_directory) / "sp500_data" / "indicators" / "training_data.csv")
+    test_index_path = Path(base_directory) / "models" / TEST_INDEX_FILE
+    if test_index_path.exists():
+        df = df.loc[np.load(test_index_path)]
+    yield 10
+
+    X_scaled = scale_features(bundle, df)
+    symbols  = df["Symbol"].to_numpy() if "Symbol" in df.columns else None
+    features = bundle["feature_names"]
+    abs_sum  = np.zeros(len(features))
+    sum_     = np.zeros(len(features))
+    per_symbol = []
+    for start, contrib in _contributions(booster, X_scaled, meta["stage1"]["best_iteration"], batch_size):
+        abs_contrib = np.abs(contrib)
+        abs_sum += abs_contrib.sum(axis=0)
+        sum_    += contrib.sum(axis=0)
+        if symbols is not None:
+            part = pd.DataFrame(abs_contrib, columns=features)
+            part["Symbol"] = symbols[start:start + len(contrib)]
+            per_symbol.append(part.groupby("Symbol").agg(["sum", "count"]))
+        yield 10 + int(80 * min(start + len(contrib), len(X_scaled)) / max(len(X_scaled), 1))
+
+    n = max(len(X_scaled), 1)
+    order = np.argsort(-abs_sum)
+    result = {
+        "model_version": version,
+        "rows": int(len(X_scaled)),
+        "mean_abs_shap": {features[i]: float(abs_sum[i] / n) for i in order},
+        "mean_shap":     {features[i]: float(sum_[i] / n) for i in order},
+    }
+    explain_dir.mkdir(parents=True, exist_ok=True)
+    if per_symbol:
+        totals = pd.concat(per_symbol).groupby(level=0).sum()
+        sums   = totals.xs("sum", axis=1, level=1)
+        counts = totals.xs("count", axis=1, level=1)
+        write_csv_atomic((sums / counts).round(6), explain_dir / PER_SYMBOL_FILE, index_label="Symbol")
+    with atomic_write(explain_dir / GLOBAL_FILE) as f:
+        json.dump(result, f, indent=2)
+    print(f"Saved feature importance for model {version} → {explain_dir}")
+    yield 100
+    return result["mean_abs_shap"]
+
+# ──────────────────────────────────────────────────────────────
+def load_feature_importance(base_directory: str = ".") -> dict[str, float]:
+    """
+    Global mean |SHAP| per feature for the current model, largest first.
+    Empty if it has not been computed for this model version yet.
+    """
+    version = get_model_version(base_directory)
+    path = get_explain_dir(base_directory, version) / GLOBAL_FILE
+    if not version or not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)["mean_abs_shap"]
+
+def load_symbol_importance(base_directory: str, symbol: str) -> dict[str, float]:
+    """Mean |SHAP| per feature over the symbol's test rows, largest first."""
+    version = get_model_version(base_directory)
+    path = get_explain_dir(base_directory, version) / PER_SYMBOL_FILE
+    if not version or not path.exists():
+        return {}
+    df = pd.read_csv(path, index_col="Symbol")
+    if symbol.upper() not in df.index:
+        return {}
+    return df.loc[symbol.upper()].sort_values(ascending=False).to_dict()
+
+def format_feature_importance(base_directory: str = ".", top_n: int = 10) -> str:
+    """Plain-text table of the top features, as used in the LLM explanation prompt."""
+    importance = load_feature_importance(base_directory)
+    lines = [f"{name}: {value:.4f}" for name, value in list(importance.items())[:top_n]]
+    return "\n".join(lines)
@@ -3,7 +3,7 @@ import pandas as pd
 from pathlib import Path
 from typing import Generator
 from datetime import datetime
-import openai
+from llm_client import complete, complete_async, stream_completion_sync
 
 def lookup_latest_price(base_dir: str, symbol: str) -> tuple[datetime, float]:
     """
@@ -46,15 +46,20 @@ def get_latest_dates_for_all_symbols(base_dir: str) -> Generator[int, None, pd.D
     yield 100
     return df_results
 
-def call_openai_model(model: str, system_message: str, prompt: str, api_key: str) -> str:
+def call_openai_model(model: str, system_message: str, prompt: str, api_key: str,
+                      max_tokens: int = 2000, use_cache: bool = True, base_dir: str = ".") -> str:
     """
     Call an OpenAI model with the specified parameters.
+    Identical requests are answered from the persistent response cache (llm_client).
     
     Args:
         model: The OpenAI model to use (e.g., 'gpt-4', 'gpt-3.5-turbo')
         system_message: The system message to set the context
         prompt: The user prompt/message
         api_key: The OpenAI API key
+        max_tokens: Maximum completion tokens
+        use_cache: Return a cached response for an identical request if available
+        base_dir: User data directory; the cache is base_dir/log/llm_cache.sqlite
         
     Returns:
         The generated text response from the model
@@ -67,28 +72,51 @@ def call_openai_model(model: str, system_message: str, prompt: str, api_key: str
         if not api_key or api_key.strip() == "":
             raise Exception("OpenAI API key is required and cannot be empty")
         
-        # Create the client
-        client = openai.OpenAI(api_key=api_key)
-        
-        # Create the messages list
-        messages = [
-            {"role": "system", "content": system_message},
-            {"role": "user", "content": prompt}
-        ]
-        
-        # Make the API call - use minimal parameters to avoid compatibility issues
-        response = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            max_completion_tokens=2000
-        )
-        
-        # Extract and return the response text
-        return response.choices[0].message.content.strip()
+        # Make the API call (or cache lookup) - use minimal parameters to avoid compatibility issues
+        return complete(model, system_message, prompt, api_key,
+                        max_tokens=max_tokens, base_directory=base_dir, use_cache=use_cache)
         
     except Exception as e:
         raise Exception(f"OpenAI API call failed: {str(e)}")
 
+async def call_openai_model_async(model: str, system_message: str, prompt: str, api_key: str,
+                                  max_tokens: int = 2000, use_cache: bool = True, base_dir: str = ".") -> str:
+    """
+    Awaitable variant of call_openai_model on a pooled async client, so
+    several requests can be in flight without blocking a thread each.
+    Same arguments, result and errors as call_openai_model.
+    """
+    try:
+        if not api_key or api_key.strip() == "":
+            raise Exception("OpenAI API key is required and cannot be empty")
+        return await complete_async(model, system_message, prompt, api_key,
+                                    max_tokens=max_tokens, base_directory=base_dir, use_cache=use_cache)
+    except Exception as e:
+        raise Exception(f"OpenAI API call failed: {str(e)}")
+
+def stream_openai_model(model: str, system_message: str, prompt: str, api_key: str,
+                        max_tokens: int = 2000, base_dir: str = ".") -> Generator[str, None, str]:
+    """
+    Streams the model's reply as it is generated.
+
+    Args:
+        model, system_message, prompt, api_key, max_tokens, base_dir: as for call_openai_model
+
+    Yields:
+        Text chunks in order; appending them gives the full reply.
+        A cached reply arrives as a single chunk.
+
+    Returns:
+        The full response text
+    """
+    try:
+        if not api_key or api_key.strip() == "":
+            raise Exception("OpenAI API key is required and cannot be empty")
+        return (yield from stream_completion_sync(model, system_message, prompt, api_key,
+                                                  max_tokens=max_tokens, base_directory=base_dir))
+    except Exception as e:
+        raise Exception(f"OpenAI API call failed: {str(e)}")
+
 if __name__ == "__main__":
     base_dir = os.path.abspath(os.path.dirname(__file__))
     symbol = 'AAPL'
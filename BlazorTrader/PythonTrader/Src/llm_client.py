@@ -0,0 +1,344 @@
+"""
+LLM Client Layer
+───────────────────────────────────────────────────────────────
+Single entry point for chat completions used by e_explain_xgboost_results
+and g_llm_knowledge:
+
+  * pluggable client: OpenAI clients by default, StubChatClient (or any
+    object with complete / complete_async / stream_async) via
+    set_llm_client() for tests
+  * one pooled OpenAI client per API key / base URL (sync) and per event
+    loop (async), so HTTP connections are reused between calls
+  * async API (complete_async) and token streaming (stream_completion,
+    plus stream_completion_sync for hosts that consume plain generators)
+  * persistent response cache (SQLite, base_directory/log/llm_cache.sqlite)
+    keyed on a hash of model, system message, prompt and max tokens, with
+    TTL and size-based LRU eviction
+
+A repeat request with the same inputs is answered from the cache without
+touching the network. base_url (or OPENAI_BASE_URL) points every client at
+another OpenAI-compatible endpoint, e.g. mock_llm_server for tests.
+"""
+
+import asyncio
+import hashlib
+import json
+import queue
+import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+
+CACHE_DIR           = "log"                 # under base_directory, next to the other logs
+CACHE_FILE          = "llm_cache.sqlite"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_BYTES   = 50 * 2**20
+
+# ──────────────────────────────────────────────────────────────
+# Clients
+# ──────────────────────────────────────────────────────────────
+def build_messages(system_message: str, prompt: str) -> list[dict[str, str]]:
+    messages = []
+    if system_message:
+        messages.append({"role": "system", "content": system_message})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+def _check_api_key(api_key: str):
+    if not api_key or api_key.strip() == "":
+        raise ValueError("OpenAI API key is required and cannot be empty")
+
+class OpenAIChatClient:
+    """Wraps one openai.OpenAI client so its HTTP connection pool is reused."""
+    def __init__(self, api_key: str, base_url: str = ""):
+        _check_api_key(api_key)
+        import openai
+        self._client = openai.OpenAI(api_key=api_key, base_url=base_url or None)
+
+    def complete(self, model: str, system_message: str, prompt: str, max_tokens: int) -> str:
+        response = self._client.chat.completions.create(
+            model=model,
+            messages=build_messages(system_message, prompt),
+            max_completion_tokens=max_tokens
+        )
+        return response.choices[0].message.content.strip()
+
+class AsyncOpenAIChatClient:
+    """Wraps one openai.AsyncOpenAI client; bound to the event loop it is used on."""
+    def __init__(self, api_key: str, base_url: str = ""):
+        _check_api_key(api_key)
+        import openai
+        self._client = openai.AsyncOpenAI(api_key=api_key, base_url=base_url or None)
+
+    async def complete_async(self, model: str, system_message: str, prompt: str, max_tokens: int) -> str:
+        response = await self._client.chat.completions.create(
+            model=model,
+            messages=build_messages(system_message, prompt),
+            max_completion_tokens=max_tokens
+        )
+        return response.choices[0].message.content.strip()
+
+    async def stream_async(self, model: str, system_message: str, prompt: str, max_tokens: int):
+        stream = await self._client.chat.completions.create(
+            model=model,
+            messages=build_messages(system_message, prompt),
+            max_completion_tokens=max_tokens,
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+class StubChatClient:
+    """Offline stand-in for tests; records every call it receives."""
+    def __init__(self, response: str = "stub response", latency: float = 0.0):
+        self.response = response
+        self.latency = latency
+        self.calls = []
+
+    def _record(self, model, system_message, prompt, max_tokens):
+        self.calls.append({"model": model, "system_message": system_message,
+                           "prompt": prompt, "max_tokens": max_tokens})
+
+    def complete(self, model: str, system_message: str, prompt: str, max_tokens: int) -> str:
+        self._record(model, system_message, prompt, max_tokens)
+        if self.latency:
+            time.sleep(self.latency)
+        return self.response
+
+    async def complete_async(self, model: str, system_message: str, prompt: str, max_tokens: int) -> str:
+        self._record(model, system_message, prompt, max_tokens)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.response
+
+    async def stream_async(self, model: str, system_message: str, prompt: str, max_tokens: int):
+        self._record(model, system_message, prompt, max_tokens)
+        words = self.response.split(" ")
+        for i, word in enumerate(words):
+            if self.latency:
+                await asyncio.sleep(self.latency / len(words))
+            yield word if i == 0 else " " + word
+
+_client_override = None
+_openai_clients = {}                           # (api key, base url) -> OpenAIChatClient
+_async_clients = weakref.WeakKeyDictionary()   # event loop -> {(api key, base url): client}
+_clients_lock = threading.Lock()
+
+def set_llm_client(client) -> None:
+    """Routes every completion through `client` (None restores OpenAI)."""
+    global _client_override
+    _client_override = client
+
+def get_llm_client(api_key: str, base_url: str = ""):
+    if _client_override is not None:
+        return _client_override
+    with _clients_lock:
+        client = _openai_clients.get((api_key, base_url))
+        if client is None:
+            client = _openai_clients[(api_key, base_url)] = OpenAIChatClient(api_key, base_url)
+        return client
+
+def get_async_llm_client(api_key: str, base_url: str = ""):
+    """Pooled async client for the running event loop."""
+    if _client_override is not None:
+        return _client_override
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        per_loop = _async_clients.setdefault(loop, {})
+        client = per_loop.get((api_key, base_url))
+        if client is None:
+            client = per_loop[(api_key, base_url)] = AsyncOpenAIChatClient(api_key, base_url)
+        return client
+
+# ──────────────────────────────────────────────────────────────
+# Response cache
+# ──────────────────────────────────────────────────────────────
+def cache_key(model: str, system_message: str, prompt: str, max_tokens: int) -> str:
+    payload = json.dumps([model, system_message or "", prompt, int(max_tokens)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """
+    SQLite-backed cache. Entries expire after ttl_seconds; when the stored
+    responses exceed max_bytes the least recently used ones are evicted.
+    """
+    def __init__(self, path, ttl_seconds: float = DEFAULT_TTL_SECONDS, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.execute("""CREATE TABLE IF NOT EXISTS responses (
+                              key TEXT PRIMARY KEY,
+                              model TEXT,
+                              response TEXT,
+                              size INTEGER,
+                              created REAL,
+                              last_access REAL)""")
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            with db:                           # commit / rollback
+                yield db
+        finally:
+            db.close()
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._connect() as db:
+            row = db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def put(self, key: str, model: str, response: str) -> None:
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                       (key, model, response, size, now, now))
+            db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                for old_key, old_size in db.execute(
+                        "SELECT key, size FROM responses ORDER BY last_access").fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    db.execute("DELETE FROM responses WHERE key = ?", (old_key,))
+                    total -= old_size
+
+    def clear(self) -> None:
+        with self._connect() as db:
+            db.execute("DELETE FROM responses")
+
+    def stats(self) -> dict[str, int]:
+        with self._connect() as db:
+            count, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": count, "bytes": size}
+
+_caches = {}                                   # cache path -> ResponseCache
+
+def get_response_cache(base_directory: str = ".") -> ResponseCache:
+    path = Path(base_directory) / CACHE_DIR / CACHE_FILE
+    cache = _caches.get(str(path))
+    if cache is None:
+        cache = _caches[str(path)] = ResponseCache(path)
+    return cache
+
+# ──────────────────────────────────────────────────────────────
+def _cache_lookup(model, system_message, prompt, max_tokens, base_directory, use_cache):
+    key = cache_key(model, system_message, prompt, max_tokens)
+    cache = get_response_cache(base_directory) if use_cache else None
+    return key, cache, (cache.get(key) if cache is not None else None)
+
+def complete(model: str, system_message: str, prompt: str, api_key: str = "",
+             max_tokens: int = 2000, base_directory: str = ".", use_cache: bool = True,
+             base_url: str = "") -> str:
+    """
+    Returns the model's reply, from the response cache when the same
+    (model, system message, prompt, max tokens) was answered before.
+    """
+    key, cache, hit = _cache_lookup(model, system_message, prompt, max_tokens, base_directory, use_cache)
+    if hit is not None:
+        return hit
+    response = get_llm_client(api_key, base_url).complete(model, system_message, prompt, max_tokens)
+    if cache is not None and response:
+        cache.put(key, model, response)
+    return response
+
+async def complete_async(model: str, system_message: str, prompt: str, api_key: str = "",
+                         max_tokens: int = 2000, base_directory: str = ".", use_cache: bool = True,
+                         base_url: str = "") -> str:
+    """Awaitable variant of complete() on a pooled async client."""
+    key, cache, hit = _cache_lookup(model, system_message, prompt, max_tokens, base_directory, use_cache)
+    if hit is not None:
+        return hit
+    client = get_async_llm_client(api_key, base_url)
+    response = await client.complete_async(model, system_message, prompt, max_tokens)
+    if cache is not None and response:
+        cache.put(key, model, response)
+    return response
+
+async def stream_completion(model: str, system_message: str, prompt: str, api_key: str = "",
+                            max_tokens: int = 2000, base_directory: str = ".", use_cache: bool = True,
+                            base_url: str = ""):
+    """
+    Async generator of response text chunks as the model produces them.
+    A cached response is yielded as a single chunk; a completed stream is cached.
+    """
+    key, cache, hit = _cache_lookup(model, system_message, prompt, max_tokens, base_directory, use_cache)
+    if hit is not None:
+        yield hit
+        return
+    client = get_async_llm_client(api_key, base_url)
+    parts = []
+    async for chunk in client.stream_async(model, system_message, prompt, max_tokens):
+        parts.append(chunk)
+        yield chunk
+    response = "".join(parts).strip()
+    if cache is not None and response:
+        cache.put(key, model, response)
+
+# ──────────────────────────────────────────────────────────────
+# Sync bridge (for hosts that iterate plain generators)
+# ──────────────────────────────────────────────────────────────
+_loop = None
+_loop_lock = threading.Lock()
+_DONE = object()
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """One long-lived event loop thread, so its pooled async clients survive between calls."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="llm-client-loop", daemon=True).start()
+        return _loop
+
+def stream_completion_sync(model: str, system_message: str, prompt: str, api_key: str = "",
+                           max_tokens: int = 2000, base_directory: str = ".", use_cache: bool = True,
+                           base_url: str = ""):
+    """
+    Generator over stream_completion(): yields chunks as they arrive and
+    returns the full response text.
+    """
+    chunks = queue.Queue()
+    async def pump():
+        try:
+            async for chunk in stream_completion(model, system_message, prompt, api_key,
+                                                 max_tokens, base_directory, use_cache, base_url):
+                chunks.put(chunk)
+        except Exception as e:
+            chunks.put(e)
+        finally:
+            chunks.put(_DONE)
+
+    future = asyncio.run_coroutine_threadsafe(pump(), _background_loop())
+    parts = []
+    try:
+        while True:
+            item = chunks.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            parts.append(item)
+            yield item
+    finally:
+        future.cancel()                        # consumer stopped early
+    return "".join(parts).strip()
+
+def clear_llm_cache(base_directory: str = ".") -> None:
+    get_response_cache(base_directory).clear()
+
+def get_llm_cache_stats(base_directory: str = ".") -> dict[str, int]:
+    return get_response_cache(base_directory).stats()
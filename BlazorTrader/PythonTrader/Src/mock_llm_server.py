@@ -0,0 +1,116 @@
+"""
+Mock OpenAI Chat Server
+───────────────────────────────────────────────────────────────
+Minimal OpenAI-compatible /v1/chat/completions endpoint for exercising
+llm_client offline (plain JSON and SSE streaming responses):
+
+  python mock_llm_server.py --port 8765
+  OPENAI_BASE_URL=http://127.0.0.1:8765/v1 python g_llm_knowledge.py
+
+or in-process:
+
+  server, base_url = start_mock_server(reply="hello world")
+  complete("gpt-4o-mini", "", "hi", "test-key", base_url=base_url, use_cache=False)
+  server.shutdown()
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = "This is a mock response from the local test server."
+
+class _ChatHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"              # keep-alive, so connection reuse is visible
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        self.server.requests.append(body)
+        model = body.get("model", "mock")
+        words = self.server.reply.split(" ")
+        if body.get("stream"):
+            self._stream(model, words)
+        else:
+            self._send_json({
+                "id": "chatcmpl-mock", "object": "chat.completion", "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": self.server.reply}}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(words), "total_tokens": len(words)},
+            })
+
+    def _send_json(self, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, model, words):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, word in enumerate(words):
+            if self.server.token_delay:
+                time.sleep(self.server.token_delay)
+            self._event({
+                "id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": None,
+                             "delta": {"content": word if i == 0 else " " + word}}],
+            })
+        self._event({
+            "id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": int(time.time()),
+            "model": model, "choices": [{"index": 0, "finish_reason": "stop", "delta": {}}],
+        })
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _event(self, payload):
+        self._write_chunk(f"data: {json.dumps(payload)}\n\n".encode())
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+def start_mock_server(port: int = 0, reply: str = DEFAULT_REPLY, token_delay: float = 0.0):
+    """
+    Starts the server on a daemon thread.
+    Args:
+        port (int): Port to listen on (0 picks a free one).
+        reply (str): Text every request is answered with.
+        token_delay (float): Seconds between streamed words.
+    Returns:
+        (server, base_url): call server.shutdown() when done; every received
+        request body is appended to server.requests.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), _ChatHandler)
+    server.daemon_threads = True
+    server.reply = reply
+    server.token_delay = token_delay
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock OpenAI chat completions server.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--reply", default=DEFAULT_REPLY)
+    parser.add_argument("--token-delay", type=float, default=0.05)
+    args = parser.parse_args()
+    server, base_url = start_mock_server(args.port, args.reply, args.token_delay)
+    print(f"Mock LLM server listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,206 @@
+"""
+Native Two-Stage Predictor
+───────────────────────────────────────────────────────────────
+Loads the bundle written by d_train_xgboost.export_native_bundle
+and scores it with NumPy only (no sklearn, xgboost or joblib):
+
+  models/native/bundle.json          feature names, threshold,
+                                     scaler mean/scale, isotonic table
+  models/native/stage1_booster.json  XGBoost native JSON model
+  models/native/stage2_booster.json  XGBoost native JSON model
+"""
+
+import hashlib
+import json
+from pathlib import Path
+import numpy as np
+
+NATIVE_DIR    = "native"
+BUNDLE_FILE   = "bundle.json"
+MODEL_FILES   = (BUNDLE_FILE, "stage1_booster.json", "stage2_booster.json")
+STAGE2_LABELS = ["No-Buy", "Strong Buy", "Must Buy"]
+ROW_CHUNK     = 4096                           # rows scored per pass
+
+_BUNDLE_CACHE = {}                             # bundle path -> (mtime, bundle)
+_VERSION_CACHE = {}                            # native dir -> (file stats, version)
+
+# ──────────────────────────────────────────────────────────────
+def get_native_dir(base_directory: str = ".") -> Path:
+    return Path(base_directory) / "models" / NATIVE_DIR
+
+def has_native_bundle(base_directory: str = ".") -> bool:
+    return (get_native_dir(base_directory) / BUNDLE_FILE).exists()
+
+def get_model_version(base_directory: str = ".") -> str:
+    """
+    Short content hash of the native bundle (manifest + boosters), used to key
+    anything derived from a trained model. Empty string if no bundle exists.
+    The hash is only recomputed when a file's mtime or size changes.
+    """
+    native_dir = get_native_dir(base_directory)
+    stats = []
+    for name in MODEL_FILES:
+        try:
+            st = (native_dir / name).stat()
+            stats.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            stats.append(None)
+    if stats[0] is None:
+        return ""
+    key = str(native_dir)
+    cached = _VERSION_CACHE.get(key)
+    if cached is not None and cached[0] == stats:
+        return cached[1]
+    digest = hashlib.sha256()
+    for name, stat in zip(MODEL_FILES, stats):
+        if stat is not None:
+            digest.update((native_dir / name).read_bytes())
+    version = digest.hexdigest()[:16]
+    _VERSION_CACHE[key] = (stats, version)
+    return version
+
+# ──────────────────────────────────────────────────────────────
+def _parse_base_score(raw):
+    # xgboost >= 3 writes "[a,b,...]", older versions a plain scalar
+    return np.array([float(v) for v in str(raw).strip("[]").split(",")], dtype=np.float64)
+
+def _load_forest(model_path: Path, best_iteration):
+    """
+    Flattens an XGBoost JSON model into padded (n_trees × max_nodes) arrays
+    so that every tree can be walked at once for a block of rows.
+    """
+    with open(model_path) as f:
+        learner = json.load(f)["learner"]
+    model = learner["gradient_booster"]["model"]
+    trees = model["trees"]
+    tree_info = np.asarray(model["tree_info"], dtype=np.int64)
+    if best_iteration is not None:
+        # Same tree range the sklearn wrapper uses after early stopping
+        n_used = int(model["iteration_indptr"][best_iteration + 1])
+        trees, tree_info = trees[:n_used], tree_info[:n_used]
+
+    n_trees   = len(trees)
+    max_nodes = max(len(t["left_children"]) for t in trees)
+    left      = np.full((n_trees, max_nodes), -1, dtype=np.int32)
+    right     = np.full((n_trees, max_nodes), -1, dtype=np.int32)
+    feature   = np.zeros((n_trees, max_nodes), dtype=np.int32)
+    cond      = np.zeros((n_trees, max_nodes), dtype=np.float32)
+    dleft     = np.zeros((n_trees, max_nodes), dtype=bool)
+    for i, t in enumerate(trees):
+        n = len(t["left_children"])
+        left[i, :n]    = t["left_children"]
+        right[i, :n]   = t["right_children"]
+        feature[i, :n] = t["split_indices"]
+        cond[i, :n]    = t["split_conditions"]     # leaf value on leaf nodes
+        dleft[i, :n]   = np.asarray(t["default_left"], dtype=bool)
+
+    objective  = learner["objective"]["name"]
+    n_class    = max(int(learner["learner_model_param"].get("num_class", "0")), 1)
+    base_score = _parse_base_score(learner["learner_model_param"]["base_score"])
+    if objective == "binary:logistic":
+        # binary base_score is stored as a probability
+        base_margin = np.log(base_score / (1.0 - base_score))
+    else:
+        base_margin = base_score
+    return {
+        "left": left, "right": right, "feature": feature, "cond": cond,
+        "default_left": dleft, "is_leaf": left == -1,
+        "tree_info": tree_info, "n_class": n_class,
+        "base_margin": np.broadcast_to(base_margin, (n_class,)).copy(),
+        "objective": objective,
+    }
+
+def _forest_margin(forest, X: np.ndarray) -> np.ndarray:
+    """Raw margin (n_rows × n_class) for float32 features X."""
+    n_rows, n_trees = len(X), forest["left"].shape[0]
+    tree_idx = np.arange(n_trees)[None, :]
+    out = np.empty((n_rows, forest["n_class"]), dtype=np.float64)
+    for start in range(0, n_rows, ROW_CHUNK):
+        Xc   = X[start:start + ROW_CHUNK]
+        rows = np.arange(len(Xc))[:, None]
+        node = np.zeros((len(Xc), n_trees), dtype=np.int32)
+        while True:
+            active = ~forest["is_leaf"][tree_idx, node]
+            if not active.any():
+                break
+            x = Xc[rows, forest["feature"][tree_idx, node]]
+            go_left = np.where(np.isnan(x),
+                               forest["default_left"][tree_idx, node],
+                               x < forest["cond"][tree_idx, node])
+            nxt  = np.where(go_left, forest["left"][tree_idx, node], forest["right"][tree_idx, node])
+            node = np.where(active, nxt, node)
+        leaf = forest["cond"][tree_idx, node].astype(np.float64)
+        for k in range(forest["n_class"]):
+            out[start:start + len(Xc), k] = leaf[:, forest["tree_info"] == k].sum(axis=1)
+    return out + forest["base_margin"]
+
+def _forest_proba(forest, X: np.ndarray) -> np.ndarray:
+    margin = _forest_margin(forest, X)
+    if forest["objective"] == "binary:logistic":
+        return 1.0 / (1.0 + np.exp(-margin[:, 0]))
+    margin -= margin.max(axis=1, keepdims=True)  # multi:softprob
+    e = np.exp(margin)
+    return e / e.sum(axis=1, keepdims=True)
+
+# ──────────────────────────────────────────────────────────────
+def load_bundle(base_directory: str = "."):
+    """
+    Loads (and caches until the files change) the native bundle.
+    Returns a dict with the scaler arrays, calibration table and both forests.
+    """
+    native_dir  = get_native_dir(base_directory)
+    bundle_path = native_dir / BUNDLE_FILE
+    if not bundle_path.exists():
+        raise FileNotFoundError(f"Native model bundle not found: {bundle_path}")
+    mtime = bundle_path.stat().st_mtime_ns
+    cached = _BUNDLE_CACHE.get(str(bundle_path))
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with open(bundle_path) as f:
+        meta = json.load(f)
+    bundle = {
+        "feature_names": meta["feature_names"],
+        "threshold":     float(meta["threshold"]),
+        "mean":          np.asarray(meta["scaler"]["mean"], dtype=np.float64),
+        "scale":         np.asarray(meta["scaler"]["scale"], dtype=np.float64),
+        "iso_x":         np.asarray(meta["stage1"]["calibration"]["x"], dtype=np.float64),
+        "iso_y":         np.asarray(meta["stage1"]["calibration"]["y"], dtype=np.float64),
+        "stage1":        _load_forest(native_dir / meta["stage1"]["model_file"],
+                                      meta["stage1"]["best_iteration"]),
+        "stage2":        _load_forest(native_dir / meta["stage2"]["model_file"],
+                                      meta["stage2"]["best_iteration"]),
+        "labels":        np.array(meta["stage2"].get("labels", STAGE2_LABELS), dtype=object),
+    }
+    _BUNDLE_CACHE[str(bundle_path)] = (mtime, bundle)
+    return bundle
+
+def scale_features(bundle, X) -> np.ndarray:
+    """Reindexes X to the training features and applies the saved StandardScaler."""
+    if hasattr(X, "reindex"):
+        X = X.reindex(columns=bundle["feature_names"], fill_value=0).to_numpy(dtype=np.float64)
+    X = np.asarray(X, dtype=np.float64)
+    return ((X - bundle["mean"]) / bundle["scale"]).astype(np.float32)
+
+def predict_buy_proba(bundle, X_scaled: np.ndarray) -> np.ndarray:
+    """Calibrated Stage-1 'Buy' probability (isotonic table, clipped like sklearn)."""
+    raw = _forest_proba(bundle["stage1"], X_scaled)
+    return np.clip(np.interp(raw, bundle["iso_x"], bundle["iso_y"]), 0.0, 1.0)
+
+def predict_strength_proba(bundle, X_scaled: np.ndarray) -> np.ndarray:
+    """Stage-2 class probabilities (rows × labels), in the order of bundle["labels"]."""
+    return _forest_proba(bundle["stage2"], X_scaled)
+
+def predict_buy_strength_native(X, base_directory: str = "."):
+    """
+    Same contract as d_train_xgboost.predict_buy_strength, backed by the native bundle.
+    Returns: numpy array of predicted labels ("No-Buy", "Strong Buy", "Must Buy")
+    """
+    bundle   = load_bundle(base_directory)
+    X_scaled = scale_features(bundle, X)
+    is_buy   = predict_buy_proba(bundle, X_scaled) >= bundle["threshold"]
+    result   = np.full(len(X_scaled), "No-Buy", dtype=object)
+    if is_buy.any():
+        p_strength = predict_strength_proba(bundle, X_scaled[is_buy])
+        result[is_buy] = bundle["labels"][p_strength.argmax(1)]
+    return result
@@ -0,0 +1,202 @@
+"""
+Cross-Sectional Panel Features
+───────────────────────────────────────────────────────────────
+Loads the per-symbol indicator files into dense (dates × symbols)
+arrays on the global trading calendar and computes features that
+compare symbols with each other on the same date:
+
+  atr_rank               percentile of ATR / Close across symbols (0 = least volatile)
+  cs_ret5_z              z-score of the 5-day return across symbols
+  cs_rsi_z               z-score of RSI_14 across symbols
+  cs_vol_ratio_z         z-score of vol_ma_ratio_20 across symbols
+  cs_ret5_sector_rank    percentile of the 5-day return within the symbol's sector
+  cs_sma20_sector_rank   percentile of close_sma20_ratio within the sector
+  breadth_above_sma20    share of symbols closing above their SMA20 (same for all symbols)
+  breadth_advancers      share of symbols with a positive 1-day return
+
+Ranks and z-scores need at least MIN_SYMBOLS values on a date (NaN
+otherwise). Sectors come from the 'Sector' column of sp500_symbols.csv;
+without it every symbol is in one group. The computation runs over
+blocks of CHUNK_DATES dates, so temporaries stay bounded, and the
+results are written back into each *_Indicators.csv, where training
+and prediction pick them up like any other column.
+"""
+
+import os
+import warnings
+from pathlib import Path
+from typing import Generator
+import numpy as np
+import pandas as pd
+from pipeline_metrics import timed, profiled_stage
+from pipeline_checkpoint import write_csv_atomic
+from pipeline_progress import ProgressTracker
+from trading_calendar import build_calendar
+
+INDICATOR_SUFFIX = "_Indicators.csv"
+SYMBOLS_FILE     = "sp500_symbols.csv"
+MIN_SYMBOLS      = 5
+CHUNK_DATES      = 256
+INPUT_FIELDS     = ["Close", "RSI_14", "vol_ma_ratio_20", "close_sma20_ratio"]
+PANEL_FEATURES   = [
+    "atr_rank", "cs_ret5_z", "cs_rsi_z", "cs_vol_ratio_z",
+    "cs_ret5_sector_rank", "cs_sma20_sector_rank",
+    "breadth_above_sma20", "breadth_advancers",
+]
+
+# ──────────────────────────────────────────────────────────────
+# Cross-sectional primitives (rows = dates, columns = symbols)
+# ──────────────────────────────────────────────────────────────
+def cs_rank(x: np.ndarray, min_count: int = MIN_SYMBOLS) -> np.ndarray:
+    """Percentile rank per row, 0 (lowest) … 1 (highest); NaN stays NaN."""
+    valid = ~np.isnan(x)
+    n = valid.sum(axis=1, keepdims=True)
+    # NaN sorts last, so valid values get ranks 0 … n-1
+    ranks = np.argsort(np.argsort(np.where(valid, x, np.inf), axis=1, kind="stable"), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct = ranks / np.maximum(n - 1, 1)
+    return np.where(valid & (n >= min_count), pct, np.nan).astype(np.float32)
+
+def cs_zscore(x: np.ndarray, min_count: int = MIN_SYMBOLS) -> np.ndarray:
+    """(x - row mean) / row std over the non-NaN values of each row."""
+    valid = ~np.isnan(x)
+    n = valid.sum(axis=1, keepdims=True)
+    filled = np.where(valid, x, 0.0).astype(np.float64)
+    mean = filled.sum(axis=1, keepdims=True) / np.maximum(n, 1)
+    var = (np.where(valid, filled - mean, 0.0) ** 2).sum(axis=1, keepdims=True) / np.maximum(n - 1, 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (x - mean) / np.sqrt(var)
+    return np.where(valid & (n >= min_count) & (var > 0), z, np.nan).astype(np.float32)
+
+def cs_group_rank(x: np.ndarray, groups: np.ndarray, min_count: int = MIN_SYMBOLS) -> np.ndarray:
+    """cs_rank within each group of columns (e.g. sector-neutral ranks)."""
+    out = np.full(x.shape, np.nan, dtype=np.float32)
+    for g in np.unique(groups):
+        cols = groups == g
+        out[:, cols] = cs_rank(x[:, cols], min_count)
+    return out
+
+def cs_share(mask: np.ndarray, valid: np.ndarray, min_count: int = MIN_SYMBOLS) -> np.ndarray:
+    """Share of valid columns where mask holds, per row (breadth)."""
+    n = valid.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        share = (mask & valid).sum(axis=1) / n
+    return np.where(n >= min_count, share, np.nan).astype(np.float32)
+
+# ──────────────────────────────────────────────────────────────
+# Panel
+# ──────────────────────────────────────────────────────────────
+def load_sectors(base_directory: str, symbols: list[str]) -> np.ndarray:
+    path = Path(base_directory) / SYMBOLS_FILE
+    sectors = {}
+    if path.exists():
+        df = pd.read_csv(path)
+        if "Sector" in df.columns:
+            sectors = dict(zip(df["Symbol"].astype(str), df["Sector"].fillna("Unknown").astype(str)))
+    return np.array([sectors.get(s, "Unknown") for s in symbols], dtype=object)
+
+def load_panel(base_directory: str = ".") -> dict:
+    """
+    Reads the input fields of every indicator file into (dates × symbols) float32
+    arrays on the trading calendar. Returns {"calendar", "symbols", "date_ids", <fields>}.
+    """
+    indicator_dir = Path(base_directory) / "sp500_data" / "indicators"
+    files = sorted(indicator_dir.glob("*" + INDICATOR_SUFFIX))
+    calendar = build_calendar(base_directory)
+    symbols = [f.name[:-len(INDICATOR_SUFFIX)] for f in files]
+    shape = (len(calendar), len(symbols))
+    panel = {field: np.full(shape, np.nan, dtype=np.float32) for field in INPUT_FIELDS + ["atr"]}
+    date_ids = []
+    for j, file in enumerate(files):
+        with timed("panel_features", "read", symbols[j]):
+            df = pd.read_csv(file, usecols=lambda c: c in INPUT_FIELDS or c == "Date"
+                             or c.startswith("ATRr_") or c.startswith("ATR_"))
+        ids = calendar.ids(pd.to_datetime(df["Date"]).to_numpy())
+        date_ids.append(ids)
+        keep = ids >= 0
+        for field in INPUT_FIELDS:
+            if field in df.columns:
+                panel[field][ids[keep], j] = df[field].to_numpy(dtype=np.float32)[keep]
+        atr_col = next((c for c in df.columns if c.startswith("ATRr_") or c.startswith("ATR_")), None)
+        if atr_col is not None:
+            panel["atr"][ids[keep], j] = df[atr_col].to_numpy(dtype=np.float32)[keep]
+    panel.update(calendar=calendar, symbols=symbols, date_ids=date_ids, files=files)
+    return panel
+
+def _shift(x: np.ndarray, n: int) -> np.ndarray:
+    """Value n calendar rows earlier (NaN-padded)."""
+    out = np.full_like(x, np.nan)
+    out[n:] = x[:-n]
+    return out
+
+def compute_panel_features(panel: dict, sectors: np.ndarray, chunk_dates: int = CHUNK_DATES) -> dict[str, np.ndarray]:
+    """Computes PANEL_FEATURES as (dates × symbols) float32 arrays, CHUNK_DATES rows at a time."""
+    close = panel["Close"]
+    n_dates = close.shape[0]
+    out = {name: np.full(close.shape, np.nan, dtype=np.float32) for name in PANEL_FEATURES}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        for start in range(0, n_dates, chunk_dates):
+            rows = slice(start, min(start + chunk_dates, n_dates))
+            # Lookback rows needed for the 1- and 5-day returns
+            lo = max(start - 5, 0)
+            c = close[lo:rows.stop]
+            ret1 = (c / _shift(c, 1) - 1.0)[start - lo:]
+            ret5 = (c / _shift(c, 5) - 1.0)[start - lo:]
+            valid = ~np.isnan(close[rows])
+
+            out["atr_rank"][rows]             = cs_rank(panel["atr"][rows] / close[rows])
+            out["cs_ret5_z"][rows]            = cs_zscore(ret5)
+            out["cs_rsi_z"][rows]             = cs_zscore(panel["RSI_14"][rows])
+            out["cs_vol_ratio_z"][rows]       = cs_zscore(panel["vol_ma_ratio_20"][rows])
+            out["cs_ret5_sector_rank"][rows]  = cs_group_rank(ret5, sectors)
+            out["cs_sma20_sector_rank"][rows] = cs_group_rank(panel["close_sma20_ratio"][rows], sectors)
+            out["breadth_above_sma20"][rows]  = cs_share(panel["close_sma20_ratio"][rows] > 0, valid)[:, None]
+            out["breadth_advancers"][rows]    = cs_share(ret1 > 0, valid & ~np.isnan(ret1))[:, None]
+    return out
+
+# ──────────────────────────────────────────────────────────────
+@profiled_stage("panel_features")
+def calculate_panel_features(base_directory: str = ".") -> Generator[int, None, None]:
+    """
+    Computes the cross-sectional features for the whole universe and writes
+    them into every *_Indicators.csv (replacing the atr_rank placeholder).
+    Args:
+        base_directory (str): Base directory where the sp500_data folder is located.
+    Yields:
+        int: Progress from 0 to 100.
+    """
+    panel = load_panel(base_directory)
+    if not panel["symbols"]:
+        print("No indicator files found.")
+        yield 100
+        return
+    yield 30
+    sectors = load_sectors(base_directory, panel["symbols"])
+    with timed("panel_features", "compute"):
+        features = compute_panel_features(panel, sectors)
+    print(f"Cross-sectional features for {len(panel['symbols'])} symbols × "
+          f"{len(panel['calendar'])} dates ({len(np.unique(sectors))} sector groups)")
+    yield 50
+
+    progress = ProgressTracker("panel_features", len(panel["files"]), start=50)
+    for j, (file, ids) in enumerate(zip(panel["files"], panel["date_ids"])):
+        symbol = panel["symbols"][j]
+        with timed("panel_features", "write", symbol):
+            df = pd.read_csv(file)
+            keep = ids >= 0
+            # Keep the label columns last, as written by calculate_indicators
+            labels = [c for c in ("five_day_long_profit", "five_day_class") if c in df.columns]
+            cols = [c for c in df.columns if c not in PANEL_FEATURES and c not in labels]
+            df = df[cols + labels].copy()
+            for pos, name in enumerate(PANEL_FEATURES):
+                values = np.full(len(df), np.nan, dtype=np.float32)
+                values[keep] = features[name][ids[keep], j]
+                df.insert(len(cols) + pos, name, values)
+            write_csv_atomic(df, file, index=False)
+        yield from progress.step(current=symbol)
+
+if __name__ == "__main__":
+    base_dir = os.path.abspath(os.path.dirname(__file__))
+    for progress in calculate_panel_features(base_dir):
+        pass
@@ -0,0 +1,161 @@
+"""
+Pipeline Checkpoints
+───────────────────────────────────────────────────────────────
+Crash-safe outputs and resumable stages.
+
+atomic_write / write_csv_atomic
+    Every stage output is written to a hidden temp file next to the
+    target (".<name>.<pid>.tmp"), flushed to disk and renamed over the
+    target with os.replace. Readers see the old file or the new one,
+    never a half-written one, even if the app is closed mid-write.
+
+StageJournal
+    An append-only log/checkpoints/<stage>.jsonl recording every item
+    (symbol, output) a stage has completed, together with the input
+    signature it was computed from. When a stage is re-invoked after a
+    crash with the same stage signature, it resumes: items whose entry
+    matches the current input (and whose output still exists) are
+    skipped, everything else is redone. A finished journal, or one with
+    a different stage signature, starts over. A torn last line (crash
+    while appending) is dropped when the journal is reopened.
+"""
+
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+CHECKPOINT_DIR = Path("log") / "checkpoints"
+TEMP_SUFFIX    = ".tmp"
+
+# ──────────────────────────────────────────────────────────────
+# Atomic writes
+# ──────────────────────────────────────────────────────────────
+def _temp_path(path: Path) -> Path:
+    # Hidden and without the target's extension, so "*.csv" / "*.json" scans skip it
+    return path.with_name(f".{path.name}.{os.getpid()}{TEMP_SUFFIX}")
+
+@contextmanager
+def atomic_write(path, mode: str = "w", **open_kwargs):
+    """
+    open() replacement for writing `path` atomically. The file object writes to
+    a temp file; on success it is fsynced and renamed over `path`, on error the
+    temp file is removed and `path` is left untouched.
+    """
+    path = Path(path)
+    tmp = _temp_path(path)
+    try:
+        with open(tmp, mode, **open_kwargs) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+
+def write_csv_atomic(df, path, **to_csv_kwargs) -> None:
+    """DataFrame.to_csv through atomic_write."""
+    with atomic_write(path, "w", newline="", encoding="utf-8") as f:
+        df.to_csv(f, **to_csv_kwargs)
+
+def remove_temp_files(directory) -> int:
+    """Deletes temp files left behind by a crashed atomic_write in `directory`."""
+    removed = 0
+    for tmp in Path(directory).glob(f".*{TEMP_SUFFIX}"):
+        try:
+            tmp.unlink()
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+def file_signature(path) -> list[int] | None:
+    """[size, mtime_ns] of `path`, or None if it does not exist."""
+    try:
+        st = Path(path).stat()
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+def files_signature(paths) -> str:
+    """Short hash over the names and signatures of `paths` (stage inputs)."""
+    h = hashlib.sha1()
+    for p in sorted(Path(p) for p in paths):
+        h.update(f"{p.name}:{file_signature(p)};".encode())
+    return h.hexdigest()[:16]
+
+# ──────────────────────────────────────────────────────────────
+# Checkpoint journal
+# ──────────────────────────────────────────────────────────────
+class StageJournal:
+    def __init__(self, base_directory: str, stage: str, signature: str = ""):
+        self.path = Path(base_directory) / CHECKPOINT_DIR / f"{stage}.jsonl"
+        self.stage = stage
+        self.signature = signature
+        self.completed = {}                    # item -> recorded input signature
+        self.resumed = False
+        self._load()
+
+    def _load(self):
+        header, completed, finished = None, {}, False
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:   # torn last line
+                        break
+                    if header is None:
+                        header = entry
+                    elif "item" in entry:
+                        completed[entry["item"]] = entry.get("input")
+                    elif "finished" in entry:
+                        finished = True
+        if header is not None and header.get("signature") == self.signature and not finished:
+            self.resumed = bool(completed)
+            self._rewrite(header, completed)   # drops a torn line before appending
+        else:
+            self.reset()
+
+    def _rewrite(self, header: dict[str, Any], completed: dict[str, Any]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.completed = dict(completed)
+        with atomic_write(self.path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(header) + "\n")
+            for item, input_signature in completed.items():
+                f.write(json.dumps({"item": item, "input": input_signature}) + "\n")
+
+    def reset(self):
+        """Starts a new run: forgets every completed item."""
+        self.resumed = False
+        self._rewrite({"stage": self.stage, "signature": self.signature, "started": time.time()}, {})
+
+    def _append(self, entry: dict[str, Any]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def is_done(self, item: str, input_signature: Any = None, output=None) -> bool:
+        """True if `item` was completed from the same input and its output still exists."""
+        if item not in self.completed:
+            return False
+        if self.completed[item] != input_signature:
+            return False
+        return output is None or Path(output).exists()
+
+    def done(self, item: str, input_signature: Any = None):
+        """Records `item` as completed (call after its output has been written)."""
+        self.completed[item] = input_signature
+        self._append({"item": item, "input": input_signature})
+
+    def finish(self):
+        """Marks the run complete; the next invocation starts over."""
+        self._append({"finished": time.time()})
@@ -0,0 +1,202 @@
+"""
+Pipeline Metrics
+───────────────────────────────────────────────────────────────
+Opt-in instrumentation for the pipeline stages. When enabled, the
+stages record one structured event per sub-step (read, ta_features,
+custom_features, write, fit_stage1, calibrate, ...) and symbol, and
+keep running totals per (stage, step). The C# host polls them with
+get_events / get_summary while a generator is running.
+
+With a profile directory set, every stage run is also captured with
+cProfile and dumped as <stage>_<timestamp>.prof plus a .txt summary.
+
+Disabled (the default), timed() is a single attribute check that returns
+a shared no-op context manager, and a @profiled_stage generator runs
+unwrapped.
+"""
+
+import cProfile
+import functools
+import io
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Generator
+
+MAX_EVENTS = 100_000                           # oldest events are dropped first
+
+class PipelineMetrics:
+    def __init__(self, max_events: int = MAX_EVENTS):
+        self.enabled = False
+        self.profile_dir = None
+        self._lock = threading.Lock()
+        self._events = deque(maxlen=max_events)
+        self._seq = 0
+        self._totals = {}                      # (stage, step) -> [count, total_s, max_s]
+
+    def record(self, stage: str, step: str, duration: float, symbol: str | None = None):
+        with self._lock:
+            self._seq += 1
+            self._events.append({
+                "seq": self._seq,
+                "time": time.time(),
+                "stage": stage,
+                "step": step,
+                "symbol": symbol,
+                "duration_ms": duration * 1000.0,
+            })
+            tot = self._totals.setdefault((stage, step), [0, 0.0, 0.0])
+            tot[0] += 1
+            tot[1] += duration
+            tot[2] = max(tot[2], duration)
+
+    def events(self, since: int = 0) -> list[dict[str, Any]]:
+        with self._lock:
+            return [e for e in self._events if e["seq"] > since]
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return {
+                f"{stage}/{step}": {
+                    "count": float(count),
+                    "total_s": total,
+                    "mean_ms": total / count * 1000.0,
+                    "max_ms": worst * 1000.0,
+                }
+                for (stage, step), (count, total, worst) in self._totals.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._events.clear()
+            self._totals.clear()
+            self._seq = 0
+
+METRICS = PipelineMetrics()
+
+# ──────────────────────────────────────────────────────────────
+_NO_OP = nullcontext()                          # reusable; returned by timed() when disabled
+
+class _Timer:
+    __slots__ = ("stage", "step", "symbol", "t0")
+
+    def __init__(self, stage: str, step: str, symbol: str | None):
+        self.stage, self.step, self.symbol = stage, step, symbol
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        METRICS.record(self.stage, self.step, time.perf_counter() - self.t0, self.symbol)
+        return False
+
+def timed(stage: str, step: str, symbol: str | None = None):
+    """Records the duration of the enclosed block as one event (no-op when disabled)."""
+    if not METRICS.enabled:
+        return _NO_OP
+    return _Timer(stage, step, symbol)
+
+def profiled_stage(stage: str) -> Callable:
+    """
+    Decorator for a stage generator function: records a 'total' event per run
+    and, if a profile directory is configured, runs the stage under cProfile
+    and dumps the result. The profiler is paused while the generator is
+    suspended at a yield, so work the host does between progress updates is
+    not attributed to the stage, and a nested stage pauses the outer one's
+    profiler while it runs. The generator's return value is passed on.
+    """
+    def decorate(func: Callable[..., Generator]) -> Callable[..., Generator]:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            generator = func(*args, **kwargs)
+            if not METRICS.enabled:
+                return generator
+            return _run_profiled(stage, generator)
+        return wrapper
+    return decorate
+
+_active_profilers: list[cProfile.Profile] = []   # innermost last; only one may run at a time
+
+def _resume_profiler(profiler: cProfile.Profile):
+    if _active_profilers:
+        _active_profilers[-1].disable()
+    _active_profilers.append(profiler)
+    profiler.enable()
+
+def _pause_profiler(profiler: cProfile.Profile):
+    profiler.disable()
+    _active_profilers.pop()
+    if _active_profilers:
+        _active_profilers[-1].enable()
+
+def _run_profiled(stage: str, generator: Generator) -> Generator:
+    profiler = cProfile.Profile() if METRICS.profile_dir else None
+    t0 = time.perf_counter()
+    try:
+        while True:
+            if profiler is not None:
+                _resume_profiler(profiler)
+            try:
+                value = next(generator)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                if profiler is not None:
+                    _pause_profiler(profiler)
+            yield value
+    finally:
+        generator.close()
+        METRICS.record(stage, "total", time.perf_counter() - t0)
+        if profiler is not None:
+            _dump_profile(profiler, stage, Path(METRICS.profile_dir))
+
+def _dump_profile(profiler: cProfile.Profile, stage: str, profile_dir: Path):
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    stem = profile_dir / f"{stage}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    profiler.dump_stats(f"{stem}.prof")
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(40)
+    with open(f"{stem}.txt", "w") as f:
+        f.write(text.getvalue())
+
+# ──────────────────────────────────────────────────────────────
+# Host-facing API
+# ──────────────────────────────────────────────────────────────
+def enable_metrics(profile_dir: str = "") -> None:
+    """
+    Turns instrumentation on for all stages.
+    Args:
+        profile_dir (str): If not empty, each stage run is also profiled with
+            cProfile and dumped into this directory.
+    """
+    METRICS.profile_dir = profile_dir or None
+    METRICS.enabled = True
+
+def disable_metrics() -> None:
+    METRICS.enabled = False
+    METRICS.profile_dir = None
+
+def reset_metrics() -> None:
+    METRICS.reset()
+
+def is_metrics_enabled() -> bool:
+    return METRICS.enabled
+
+def get_events(since: int = 0) -> list[dict[str, Any]]:
+    """
+    Returns the recorded events with a sequence number greater than `since`,
+    oldest first. Pass the last 'seq' seen to poll incrementally.
+    Each event: {seq, time, stage, step, symbol, duration_ms}
+    """
+    return METRICS.events(since)
+
+def get_summary() -> dict[str, dict[str, float]]:
+    """
+    Returns running totals keyed by "stage/step":
+    {count, total_s, mean_ms, max_ms}
+    """
+    return METRICS.summary()
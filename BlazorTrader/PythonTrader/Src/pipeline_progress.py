@@ -0,0 +1,121 @@
+"""
+Pipeline Progress
+───────────────────────────────────────────────────────────────
+One progress protocol for the long-running generators. Every stage
+yields an int percentage 0 … 100 (the C# host drives a progress bar
+with it), and keeps a ProgressTracker with the details:
+
+  done / total   items (symbols, files) processed so far
+  rate           items per second since the stage started
+  eta_s          estimated seconds remaining
+  current        item being processed (e.g. the symbol)
+
+Yields are throttled: a tracker emits at most MAX_UPDATES_PER_SECOND
+percentages (and only when the value changed, plus always the last
+one), so a 5,000-symbol stage crosses into C# a few times per second
+instead of once per symbol. The host reads the details between yields
+with get_progress / format_progress.
+"""
+
+import threading
+import time
+from typing import Any, Generator
+
+MAX_UPDATES_PER_SECOND = 4
+
+_trackers = {}                                 # stage -> latest ProgressTracker
+_trackers_lock = threading.Lock()
+
+class ProgressTracker:
+    """
+    Maps `done` of `total` items onto the percentage range [start, end] of a
+    stage (stages with several phases use one tracker per phase).
+    """
+    def __init__(self, stage: str, total: int, start: int = 0, end: int = 100, unit: str = "symbols",
+                 done: int = 0, max_updates_per_second: float = MAX_UPDATES_PER_SECOND):
+        self.stage = stage
+        self.total = max(int(total), 0)
+        self.start, self.end = start, end
+        self.unit = unit
+        self.done = self._done_at_start = done
+        self.current = None
+        self.min_interval = 1.0 / max_updates_per_second if max_updates_per_second > 0 else 0.0
+        self._started = time.monotonic()
+        self._emitted_at = None
+        self._emitted = None
+        with _trackers_lock:
+            _trackers[stage] = self
+
+    @property
+    def percent(self) -> int:
+        if self.total == 0:
+            return self.end
+        return self.start + int((self.end - self.start) * min(self.done, self.total) / self.total)
+
+    def _due(self) -> int | None:
+        percent = self.percent
+        if percent == self._emitted:
+            return None
+        now = time.monotonic()
+        if (self.done < self.total and self._emitted_at is not None
+                and now - self._emitted_at < self.min_interval):
+            return None
+        self._emitted, self._emitted_at = percent, now
+        return percent
+
+    def advance(self, n: int = 1, current: str | None = None) -> int | None:
+        """Counts n more items done. Returns the percentage to yield, or None (throttled)."""
+        self.done += n
+        if current is not None:
+            self.current = current
+        return self._due()
+
+    def step(self, n: int = 1, current: str | None = None) -> Generator[int, None, None]:
+        """advance() for generators: `yield from tracker.step(current=symbol)`."""
+        percent = self.advance(n, current)
+        if percent is not None:
+            yield percent
+
+    def snapshot(self) -> dict[str, Any]:
+        elapsed = time.monotonic() - self._started
+        processed = self.done - self._done_at_start
+        rate = processed / elapsed if elapsed > 0 else 0.0
+        remaining = max(self.total - self.done, 0)
+        return {
+            "stage":     self.stage,
+            "done":      self.done,
+            "total":     self.total,
+            "unit":      self.unit,
+            "percent":   self.percent,
+            "rate":      rate,
+            "eta_s":     remaining / rate if rate > 0 else None,
+            "elapsed_s": elapsed,
+            "current":   self.current,
+        }
+
+def _format_seconds(seconds: float) -> str:
+    m, s = divmod(int(round(seconds)), 60)
+    return f"{m // 60}:{m % 60:02d}:{s:02d}" if m >= 60 else f"{m}:{s:02d}"
+
+# ──────────────────────────────────────────────────────────────
+# Host-facing API
+# ──────────────────────────────────────────────────────────────
+def get_progress(stage: str) -> dict[str, Any]:
+    """Latest details of `stage` (empty dict if it has not run in this process)."""
+    with _trackers_lock:
+        tracker = _trackers.get(stage)
+    return tracker.snapshot() if tracker is not None else {}
+
+def format_progress(stage: str) -> str:
+    """One status line, e.g. '120 of 503 symbols · 41.3/s · ETA 0:09 · AAPL'."""
+    p = get_progress(stage)
+    if not p:
+        return ""
+    parts = [f"{p['done']:,} of {p['total']:,} {p['unit']}"]
+    if p["rate"] > 0:
+        parts.append(f"{p['rate']:.1f}/s")
+    if p["eta_s"] is not None and p["done"] < p["total"]:
+        parts.append(f"ETA {_format_seconds(p['eta_s'])}")
+    if p["current"]:
+        parts.append(str(p["current"]))
+    return " · ".join(parts)
@@ -0,0 +1,303 @@
+"""
+Pipeline Service
+───────────────────────────────────────────────────────────────
+Resident, in-process state for the UI. One PipelineService per data
+directory keeps in memory:
+
+  price store        latest (date, close) per symbol from sp500_data/
+  indicator snapshot latest indicator row per symbol
+  model              native bundle (loaded once per model version)
+  predictions        latest Strong/Must Buy predictions, scored in one batch
+
+Queries are answered from memory and only check the files they need:
+symbols() the symbol list, latest_price() one price file, latest_prices()
+the price files and predictions() also the indicators and the model.
+Directory scans run at most every CHECK_INTERVAL seconds and re-read only
+changed files, without holding the lock that queries take; predictions
+are re-scored only when the indicators, prices or the model change.
+invalidate() forces a re-scan on the next query.
+
+warm_up() loads everything (and imports the heavy training modules) on
+a background thread, so the first click does not pay for it.
+"""
+
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+import pandas as pd
+from native_predictor import has_native_bundle, get_model_version, load_bundle, predict_buy_strength_native
+
+CHECK_INTERVAL   = 2.0                         # seconds between file scans
+INDICATOR_SUFFIX = "_Indicators.csv"
+BENCHMARK_FILE   = "SPY.csv"
+SYMBOLS_FILE     = "sp500_symbols.csv"
+FEATURE_DROP     = ["five_day_class", "Date", "Open", "High", "Low", "Close"]
+
+class PipelineService:
+    def __init__(self, base_directory: str, check_interval: float = CHECK_INTERVAL):
+        self.base_directory = str(base_directory)
+        self.check_interval = check_interval
+        self._lock = threading.RLock()         # guards the state below; never held while reading files
+        self._reloading = {kind: threading.Lock() for kind in ("prices", "snapshots", "predictions")}
+        self._checked_at = {}                  # "prices" / "snapshots" -> time of the last scan
+        self._prices = {}                      # symbol -> (mtime, (date, close))
+        self._snapshots = {}                   # symbol -> (mtime, latest indicator row)
+        self._symbols_file = (None, [])        # (mtime, symbols)
+        self._predictions = None               # ((model version, generation), records)
+        self._model = (None, "")               # (bundle mtimes, model version)
+        self._generation = 0                   # bumped whenever a tracked file changes
+        self.loads = 0                         # files (re)read, for diagnostics
+
+    # File tracking
+    @property
+    def data_dir(self) -> Path:
+        return Path(self.base_directory) / "sp500_data"
+
+    def invalidate(self):
+        with self._lock:
+            self._checked_at.clear()
+
+    def _price_files(self) -> dict[str, Path]:
+        return {f.stem: f for f in self.data_dir.glob("*.csv") if f.name != BENCHMARK_FILE}
+
+    def _indicator_files(self) -> dict[str, Path]:
+        return {f.name[:-len(INDICATOR_SUFFIX)]: f
+                for f in (self.data_dir / "indicators").glob("*" + INDICATOR_SUFFIX)}
+
+    @staticmethod
+    def _read_price(path: Path):
+        try:
+            df = pd.read_csv(path, usecols=["Date", "Close"])
+        except (ValueError, OSError):
+            return None
+        if df.empty:
+            return None
+        df["Date"] = pd.to_datetime(df["Date"])
+        row = df.loc[df["Date"].idxmax()]
+        return row["Date"].to_pydatetime(), float(row["Close"])
+
+    @staticmethod
+    def _read_snapshot(path: Path):
+        try:
+            df = pd.read_csv(path)
+        except (ValueError, OSError):
+            return None
+        if df.empty:
+            return None
+        df["Date"] = pd.to_datetime(df["Date"])
+        return df.sort_values("Date").iloc[-1]
+
+    def _refresh(self, kind: str):
+        """
+        Re-scans the price files or indicator snapshots (kind) at most every
+        check_interval seconds and re-reads only the files whose mtime changed.
+        The files are read without holding the query lock; the new dict is
+        swapped in at the end. One scan per kind runs at a time, and a caller
+        arriving during a scan waits for it instead of starting another.
+        """
+        with self._reloading[kind]:
+            now = time.monotonic()
+            with self._lock:
+                if now - self._checked_at.get(kind, 0.0) < self.check_interval:
+                    return
+                self._checked_at[kind] = now
+                current = getattr(self, "_" + kind)
+            files = self._price_files() if kind == "prices" else self._indicator_files()
+            read = self._read_price if kind == "prices" else self._read_snapshot
+            updated, loads = {}, 0
+            for symbol, path in files.items():
+                try:
+                    mtime = path.stat().st_mtime_ns
+                except FileNotFoundError:
+                    continue
+                entry = current.get(symbol)
+                if entry is None or entry[0] != mtime:
+                    value = read(path)
+                    if value is None:
+                        continue
+                    entry = (mtime, value)
+                    loads += 1
+                updated[symbol] = entry
+            with self._lock:
+                setattr(self, "_" + kind, updated)
+                self.loads += loads
+                if loads or updated.keys() != current.keys():
+                    self._generation += 1
+
+    def _refresh_price(self, symbol: str):
+        """Re-reads one symbol's price file if its mtime changed."""
+        path = self.data_dir / f"{symbol}.csv"
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        with self._lock:
+            entry = self._prices.get(symbol)
+        if (entry[0] if entry is not None else None) == mtime:
+            return
+        value = self._read_price(path) if mtime is not None else None
+        if entry is None and value is None:
+            return
+        with self._lock:
+            if value is None:
+                self._prices.pop(symbol, None)
+            else:
+                self._prices[symbol] = (mtime, value)
+                self.loads += 1
+            self._generation += 1
+
+    def _refresh_symbols_file(self):
+        path = Path(self.base_directory) / SYMBOLS_FILE
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        with self._lock:
+            if self._symbols_file[0] == mtime:
+                return
+        symbols = sorted(pd.read_csv(path)["Symbol"].astype(str)) if mtime is not None else []
+        with self._lock:
+            self._symbols_file = (mtime, symbols)
+
+    def _refresh_model(self):
+        native_dir = Path(self.base_directory) / "models" / "native"
+        bundle_mtimes = tuple(p.stat().st_mtime_ns for p in sorted(native_dir.glob("*.json")))
+        with self._lock:
+            if bundle_mtimes == self._model[0]:
+                return
+        version = get_model_version(self.base_directory)
+        with self._lock:
+            self._model = (bundle_mtimes, version)
+
+    # Queries
+    def symbols(self) -> list[str]:
+        """Symbol list (sp500_symbols.csv, or the downloaded price files), sorted."""
+        self._refresh_symbols_file()
+        with self._lock:
+            symbols = list(self._symbols_file[1])
+        return symbols or sorted(self._price_files())
+
+    def latest_price(self, symbol: str) -> tuple[datetime, float]:
+        """Same contract as g_llm_knowledge.lookup_latest_price."""
+        self._refresh_price(symbol.upper())
+        with self._lock:
+            entry = self._prices.get(symbol.upper())
+        if entry is None:
+            raise FileNotFoundError(f"CSV file not found: {self.data_dir / (symbol.upper() + '.csv')}")
+        return entry[1]
+
+    def latest_prices(self) -> dict[str, float]:
+        self._refresh("prices")
+        with self._lock:
+            return {symbol: close for symbol, (_, (_, close)) in self._prices.items()}
+
+    def predictions(self) -> list[dict[str, Any]]:
+        """
+        Latest prediction per symbol, in the shape returned by
+        d_train_xgboost.predict_latest_for_all_symbols.
+        """
+        self._refresh("prices")
+        self._refresh("snapshots")
+        self._refresh_model()
+        with self._reloading["predictions"]:
+            with self._lock:
+                key = (self._model[1], self._generation)
+                cached = self._predictions
+                snapshots, prices = dict(self._snapshots), dict(self._prices)
+            if cached is None or cached[0] != key:
+                cached = (key, self._score(snapshots, prices))
+                with self._lock:
+                    self._predictions = cached
+        return [dict(r) for r in cached[1]]
+
+    def _score(self, snapshots: dict, prices: dict) -> list[dict[str, Any]]:
+        if not snapshots:
+            return []
+        symbols = sorted(snapshots)
+        rows = pd.DataFrame([snapshots[s][1] for s in symbols])
+        X = rows.drop(columns=FEATURE_DROP, errors="ignore")
+        if has_native_bundle(self.base_directory):
+            labels = predict_buy_strength_native(X, self.base_directory)
+        else:
+            import joblib
+            from d_train_xgboost import predict_buy_strength
+            feature_names = joblib.load(Path(self.base_directory) / "models" / "feature_names.joblib")
+            labels = predict_buy_strength(X.reindex(columns=feature_names, fill_value=0), self.base_directory)
+        return [{
+            "Symbol": symbol,
+            "Date": str(rows["Date"].iloc[i]),
+            "Prediction": labels[i],
+            "LatestPrice": prices[symbol][1][1] if symbol in prices else None,
+        } for i, symbol in enumerate(symbols)]
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "base_directory": self.base_directory,
+                "symbols": len(self._prices),
+                "indicator_snapshots": len(self._snapshots),
+                "model_version": self._model[1],
+                "predictions_cached": self._predictions is not None,
+                "files_loaded": self.loads,
+            }
+
+    def warm_up(self, import_training: bool = True):
+        """Loads all state (and optionally the training stack) now."""
+        if import_training:
+            import d_train_xgboost                 # noqa: F401  (xgboost, sklearn, joblib)
+        self.invalidate()
+        self.symbols()
+        self._refresh("prices")
+        self._refresh("snapshots")
+        if has_native_bundle(self.base_directory):
+            load_bundle(self.base_directory)
+        if self._snapshots and (Path(self.base_directory) / "models").exists():
+            try:
+                self.predictions()
+            except Exception as e:
+                print(f"WARNING: Could not pre-compute predictions: {e}")
+
+# ──────────────────────────────────────────────────────────────
+# Host-facing API (one service per data directory)
+# ──────────────────────────────────────────────────────────────
+_services = {}
+_services_lock = threading.Lock()
+
+def get_service(base_directory: str = ".") -> PipelineService:
+    key = str(Path(base_directory).resolve())
+    with _services_lock:
+        service = _services.get(key)
+        if service is None:
+            service = _services[key] = PipelineService(base_directory)
+        return service
+
+def start_service(base_directory: str = ".", import_training: bool = True) -> None:
+    """Warms the service for base_directory on a background thread and returns immediately."""
+    service = get_service(base_directory)
+    def run():
+        try:
+            service.warm_up(import_training)
+        except Exception as e:
+            print(f"WARNING: Pipeline service warm-up failed: {e}")
+    threading.Thread(target=run, name="pipeline-service-warmup", daemon=True).start()
+
+def invalidate_service(base_directory: str = ".") -> None:
+    """Call after a stage rewrote files to skip the CHECK_INTERVAL wait."""
+    get_service(base_directory).invalidate()
+
+def service_symbols(base_directory: str = ".") -> list[str]:
+    return get_service(base_directory).symbols()
+
+def service_latest_price(base_directory: str, symbol: str) -> tuple[datetime, float]:
+    return get_service(base_directory).latest_price(symbol)
+
+def service_latest_prices(base_directory: str = ".") -> dict[str, float]:
+    return get_service(base_directory).latest_prices()
+
+def service_predictions(base_directory: str = ".") -> list[dict[str, Any]]:
+    return get_service(base_directory).predictions()
+
+def service_status(base_directory: str = ".") -> dict[str, Any]:
+    return get_service(base_directory).status()
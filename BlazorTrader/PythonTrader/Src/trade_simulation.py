@@ -0,0 +1,258 @@
+"""
+Stop-Loss / Take-Profit Trade Simulation
+───────────────────────────────────────────────────────────────
+Evaluates bracket exits on the daily OHLC paths in sp500_data/:
+
+  entry   Open of the session after the signal date
+  stop    first bar whose Low reaches entry × (1 - stop_loss)
+  target  first bar whose High reaches entry × (1 + take_profit)
+  time    Close of the last bar of the horizon (default 5 bars,
+          the same window as five_day_long_profit)
+
+A bar that gaps through a level fills at its Open. When a bar touches
+both levels the stop is assumed to fill first (daily bars do not show
+the order).
+
+Every symbol's bars are stacked into one array, so the forward windows
+of all symbols and entry dates are a single sliding-window view. Running
+min(Low) / max(High) over each window give the first touch of every
+stop and target level at once, and stop × target pairs are combined by
+broadcasting. Rows are processed in chunks to bound memory.
+"""
+
+import os
+from pathlib import Path
+from typing import Any, Generator
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from backtest import net_returns, load_signals, _scaled_progress, TRADE_LABELS
+from native_predictor import load_bundle
+from pipeline_checkpoint import write_csv_atomic
+
+HORIZON        = 5
+STOP_LOSSES    = (0.02, 0.03, 0.04, 0.05, 0.075, 0.10)
+TAKE_PROFITS   = (0.02, 0.04, 0.06, 0.08, 0.10, 0.15, 0.20)
+LABELS_FILE    = "sltp_labels.csv"
+CHUNK_CELLS    = 8_000_000                     # (levels × rows × bars) per chunk
+BENCHMARK_FILE = "SPY.csv"
+
+STOP, TIME, TARGET = -1, 0, 1                  # outcome codes
+
+_PATH_CACHE = {}                               # data dir -> (file signature, paths)
+
+# ──────────────────────────────────────────────────────────────
+def load_price_paths(base_directory: str = ".") -> dict[str, np.ndarray]:
+    """
+    Stacks every symbol's daily bars (sorted by date) into flat arrays:
+    symbol, sym_id, date, open, high, low, close. Cached until a file changes.
+    """
+    data_dir = Path(base_directory) / "sp500_data"
+    files = sorted(f for f in data_dir.glob("*.csv") if f.name != BENCHMARK_FILE)
+    signature = tuple((f.name, f.stat().st_mtime_ns) for f in files)
+    cached = _PATH_CACHE.get(str(data_dir.resolve()))
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    parts, names = [], []
+    for file in files:
+        try:
+            df = pd.read_csv(file, usecols=["Date", "Open", "High", "Low", "Close"])
+        except ValueError:                     # not a price file (e.g. symbol list)
+            continue
+        df["Date"] = pd.to_datetime(df["Date"])
+        parts.append(df.sort_values("Date"))
+        names.append(file.stem)
+    if not parts:
+        raise FileNotFoundError(f"No price files found in {data_dir}")
+    lengths = np.array([len(p) for p in parts])
+    df = pd.concat(parts, ignore_index=True)
+    paths = {
+        "symbols": np.array(names, dtype=object),
+        "sym_id":  np.repeat(np.arange(len(parts), dtype=np.int32), lengths),
+        "date":    df["Date"].to_numpy(),
+        "open":    df["Open"].to_numpy(dtype=np.float64),
+        "high":    df["High"].to_numpy(dtype=np.float64),
+        "low":     df["Low"].to_numpy(dtype=np.float64),
+        "close":   df["Close"].to_numpy(dtype=np.float64),
+    }
+    _PATH_CACHE[str(data_dir.resolve())] = (signature, paths)
+    return paths
+
+def entry_rows(paths: dict[str, np.ndarray], horizon: int = HORIZON, fridays_only: bool = True) -> np.ndarray:
+    """
+    Indices of signal rows whose next `horizon` bars exist for the same symbol
+    and contain no missing prices.
+    """
+    n = len(paths["sym_id"])
+    rows = np.arange(max(n - horizon, 0))
+    ok = paths["sym_id"][rows + horizon] == paths["sym_id"][rows]
+    if fridays_only:
+        ok &= pd.DatetimeIndex(paths["date"][rows]).weekday == 4
+    rows = rows[ok]
+    bars = np.stack([paths[k] for k in ("open", "high", "low", "close")])
+    missing = sliding_window_view(np.isnan(bars).any(axis=0), horizon)[rows + 1].any(axis=1)
+    return rows[~missing & (paths["open"][rows + 1] > 0)]
+
+def _forward_windows(paths, rows: np.ndarray, horizon: int):
+    """(rows × horizon) Open/High/Low/Close relative to the entry Open."""
+    start = rows + 1
+    entry = paths["open"][start][:, None]
+    return tuple(sliding_window_view(paths[k], horizon)[start] / entry for k in ("open", "high", "low", "close"))
+
+# ──────────────────────────────────────────────────────────────
+def simulate_exits(open_w: np.ndarray, high_w: np.ndarray, low_w: np.ndarray, close_w: np.ndarray,
+                   stop_losses, take_profits) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Bracket exits for every (stop, target) pair and every path.
+    Args:
+        *_w: (rows × horizon) bars relative to the entry price (open_w[:, 0] == 1).
+        stop_losses, take_profits: fractions, e.g. 0.03 for 3 %.
+    Returns:
+        (gross return, outcome code, bars held), each (stops × targets × rows).
+    """
+    sl = np.asarray(stop_losses, dtype=np.float64)
+    tp = np.asarray(take_profits, dtype=np.float64)
+    rows, horizon = low_w.shape
+    # Running extremes over the forward window; first touch = bars before the level is crossed
+    run_low  = np.minimum.accumulate(low_w, axis=1)
+    run_high = np.maximum.accumulate(high_w, axis=1)
+    t_stop = (run_low[None] > (1.0 - sl)[:, None, None]).sum(axis=2)    # (stops × rows), horizon = never
+    t_tgt  = (run_high[None] < (1.0 + tp)[:, None, None]).sum(axis=2)   # (targets × rows)
+
+    idx = np.arange(rows)
+    stop_px = np.minimum(open_w[idx, np.minimum(t_stop, horizon - 1)], (1.0 - sl)[:, None])  # gap-down fills at Open
+    tgt_px  = np.maximum(open_w[idx, np.minimum(t_tgt, horizon - 1)], (1.0 + tp)[:, None])   # gap-up fills at Open
+    time_px = close_w[:, -1]
+
+    ts, tt = t_stop[:, None, :], t_tgt[None, :, :]
+    stopped = (ts < horizon) & (ts <= tt)
+    target  = (tt < horizon) & (tt < ts)
+    gross = np.where(stopped, stop_px[:, None, :], np.where(target, tgt_px[None, :, :], time_px)) - 1.0
+    outcome = np.where(stopped, STOP, np.where(target, TARGET, TIME)).astype(np.int8)
+    held = np.where(stopped, ts, np.where(target, tt, horizon - 1)) + 1
+    return gross, outcome, held
+
+def _chunks(n_rows: int, levels: int, horizon: int):
+    size = max(CHUNK_CELLS // max(levels * horizon, 1), 1)
+    for start in range(0, n_rows, size):
+        yield slice(start, min(start + size, n_rows))
+
+def grid_statistics(paths: dict[str, np.ndarray], rows: np.ndarray, stop_losses=STOP_LOSSES,
+                    take_profits=TAKE_PROFITS, horizon: int = HORIZON, cost_bps: float = 10.0) -> pd.DataFrame:
+    """
+    P&L statistics per (stop_loss, take_profit) pair over the given entry rows.
+    Returns:
+        DataFrame with stop_loss, take_profit, reward_risk, trades, mean, std,
+        win_rate, target_rate, stop_rate, time_rate, avg_bars.
+    """
+    shape = (len(stop_losses), len(take_profits))
+    total, total_sq, wins, held = (np.zeros(shape) for _ in range(4))
+    counts = {code: np.zeros(shape) for code in (STOP, TIME, TARGET)}
+    for part in _chunks(len(rows), shape[0] * shape[1], horizon):
+        gross, outcome, bars = simulate_exits(*_forward_windows(paths, rows[part], horizon), stop_losses, take_profits)
+        net = net_returns(gross, cost_bps)
+        total    += net.sum(axis=2)
+        total_sq += (net * net).sum(axis=2)
+        wins     += (net > 0).sum(axis=2)
+        held     += bars.sum(axis=2)
+        for code in counts:
+            counts[code] += (outcome == code).sum(axis=2)
+
+    n = max(len(rows), 1)
+    mean = total / n
+    sl, tp = np.meshgrid(np.asarray(stop_losses, float), np.asarray(take_profits, float), indexing="ij")
+    return pd.DataFrame({
+        "stop_loss":   sl.ravel(),
+        "take_profit": tp.ravel(),
+        "reward_risk": (tp / sl).ravel(),
+        "trades":      len(rows),
+        "mean":        mean.ravel(),
+        "std":         np.sqrt(np.maximum(total_sq / n - mean * mean, 0.0)).ravel(),
+        "win_rate":    (wins / n).ravel(),
+        "target_rate": (counts[TARGET] / n).ravel(),
+        "stop_rate":   (counts[STOP] / n).ravel(),
+        "time_rate":   (counts[TIME] / n).ravel(),
+        "avg_bars":    (held / n).ravel(),
+    })
+
+def _signal_rows(paths, rows: np.ndarray, signals: pd.DataFrame, threshold: float) -> np.ndarray:
+    """Restricts entry rows to the model's Strong/Must Buy signals."""
+    picked = signals[(signals["p_buy"] >= threshold) & signals["label"].isin(TRADE_LABELS)]
+    keys = pd.MultiIndex.from_arrays([picked["Symbol"], picked["Date"]])
+    row_keys = pd.MultiIndex.from_arrays([paths["symbols"][paths["sym_id"][rows]], paths["date"][rows]])
+    return rows[row_keys.isin(keys)]
+
+# ──────────────────────────────────────────────────────────────
+def simulate_stop_take_grid(base_directory: str = ".", stop_losses: list[float] | None = None,
+                            take_profits: list[float] | None = None, horizon: int = HORIZON,
+                            cost_bps: float = 10.0, model_signals: bool = False) -> Generator[int, None, list[dict[str, Any]]]:
+    """
+    Evaluates every stop-loss × take-profit pair on the Friday entries of all symbols.
+    Args:
+        base_directory (str): Directory holding sp500_data/ (and models/ for model_signals).
+        stop_losses, take_profits (list[float]): Levels as fractions (default STOP_LOSSES / TAKE_PROFITS).
+        horizon (int): Bars held at most; exits at that bar's Close.
+        cost_bps (float): Cost per side in basis points.
+        model_signals (bool): Only simulate the current model's Strong/Must Buy signals
+            (out-of-sample test rows).
+    Yields:
+        int: Progress from 0 to 100.
+    Returns:
+        list[dict]: One row of grid_statistics per pair, best mean return first.
+    """
+    paths = load_price_paths(base_directory)
+    yield 30
+    rows = entry_rows(paths, horizon)
+    if model_signals:
+        signals = yield from _scaled_progress(load_signals(base_directory), 30, 50)
+        rows = _signal_rows(paths, rows, signals, load_bundle(base_directory)["threshold"])
+    yield 50
+    stats = grid_statistics(paths, rows, stop_losses or STOP_LOSSES, take_profits or TAKE_PROFITS, horizon, cost_bps)
+    yield 100
+    return stats.sort_values("mean", ascending=False).to_dict("records")
+
+def create_sltp_labels(base_directory: str = ".", stop_loss: float = 0.03, take_profit: float = 0.06,
+                       horizon: int = HORIZON, fridays_only: bool = True) -> Generator[int, None, int]:
+    """
+    Writes sp500_data/indicators/sltp_labels.csv: one row per entry with Symbol, Date,
+    sltp_return (gross), sltp_outcome (stop / time / target) and sltp_bars,
+    an alternative to the fixed five_day_long_profit label.
+    Returns:
+        int: Number of labelled rows.
+    """
+    paths = load_price_paths(base_directory)
+    yield 30
+    rows = entry_rows(paths, horizon, fridays_only)
+    gross   = np.empty(len(rows))
+    outcome = np.empty(len(rows), dtype=np.int8)
+    bars    = np.empty(len(rows), dtype=np.int64)
+    for part in _chunks(len(rows), 1, horizon):
+        g, o, b = simulate_exits(*_forward_windows(paths, rows[part], horizon), [stop_loss], [take_profit])
+        gross[part], outcome[part], bars[part] = g[0, 0], o[0, 0], b[0, 0]
+    yield 80
+    names = np.array(["stop", "time", "target"], dtype=object)   # indexed by code + 1
+    labels = pd.DataFrame({
+        "Symbol":       paths["symbols"][paths["sym_id"][rows]],
+        "Date":         pd.DatetimeIndex(paths["date"][rows]).strftime("%Y-%m-%d"),
+        "sltp_return":  gross,
+        "sltp_outcome": names[outcome + 1],
+        "sltp_bars":    bars,
+    })
+    out_dir = Path(base_directory) / "sp500_data" / "indicators"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    write_csv_atomic(labels, out_dir / LABELS_FILE, index=False)
+    print(f"Saved {len(labels)} stop {stop_loss:.1%} / target {take_profit:.1%} labels to {out_dir / LABELS_FILE}")
+    yield 100
+    return len(labels)
+
+if __name__ == "__main__":
+    base_dir = os.path.abspath(os.path.dirname(__file__))
+    gen = simulate_stop_take_grid(base_dir)
+    while True:
+        try:
+            next(gen)
+        except StopIteration as stop:
+            results = stop.value
+            break
+    print(pd.DataFrame(results).head(15).to_string(index=False))
@@ -0,0 +1,146 @@
+"""
+Trading Calendar & Shared Series
+───────────────────────────────────────────────────────────────
+One global trading calendar (the union of every date in sp500_data/)
+with integer date ids 0 … n-1. A symbol's bars are addressed by their
+date ids, usually a contiguous offset range, so aligning a series that
+lives on the calendar (SPY close, cross-sectional aggregates) to a
+symbol is an array slice or gather instead of a DatetimeIndex reindex.
+
+Series on the calendar can be published once into shared memory
+(SharedArrays) and mapped by worker processes without copying
+(attach_shared_arrays).
+"""
+
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any
+import numpy as np
+import pandas as pd
+
+BENCHMARK_FILE = "SPY.csv"
+
+_CALENDAR_CACHE = {}                           # data dir -> (file signature, calendar)
+
+# ──────────────────────────────────────────────────────────────
+class TradingCalendar:
+    """Sorted, unique trading dates; a date's position is its integer id."""
+    def __init__(self, dates):
+        self.dates = np.unique(np.asarray(dates, dtype="datetime64[D]"))
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def ids(self, dates) -> np.ndarray:
+        """Integer ids of `dates` (int32); -1 for dates not on the calendar."""
+        d = np.asarray(dates, dtype="datetime64[D]")
+        idx = np.searchsorted(self.dates, d)
+        found = idx < len(self.dates)
+        found[found] = self.dates[idx[found]] == d[found]
+        return np.where(found, idx, -1).astype(np.int32)
+
+    def offset(self, dates) -> tuple[int, bool]:
+        """(first id, contiguous) for a symbol's dates; contiguous means consecutive
+        calendar ids, so duplicate, unsorted or unknown dates are not."""
+        ids = self.ids(dates)
+        if len(ids) == 0:
+            return 0, True
+        return int(ids[0]), bool((ids >= 0).all() and np.all(np.diff(ids) == 1))
+
+    def align(self, values: np.ndarray, dates) -> np.ndarray:
+        """
+        Picks the calendar series `values` at `dates`: a slice when the dates are
+        a contiguous calendar range, otherwise a gather (NaN for unknown dates).
+        """
+        start, contiguous = self.offset(dates)
+        if contiguous:
+            return values[start:start + len(dates)]
+        ids = self.ids(dates)
+        out = values[np.maximum(ids, 0)].astype(np.float64)
+        out[ids < 0] = np.nan
+        return out
+
+    def to_series(self, values: np.ndarray) -> pd.Series:
+        return pd.Series(values, index=pd.DatetimeIndex(self.dates))
+
+def build_calendar(base_directory: str = ".") -> TradingCalendar:
+    """Calendar over every price file in sp500_data/ (cached until a file changes)."""
+    data_dir = Path(base_directory) / "sp500_data"
+    files = sorted(data_dir.glob("*.csv"))
+    signature = tuple((f.name, f.stat().st_mtime_ns) for f in files)
+    cached = _CALENDAR_CACHE.get(str(data_dir.resolve()))
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    dates = []
+    for file in files:
+        try:
+            dates.append(pd.to_datetime(pd.read_csv(file, usecols=["Date"])["Date"]).to_numpy())
+        except ValueError:                     # not a price file
+            continue
+    calendar = TradingCalendar(np.concatenate(dates) if dates else np.array([], dtype="datetime64[D]"))
+    _CALENDAR_CACHE[str(data_dir.resolve())] = (signature, calendar)
+    return calendar
+
+def series_on_calendar(calendar: TradingCalendar, series: pd.Series) -> np.ndarray:
+    """float64 array of len(calendar) holding `series` at its dates, NaN elsewhere."""
+    out = np.full(len(calendar), np.nan)
+    ids = calendar.ids(series.index.to_numpy())
+    out[ids[ids >= 0]] = series.to_numpy(dtype=np.float64)[ids >= 0]
+    return out
+
+def load_benchmark_close(base_directory: str, calendar: TradingCalendar) -> np.ndarray | None:
+    """SPY close on the calendar, or None if the benchmark file is missing."""
+    path = Path(base_directory) / "sp500_data" / BENCHMARK_FILE
+    if not path.exists():
+        return None
+    spy = pd.read_csv(path, parse_dates=["Date"]).set_index("Date")["Close"]
+    return series_on_calendar(calendar, spy)
+
+# ──────────────────────────────────────────────────────────────
+# Shared memory
+# ──────────────────────────────────────────────────────────────
+class SharedArrays:
+    """
+    Owner side: copies arrays into named shared-memory blocks once.
+    `handle` is small and picklable; pass it to workers and call
+    attach_shared_arrays there. Use as a context manager so the blocks
+    are released when the owner is done.
+    """
+    def __init__(self, arrays: dict[str, np.ndarray]):
+        self._blocks = []
+        self.handle = {}
+        for key, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+            self._blocks.append(shm)
+            self.handle[key] = (shm.name, arr.shape, arr.dtype.str)
+
+    def close(self):
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+_attached = []                                 # keeps worker mappings alive
+
+def attach_shared_arrays(handle: dict[str, Any]) -> dict[str, np.ndarray]:
+    """Worker side: read-only views on the owner's blocks (no copy)."""
+    arrays = {}
+    for key, (name, shape, dtype) in handle.items():
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)    # Python >= 3.13
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+        _attached.append(shm)
+        arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        arr.flags.writeable = False
+        arrays[key] = arr
+    return arrays
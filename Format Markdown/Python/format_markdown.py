@@ -8,10 +8,43 @@ from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
 from reportlab.pdfgen import canvas
 from reportlab.platypus import BaseDocTemplate, Frame, PageTemplate
 from bs4 import BeautifulSoup
-from bs4.element import Tag
+from bs4.element import Tag, PreformattedString
+from collections import OrderedDict
+from functools import lru_cache
+import hashlib
+import copy
 import re
 import os
 
+MARKDOWN_EXTENSIONS = [
+    'markdown.extensions.codehilite',
+    'markdown.extensions.fenced_code',
+    'markdown.extensions.tables',
+    'markdown.extensions.toc',
+    'markdown.extensions.attr_list',
+    'markdown.extensions.def_list',
+    'markdown.extensions.footnotes'
+]
+
+# Flowables of rendered Markdown blocks, reused while a block and the style are unchanged
+RENDER_CACHE_MAX_BLOCKS = 4096
+_render_cache = OrderedDict()
+
+# Markdown that refers across blocks (reference links, footnotes, abbreviations, [TOC])
+# is rendered as one block
+_CROSS_BLOCK_RE = re.compile(r'^ {0,3}\*?\[[^\]]+\]:|\[TOC\]', re.MULTILINE)
+_FENCE_RE = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+_LIST_ITEM_RE = re.compile(r'^ {0,3}([*+-]|\d+[.)])\s')
+_QUOTE_RE = re.compile(r'^ {0,3}>')
+# Raw HTML blocks and comments run to their closing tag, blank lines included
+_HTML_BLOCK_RE = re.compile(r'^ {0,3}<(!--|[A-Za-z][A-Za-z0-9-]*)')
+
+# Elements rendered as flowables of their own; everything else is inline markup
+_BLOCK_TAGS = {
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'pre', 'ul', 'ol', 'table', 'blockquote',
+    'hr', 'dl', 'div', 'section', 'article', 'header', 'footer', 'nav', 'aside', 'figure'
+}
+
 def get_version() -> str:
     """Return the fixed version string for this code"""
     return "1.0.0"
@@ -62,63 +95,100 @@ class NumberedCanvas(canvas.Canvas):
             f"Page {self._pageNumber} of {total_pages}"
         )
 
-def markdown_to_pdf(
-    input_md: str,
-    output_pdf: str = None,
-    primary_color: str = "#2c3e50",
-    secondary_color: str = "#3498db",
-    font_name: str = "Helvetica",
-    margin: float = 0.75,
-    table_header_color: str = None
-) -> str:
+def _html_depth(tag: str, line: str) -> int:
+    """How many raw HTML blocks named tag (or comments for '!--') line opens minus closes"""
+    if tag == '!--':
+        return line.count('<!--') - line.count('-->')
+    opened = len(re.findall(rf'<{tag}(?=[\s/>])', line, re.IGNORECASE))
+    closed = len(re.findall(rf'</{tag}\s*>', line, re.IGNORECASE))
+    return opened - closed
+
+def _split_blocks(md_content: str) -> list:
     """
-    Convert a Markdown file to a beautifully styled PDF using markdown and ReportLab.
-    Allows customization of colors, font, and margins.
-    Args:
-        input_md: Path to input markdown file
-        output_pdf: Path to output PDF file (optional)
-        primary_color: Main color for headings and accents
-        secondary_color: Secondary color for borders and highlights
-        font_name: Base font name for text
-        margin: Margin size in inches
-        table_header_color: Color for table headers (optional, defaults to primary_color)
-    Returns:
-        Path to the generated PDF
+    Split Markdown into top-level blocks that render the same on their own: blank-line
+    separated groups outside fenced code and raw HTML blocks, with indented continuations,
+    list items of a loose list, blockquote paragraphs and definition-list entries kept with
+    the group before them.
     """
-    if table_header_color is None:
-        table_header_color = primary_color
-
-    if output_pdf is None:
-        output_pdf = os.path.splitext(input_md)[0] + ".pdf"
-
-    with open(input_md, 'r', encoding='utf-8') as f:
-        md_content = f.read()
-
-    html_content = markdown.markdown(
-        md_content,
-        extensions=[
-            'markdown.extensions.codehilite',
-            'markdown.extensions.fenced_code',
-            'markdown.extensions.tables',
-            'markdown.extensions.toc',
-            'markdown.extensions.attr_list',
-            'markdown.extensions.def_list',
-            'markdown.extensions.footnotes'
-        ]
-    )
-
-    soup = BeautifulSoup(html_content, 'html.parser')
-
-    doc = SimpleDocTemplate(
-        output_pdf,
-        pagesize=A4,
-        rightMargin=margin*inch,
-        leftMargin=margin*inch,
-        topMargin=margin*inch,
-        bottomMargin=margin*inch,
-        canvasmaker=NumberedCanvas
-    )
-
+    if _CROSS_BLOCK_RE.search(md_content):
+        return [md_content]
+
+    groups, current, fence = [], [], None
+    html_tag, html_depth = None, 0
+    for line in md_content.split('\n'):
+        if html_tag is not None:
+            html_depth += _html_depth(html_tag, line)
+            if html_depth <= 0:
+                html_tag = None
+            current.append(line)
+            continue
+        match = _FENCE_RE.match(line)
+        if fence is None and match:
+            fence = match.group(1)
+        elif fence is not None and line.rstrip(' ') == fence:
+            # Python-Markdown closes a fence only on the exact opening run
+            fence = None
+        elif fence is None and not current:
+            html = _HTML_BLOCK_RE.match(line)
+            if html and (html.group(1) == '!--' or html.group(1).lower() in markdown.util.BLOCK_LEVEL_ELEMENTS):
+                html_depth = _html_depth(html.group(1), line)
+                if html_depth > 0:
+                    html_tag = html.group(1)
+        if fence is None and not line.strip():
+            if current:
+                groups.append(current)
+                current = []
+            continue
+        current.append(line)
+    if current:
+        groups.append(current)
+
+    blocks, previous = [], None
+    for group in groups:
+        first = group[0]
+        continues = blocks and (
+            first[:1] in (' ', '\t')
+            or first.startswith(':')
+            or (_LIST_ITEM_RE.match(first) and _LIST_ITEM_RE.match(blocks[-1][0]))
+            or (_QUOTE_RE.match(first) and _QUOTE_RE.match(previous[0]))
+            or (_is_definition_list(group) and _is_definition_list(blocks[-1]))
+        )
+        if first.startswith(':') and len(blocks) > 1 and _is_definition_list(blocks[-2]) \
+                and not _is_definition_list(blocks[-1]):
+            # A new term and its definition extend the definition list before them
+            blocks[-2].extend([''] + blocks.pop())
+        if continues:
+            blocks[-1].extend([''] + group)
+        else:
+            blocks.append(list(group))
+        previous = group
+    return ['\n'.join(block) for block in blocks]
+
+def _is_definition_list(block: list) -> bool:
+    return any(line.startswith(':') for line in block)
+
+def _split_matches_whole(md_content: str) -> bool:
+    """Check that converting the blocks of _split_blocks one by one gives the same HTML
+    as converting the whole document (up to the whitespace between top-level elements)"""
+    md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+    whole = md.convert(md_content)
+    split = '\n'.join(md.reset().convert(block) for block in _split_blocks(md_content))
+    normalize = lambda html: re.sub(r'>\s*\n\s*<', '><', html).strip()
+    return normalize(whole) == normalize(split)
+
+def _escape(text: str) -> str:
+    """Escape text for ReportLab paragraph markup"""
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+def clear_render_cache() -> int:
+    """Drop all cached rendered blocks. Returns the number of blocks removed."""
+    removed = len(_render_cache)
+    _render_cache.clear()
+    return removed
+
+@lru_cache(maxsize=32)
+def _build_styles(primary_color: str, secondary_color: str, font_name: str) -> dict:
+    """ParagraphStyles for one color/font combination (built once per combination)"""
     styles = getSampleStyleSheet()
 
     title_style = ParagraphStyle(
@@ -243,7 +313,127 @@ def markdown_to_pdf(
         spaceAfter=6
     )
 
-    story = []
+    minor_heading_styles = {
+        tag: ParagraphStyle(
+            f'Heading{tag[1]}',
+            parent=body_style,
+            fontSize=12 - int(tag[1]),
+            fontName=get_font_variant(font_name, "bold"),
+            spaceAfter=8,
+            spaceBefore=12,
+            textColor=colors.HexColor(primary_color)
+        )
+        for tag in ['h4', 'h5', 'h6']
+    }
+
+    table_header_style = ParagraphStyle(
+        'CustomTableHeader',
+        parent=body_style,
+        fontSize=10,
+        leading=13,
+        spaceAfter=0,
+        textColor=colors.whitesmoke,
+        fontName=get_font_variant(font_name, "bold"),
+        alignment=TA_LEFT
+    )
+
+    table_cell_style = ParagraphStyle(
+        'CustomTableCell',
+        parent=body_style,
+        fontSize=9,
+        leading=12,
+        spaceAfter=0,
+        alignment=TA_LEFT
+    )
+
+    line_style = ParagraphStyle(
+        'HorizontalLine',
+        parent=body_style,
+        borderWidth=1,
+        borderColor=colors.HexColor(secondary_color),
+        spaceAfter=12
+    )
+
+    return {
+        'title': title_style,
+        'h1': heading1_style,
+        'h2': heading2_style,
+        'h3': heading3_style,
+        'body': body_style,
+        'code': code_style,
+        'code_block': code_block_style,
+        'quote': quote_style,
+        'bullet': bullet_style,
+        'th': table_header_style,
+        'td': table_cell_style,
+        'hr': line_style,
+        **minor_heading_styles
+    }
+
+@lru_cache(maxsize=64)
+def _nested_bullet_style(bullet_style: ParagraphStyle, depth: int) -> ParagraphStyle:
+    """Bullet style indented for a list nested depth levels deep"""
+    if depth == 0:
+        return bullet_style
+    return ParagraphStyle(
+        f'CustomBullet{depth}',
+        parent=bullet_style,
+        leftIndent=bullet_style.leftIndent + 18 * depth,
+        bulletIndent=bullet_style.bulletIndent + 18 * depth
+    )
+
+def markdown_to_pdf(
+    input_md: str,
+    output_pdf: str = None,
+    primary_color: str = "#2c3e50",
+    secondary_color: str = "#3498db",
+    font_name: str = "Helvetica",
+    margin: float = 0.75,
+    table_header_color: str = None
+) -> str:
+    """
+    Convert a Markdown file to a beautifully styled PDF using markdown and ReportLab.
+    Allows customization of colors, font, and margins.
+    Args:
+        input_md: Path to input markdown file
+        output_pdf: Path to output PDF file (optional)
+        primary_color: Main color for headings and accents
+        secondary_color: Secondary color for borders and highlights
+        font_name: Base font name for text
+        margin: Margin size in inches
+        table_header_color: Color for table headers (optional, defaults to primary_color)
+    Returns:
+        Path to the generated PDF
+    """
+    if table_header_color is None:
+        table_header_color = primary_color
+
+    if output_pdf is None:
+        output_pdf = os.path.splitext(input_md)[0] + ".pdf"
+
+    with open(input_md, 'r', encoding='utf-8') as f:
+        md_content = f.read()
+
+    doc = SimpleDocTemplate(
+        output_pdf,
+        pagesize=A4,
+        rightMargin=margin*inch,
+        leftMargin=margin*inch,
+        topMargin=margin*inch,
+        bottomMargin=margin*inch,
+        canvasmaker=NumberedCanvas
+    )
+
+    styles = _build_styles(primary_color, secondary_color, font_name)
+    title_style = styles['title']
+    heading1_style = styles['h1']
+    heading2_style = styles['h2']
+    heading3_style = styles['h3']
+    body_style = styles['body']
+    code_style = styles['code']
+    code_block_style = styles['code_block']
+    quote_style = styles['quote']
+    bullet_style = styles['bullet']
 
     def clean_text(text):
         if not text:
@@ -252,76 +442,125 @@ def markdown_to_pdf(
         text = re.sub(r'\s+', ' ', text).strip()
         return text
 
-    def process_element(element, level=0):
-        if not element or not hasattr(element, 'name'):
+    def node_markup(node):
+        """Paragraph markup of one inline node, built from its child nodes"""
+        if not isinstance(node, Tag):
+            return "" if isinstance(node, PreformattedString) else _escape(node)
+        name = node.name
+        if name in ('strong', 'b'):
+            return f"<b>{inline_markup(node)}</b>"
+        if name in ('em', 'i'):
+            return f"<i>{inline_markup(node)}</i>"
+        if name in ('del', 's'):
+            return f"<strike>{inline_markup(node)}</strike>"
+        if name == 'sup':
+            return f"<super>{inline_markup(node)}</super>"
+        if name == 'sub':
+            return f"<sub>{inline_markup(node)}</sub>"
+        if name == 'code':
+            return f"<font name='Courier' color='{secondary_color}'>{_escape(node.get_text())}</font>"
+        if name == 'br':
+            return "<br/>"
+        if name == 'img':
+            return _escape(node.get('alt', ''))
+        if name == 'a':
+            if 'footnote-backref' in node.get('class', []):
+                return ""
+            href = node.get('href', '')
+            if href and not href.startswith('#'):
+                return f"<a href=\"{_escape(href)}\" color=\"{secondary_color}\">{inline_markup(node)}</a>"
+        return inline_markup(node)
+
+    def inline_markup(element):
+        return ''.join(node_markup(child) for child in element.children)
+
+    def paragraph_markup(nodes):
+        """Markup of inline nodes as one paragraph, whitespace collapsed"""
+        return re.sub(r'\s+', ' ', ''.join(node_markup(node) for node in nodes)).strip()
+
+    def process_item(item, prefix, style, depth):
+        """A list item or definition: its inline text as one paragraph, then its nested blocks"""
+        inline, segments, blocks = [], [], []
+        for child in item.children:
+            if isinstance(child, Tag) and child.name == 'p':
+                segments.append(paragraph_markup(child.children))
+            elif isinstance(child, Tag) and child.name in _BLOCK_TAGS:
+                blocks.append(child)
+            else:
+                inline.append(child)
+        text = '<br/>'.join(segment for segment in [paragraph_markup(inline)] + segments if segment)
+        if text:
+            yield Paragraph(f"{prefix}{text}", style)
+        for block in blocks:
+            yield from process_element(block, 1, depth + 1)
+
+    def process_quote(segments):
+        """Consecutive paragraphs of a blockquote as one quote box"""
+        quote_text = '<br/>'.join(segment for segment in segments if segment)
+        if quote_text:
+            yield Paragraph(f'"{quote_text}"', quote_style)
+            yield Spacer(1, 12)
+
+    def process_list(element, depth):
+        style = _nested_bullet_style(bullet_style, depth)
+        start = element.get('start', '1')
+        number = int(start) if start.isdigit() else 1
+        for li in element.find_all('li', recursive=False):
+            prefix = "• " if element.name == 'ul' else f"{number}. "
+            number += 1
+            yield from process_item(li, prefix, style, depth)
+
+    def process_element(element, level=0, depth=0):
+        """
+        Flowables of one block element; every node below it is visited once.
+        level is the heading position (0 renders an h1 as the title), depth the
+        list nesting depth of the element.
+        """
+        if not isinstance(element, Tag):
             return
         tag = element.name
-        text = clean_text(element.get_text())
         if tag == 'h1':
             if level == 0:
-                story.append(Paragraph(text, title_style))
+                yield Paragraph(paragraph_markup(element.children), title_style)
             else:
-                story.append(Paragraph(text, heading1_style))
-            story.append(Spacer(1, 12))
+                yield Paragraph(paragraph_markup(element.children), heading1_style)
+            yield Spacer(1, 12)
         elif tag == 'h2':
-            story.append(Paragraph(text, heading2_style))
-            story.append(Spacer(1, 8))
+            yield Paragraph(paragraph_markup(element.children), heading2_style)
+            yield Spacer(1, 8)
         elif tag == 'h3':
-            story.append(Paragraph(text, heading3_style))
-            story.append(Spacer(1, 6))
+            yield Paragraph(paragraph_markup(element.children), heading3_style)
+            yield Spacer(1, 6)
         elif tag in ['h4', 'h5', 'h6']:
-            style = ParagraphStyle(
-                f'Heading{tag[1]}',
-                parent=body_style,
-                fontSize=12 - int(tag[1]),
-                fontName=get_font_variant(font_name, "bold"),
-                spaceAfter=8,
-                spaceBefore=12,
-                textColor=colors.HexColor(primary_color)
-            )
-            story.append(Paragraph(text, style))
-            story.append(Spacer(1, 4))
+            yield Paragraph(paragraph_markup(element.children), styles[tag])
+            yield Spacer(1, 4)
         elif tag == 'p':
-            if text.strip():
-                story.append(Paragraph(text, body_style))
-                story.append(Spacer(1, 6))
+            text = paragraph_markup(element.children)
+            if text:
+                yield Paragraph(text, body_style)
+                yield Spacer(1, 6)
         elif tag == 'pre':
             code_text = element.get_text()
             lines = code_text.split('\n')
             for line in lines:
                 if line.strip():
-                    escaped_line = line.replace('<', '&lt;').replace('>', '&gt;').replace('&', '&amp;')
-                    story.append(Paragraph(escaped_line, code_block_style))
-            story.append(Spacer(1, 10))
-        elif tag == 'code' and element.parent.name != 'pre':
-            if text.strip():
-                escaped_text = text.replace('<', '&lt;').replace('>', '&gt;').replace('&', '&amp;')
-                story.append(Paragraph(f"<font name='Courier' color='{secondary_color}'>{escaped_text}</font>", body_style))
-        elif tag == 'ul':
-            for li in element.find_all('li', recursive=False):
-                li_text = clean_text(li.get_text())
-                if li_text:
-                    story.append(Paragraph(f"• {li_text}", bullet_style))
-            story.append(Spacer(1, 8))
-        elif tag == 'ol':
-            for i, li in enumerate(element.find_all('li', recursive=False), 1):
-                li_text = clean_text(li.get_text())
-                if li_text:
-                    story.append(Paragraph(f"{i}. {li_text}", bullet_style))
-            story.append(Spacer(1, 8))
+                    escaped_line = _escape(line.expandtabs(4))
+                    indent = len(escaped_line) - len(escaped_line.lstrip(' '))
+                    yield Paragraph('&nbsp;' * indent + escaped_line[indent:], code_block_style)
+            yield Spacer(1, 10)
+        elif tag == 'code':
+            text = _escape(clean_text(element.get_text()))
+            if text:
+                yield Paragraph(f"<font name='Courier' color='{secondary_color}'>{text}</font>", body_style)
+        elif tag in ('ul', 'ol'):
+            yield from process_list(element, depth)
+            if depth == 0:
+                yield Spacer(1, 8)
         elif tag == 'table':
             table_data = []
-            header_row = element.find('tr')
-            if header_row:
-                headers = []
-                for th in header_row.find_all(['th', 'td']):
-                    headers.append(clean_text(th.get_text()))
-                if headers:
-                    table_data.append(headers)
-            for row in element.find_all('tr')[1:]:
-                row_data = []
-                for cell in row.find_all(['td', 'th']):
-                    row_data.append(clean_text(cell.get_text()))
+            for row in element.find_all('tr'):
+                row_data = [Paragraph(paragraph_markup(cell.children), styles[cell.name])
+                            for cell in row.find_all(['th', 'td'], recursive=False)]
                 if row_data:
                     table_data.append(row_data)
             if table_data:
@@ -340,33 +579,64 @@ def markdown_to_pdf(
                     ('VALIGN', (0, 0), (-1, -1), 'TOP'),
                     ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')])
                 ]))
-                story.append(table)
-                story.append(Spacer(1, 15))
+                yield table
+                yield Spacer(1, 15)
         elif tag == 'blockquote':
-            quote_text = clean_text(element.get_text())
-            if quote_text:
-                story.append(Paragraph(f'"{quote_text}"', quote_style))
-                story.append(Spacer(1, 12))
+            # Paragraphs go in quote boxes; lists, code and other blocks render as themselves
+            segments = []
+            for child in element.children:
+                if isinstance(child, Tag) and child.name == 'p':
+                    segments.append(paragraph_markup(child.children))
+                elif isinstance(child, Tag) and child.name in _BLOCK_TAGS:
+                    yield from process_quote(segments)
+                    segments = []
+                    yield from process_element(child, level + 1, depth)
+                else:
+                    segments.append(paragraph_markup([child]))
+            yield from process_quote(segments)
         elif tag == 'hr':
-            story.append(Spacer(1, 12))
-            line_style = ParagraphStyle(
-                'HorizontalLine',
-                parent=body_style,
-                borderWidth=1,
-                borderColor=colors.HexColor(secondary_color),
-                spaceAfter=12
-            )
-            story.append(Paragraph("", line_style))
-        if isinstance(element, Tag):
+            yield Spacer(1, 12)
+            yield Paragraph("", styles['hr'])
+        elif tag == 'dl':
             for child in element.children:
-                if hasattr(child, 'name'):
-                    process_element(child, level + 1)
+                if isinstance(child, Tag) and child.name == 'dt':
+                    yield Paragraph(f"<b>{paragraph_markup(child.children)}</b>", body_style)
+                elif isinstance(child, Tag) and child.name == 'dd':
+                    yield from process_item(child, "", _nested_bullet_style(bullet_style, depth), depth)
+            yield Spacer(1, 6)
+        elif tag in _BLOCK_TAGS:
+            # Containers (div, section, ...): their children are the blocks
+            for child in element.children:
+                yield from process_element(child, level + 1, depth)
+        else:
+            text = paragraph_markup([element])
+            if text:
+                yield Paragraph(text, body_style)
+
+    # Render block by block; unchanged blocks (same Markdown, same style) reuse their
+    # flowables from earlier calls. Each use gets shallow copies, since layout sets
+    # attributes on the flowables it wraps and splits.
+    md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+    style_key = (primary_color, secondary_color, font_name, table_header_color)
+    story = []
     h1_count = 0
-    for element in soup.children:
-        if hasattr(element, 'name'):
-            if element.name == 'h1':
-                h1_count += 1
-            process_element(element, h1_count)
+    for block in _split_blocks(md_content):
+        key = (hashlib.sha1(block.encode('utf-8')).hexdigest(), style_key)
+        flowables = _render_cache.get(key)
+        if flowables is None:
+            soup = BeautifulSoup(md.reset().convert(block), 'html.parser')
+            flowables = []
+            for element in soup.children:
+                if isinstance(element, Tag):
+                    if element.name == 'h1':
+                        h1_count += 1
+                    flowables.extend(process_element(element, h1_count))
+            _render_cache[key] = flowables
+            if len(_render_cache) > RENDER_CACHE_MAX_BLOCKS:
+                _render_cache.popitem(last=False)
+        else:
+            _render_cache.move_to_end(key)
+        story.extend(copy.copy(flowable) for flowable in flowables)
     try:
         doc.build(story)
         print(f"✅ Successfully generated PDF: {output_pdf}")
@@ -408,4 +678,10 @@ That's it! Pure Python, beautiful results.
     
     # Generate PDF
     pdf_path = markdown_to_pdf("test.md", "beautiful_output.pdf")
-    print(f"PDF generated: {pdf_path}")
\ No newline at end of file
+    print(f"PDF generated: {pdf_path}")
+
+    # Block-wise rendering must match whole-document conversion
+    for sample in [test_md, "<!-- hidden\n\ncomment -->\n\nVisible", "<div>\n\n*raw*\n\n</div>\n\nAfter",
+                   "````\n```\n\n```\n````\n\nafter", "> a\n\n> b",
+                   "term\n: def\n\nterm2\n\n: def2"]:
+        assert _split_matches_whole(sample), sample
\ No newline at end of file
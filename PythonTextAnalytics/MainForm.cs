@@ -59,6 +59,23 @@ public partial class MainForm : Form
             LogMessage("Testing Python connection and getting version");
             var version = await Task.Run(() => _pythonEnv.TextProcessor().GetVersion());
             LogMessage($"Python version obtained: {version}");
+
+            // One-time NLTK setup (dataset lookup / download), so files are not checked one by one.
+            // Only the datasets of the default "fast" tokenizer are required (the stop words).
+            LogMessage("Initializing NLTK data");
+            UpdateStatus("Checking NLTK data...");
+            var nltk = await Task.Run(() => _pythonEnv.TextProcessor().InitializeNltk(tokenizer: "fast"));
+            if (nltk.TryGetValue("ready", out var readyObj) && readyObj.As<bool>())
+            {
+                LogMessage("NLTK data ready");
+            }
+            else
+            {
+                var nltkError = nltk.TryGetValue("error", out var nltkErrorObj) ? nltkErrorObj.As<string>() : "unknown error";
+                LogMessage($"WARNING: NLTK data not available: {nltkError}");
+                MessageBox.Show($"NLTK data is incomplete, analysis may fail:\n{nltkError}",
+                              "NLTK Data Missing", MessageBoxButtons.OK, MessageBoxIcon.Warning);
+            }
             
             UpdateStatus($"Ready! ({sw.ElapsedMilliseconds}ms) - {version}");
             LogMessage($"Python initialization complete in {sw.ElapsedMilliseconds}ms");
@@ -146,15 +163,15 @@ public partial class MainForm : Form
             {
                 LogMessage("Processing successful, extracting results");
                 
-                // Display word cloud image
-                if (result.TryGetValue("word_cloud_base64", out var imageObj))
+                // Display word cloud image (raw PNG bytes)
+                if (result.TryGetValue("word_cloud_png", out var imageObj))
                 {
-                    LogMessage("Found word cloud base64 data, displaying image");
-                    await DisplayWordCloudImage(imageObj.As<string>());
+                    LogMessage("Found word cloud PNG data, displaying image");
+                    await DisplayWordCloudImage(imageObj.As<byte[]>());
                 }
                 else
                 {
-                    LogMessage("WARNING: No word_cloud_base64 found in result");
+                    LogMessage("WARNING: No word_cloud_png found in result");
                 }
 
                 // Display frequency data
@@ -205,18 +222,17 @@ public partial class MainForm : Form
         }
     }
 
-    private Task DisplayWordCloudImage(string base64Image)
+    private Task DisplayWordCloudImage(byte[] imageBytes)
     {
         try
         {
-            if (string.IsNullOrEmpty(base64Image))
+            if (imageBytes.Length == 0)
             {
                 pictureBoxWordCloud.Image = null;
                 return Task.CompletedTask;
             }
 
-            // Convert base64 to image
-            var imageBytes = Convert.FromBase64String(base64Image);
+            // Decode the PNG bytes
             using var ms = new MemoryStream(imageBytes);
             
             // Dispose previous image
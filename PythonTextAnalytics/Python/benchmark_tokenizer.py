@@ -0,0 +1,132 @@
+"""
+Tokenizer Benchmark
+Measures tokens/sec of the "fast" (regex) and "nltk" tokenizer modes of
+clean_and_tokenize_text on a multi-megabyte input and compares their output
+
+    python benchmark_tokenizer.py                     # 8 MB of generated English-like text
+    python benchmark_tokenizer.py --size-mb 32
+    python benchmark_tokenizer.py --file report.pdf   # any file text_processor can read
+"""
+
+import argparse
+import random
+import time
+from collections import Counter
+from typing import Dict, Any
+
+import text_processor
+
+
+def generate_text(size_mb: float, seed: int = 42) -> str:
+    """
+    Build English-like text: stop words, content words, numbers, punctuation,
+    contractions and hyphenated words, in sentences and paragraphs
+
+    Args:
+        size_mb: Approximate size of the text in megabytes
+        seed: Random seed
+
+    Returns:
+        Generated text
+    """
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = ["".join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(5000)]
+    vocabulary += ["don't", "it's", "well-known", "state-of-the-art", "e-mail", "2024", "3.14", "U.S."]
+    stop_words = ["the", "and", "of", "to", "in", "is", "that", "for", "with", "as", "on", "was"]
+
+    target = int(size_mb * 1024 * 1024)
+    paragraphs, size = [], 0
+    while size < target:
+        sentences = []
+        for _ in range(rng.randint(3, 8)):
+            words = [rng.choice(stop_words) if rng.random() < 0.4 else rng.choice(vocabulary)
+                     for _ in range(rng.randint(6, 20))]
+            words[0] = words[0].capitalize()
+            sentences.append(" ".join(words) + rng.choice(".!?"))
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def benchmark_mode(chunks, tokenizer: str, language: str, repeat: int) -> Dict[str, Any]:
+    """
+    Tokenize and count all chunks `repeat` times with one tokenizer mode
+
+    Returns:
+        Dictionary with the best time, tokens, tokens/sec, MB/sec and the counts
+    """
+    chars = sum(len(chunk) for chunk in chunks)
+    best = float("inf")
+    counts = Counter()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        counts = text_processor.count_tokens(chunks, tokenizer, language)
+        best = min(best, time.perf_counter() - start)
+    tokens = sum(counts.values())
+    return {
+        "tokenizer": tokenizer,
+        "seconds": best,
+        "tokens": tokens,
+        "unique_words": len(counts),
+        "tokens_per_sec": tokens / best if best > 0 else 0.0,
+        "mb_per_sec": chars / (1024 * 1024) / best if best > 0 else 0.0,
+        "counts": counts
+    }
+
+
+def compare_counts(fast: Counter, accurate: Counter, top_n: int = 50) -> Dict[str, float]:
+    """How closely the fast tokenizer's counts match the NLTK ones"""
+    shared = sum((fast & accurate).values())
+    top_fast = {word for word, _ in fast.most_common(top_n)}
+    top_accurate = {word for word, _ in accurate.most_common(top_n)}
+    return {
+        "token_agreement": shared / max(sum(accurate.values()), 1),
+        "top_n_overlap": len(top_fast & top_accurate) / max(len(top_accurate), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the text_processor tokenizer modes.")
+    parser.add_argument("--size-mb", type=float, default=8, help="size of the generated text")
+    parser.add_argument("--file", help="benchmark the text of this file instead of generated text")
+    parser.add_argument("--language", default="english", help="stop word language(s), comma separated")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per mode (best time is reported)")
+    parser.add_argument("--skip-nltk", action="store_true", help="only benchmark the fast tokenizer")
+    args = parser.parse_args()
+
+    if args.file:
+        chunks = list(text_processor.iter_text_chunks(args.file))
+        source = args.file
+    else:
+        text = generate_text(args.size_mb)
+        chunks = list(text_processor._split_text(text))
+        source = "generated text"
+    chars = sum(len(chunk) for chunk in chunks)
+    print(f"Input: {source}, {chars / (1024 * 1024):.1f} MB in {len(chunks)} chunks")
+
+    # Warm up: stop word lists and NLTK models are loaded on first use
+    text_processor.clean_and_tokenize_text("warm up", "fast", args.language)
+    if not args.skip_nltk:
+        text_processor.clean_and_tokenize_text("warm up", "nltk", args.language)
+
+    results = [benchmark_mode(chunks, "fast", args.language, args.repeat)]
+    if not args.skip_nltk:
+        results.append(benchmark_mode(chunks, "nltk", args.language, args.repeat))
+
+    print(f"{'tokenizer':<10} {'seconds':>9} {'tokens':>11} {'unique':>8} {'tokens/s':>12} {'MB/s':>7}")
+    for r in results:
+        print(f"{r['tokenizer']:<10} {r['seconds']:>9.3f} {r['tokens']:>11,} {r['unique_words']:>8,} "
+              f"{r['tokens_per_sec']:>12,.0f} {r['mb_per_sec']:>7.2f}")
+
+    if len(results) == 2:
+        fast, accurate = results
+        agreement = compare_counts(fast["counts"], accurate["counts"])
+        print(f"Speedup: {accurate['seconds'] / fast['seconds']:.1f}x, "
+              f"token agreement {agreement['token_agreement']:.1%}, "
+              f"top-50 overlap {agreement['top_n_overlap']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+Term Analysis Engine for the Text Processor
+N-gram counts, TF-IDF keywords and collocations over one or many documents,
+computed with NumPy and sparse document-term matrices and returned as
+structured lists instead of formatted text
+"""
+
+import os
+import re
+from typing import Dict, List, Tuple, Any
+
+import numpy as np
+from scipy import sparse
+
+from text_processor import MIN_TOKEN_LENGTH, iter_document_chunks, list_corpus_files
+from text_support import load_nltk, map_documents, require_nltk, stop_words, worker_count
+
+# Token that separates phrases: text chunks (pages, paragraphs) and runs of words
+# around anything the tokenizer drops (stop words, punctuation, numbers); n-grams
+# never span it. The tokenizers never produce an empty token, and it sorts first, so its id is 0.
+_BOUNDARY = ""
+
+# Letter runs (group 1) and runs of anything else that is not whitespace (group empty)
+_RAW_TOKEN_RE = re.compile(r"([^\W\d_]+)|(?:[^\w\s]|[\d_])+")
+
+
+def _tokenize_phrases(text: str, tokenizer: str, language: str) -> List[str]:
+    """
+    The tokens clean_and_tokenize_text keeps, with _BOUNDARY wherever it dropped
+    something (a stop word, a short word, punctuation, a number), so n-grams only
+    join words that are next to each other in the text
+    """
+    excluded = stop_words(language)
+    if tokenizer == "fast":
+        raw = _RAW_TOKEN_RE.findall(text.lower())
+    elif tokenizer == "nltk":
+        require_nltk('punkt_tab')
+        raw = [token if token.isalpha() else "" for token in load_nltk().word_tokenize(text.lower())]
+    else:
+        raise ValueError(f"Unknown tokenizer: {tokenizer}")
+
+    tokens = []
+    for token in raw:
+        if len(token) >= MIN_TOKEN_LENGTH and token not in excluded:
+            tokens.append(token)
+        elif tokens and tokens[-1] is not _BOUNDARY:
+            tokens.append(_BOUNDARY)
+    if tokens and tokens[-1] is not _BOUNDARY:
+        tokens.append(_BOUNDARY)
+    return tokens
+
+
+def _tokenize_document(file_path: str, use_cache: bool, tokenizer: str,
+                       language: str) -> Tuple[str, List[str], str]:
+    """
+    Worker: the cleaned token sequence of one document, with _BOUNDARY between phrases
+    and after every chunk
+
+    Returns:
+        (file_path, tokens, error message or "")
+    """
+    try:
+        tokens = []
+        for chunk in iter_document_chunks(file_path, use_cache):
+            tokens.extend(_tokenize_phrases(chunk, tokenizer, language))
+        if not tokens:
+            return file_path, [], "No meaningful words found after processing"
+        return file_path, tokens, ""
+    except Exception as e:
+        return file_path, [], str(e)
+
+
+class _Vocabulary:
+    """
+    Token -> id mapping grown one document at a time, so only the int64 id
+    array of each document is kept (not its strings)
+    """
+
+    def __init__(self):
+        self.index = {_BOUNDARY: 0}
+
+    def encode(self, tokens: List[str]) -> np.ndarray:
+        index = self.index
+        return np.fromiter((index.setdefault(token, len(index)) for token in tokens),
+                           dtype=np.int64, count=len(tokens))
+
+
+class _Corpus:
+    """
+    The corpus as integer arrays: the vocabulary (sorted unique tokens), the
+    vocabulary id of every token position and the document of every position
+    """
+
+    def __init__(self, vocabulary: _Vocabulary, id_arrays: List[np.ndarray]):
+        # Renumber the ids in sorted token order (ties in the tables break alphabetically)
+        tokens = list(vocabulary.index)
+        order = sorted(range(len(tokens)), key=tokens.__getitem__)
+        rank = np.empty(len(tokens), dtype=np.int64)
+        rank[order] = np.arange(len(tokens))
+        self.vocabulary = np.array([tokens[i] for i in order], dtype=object)
+        lengths = np.fromiter((ids.size for ids in id_arrays), dtype=np.int64, count=len(id_arrays))
+        self.ids = rank[np.concatenate(id_arrays)] if id_arrays else np.empty(0, dtype=np.int64)
+        self.documents = np.repeat(np.arange(len(id_arrays)), lengths)
+        self.document_count = len(id_arrays)
+
+    def ngrams(self, n: int) -> Dict[str, Any]:
+        """
+        Document-ngram count matrix for n-grams of length n
+
+        Returns:
+            Dictionary with "matrix" (documents x n-grams, CSR), "starts" (one
+            position of each n-gram, to spell it) and "keys" (the n-gram ids)
+        """
+        size = self.ids.size - n + 1
+        if size <= 0:
+            return {"matrix": sparse.csr_matrix((self.document_count, 0), dtype=np.int64),
+                    "starts": np.empty(0, dtype=np.int64), "keys": np.empty((0, n), dtype=np.int64)}
+
+        windows = [self.ids[k:k + size] for k in range(n)]
+        valid = np.ones(size, dtype=bool)
+        for window in windows:
+            valid &= window != 0
+        starts = np.flatnonzero(valid)
+
+        vocabulary_size = self.vocabulary.size
+        if vocabulary_size ** n < 2 ** 63:
+            # One int64 per n-gram: ids as digits in base vocabulary_size
+            combined = np.zeros(starts.size, dtype=np.int64)
+            for window in windows:
+                combined = combined * vocabulary_size + window[starts]
+            _, first, inverse = np.unique(combined, return_index=True, return_inverse=True)
+        else:
+            stacked = np.stack([window[starts] for window in windows], axis=1)
+            _, first, inverse = np.unique(stacked, axis=0, return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+
+        matrix = sparse.csr_matrix(
+            (np.ones(starts.size, dtype=np.int64), (self.documents[starts], inverse)),
+            shape=(self.document_count, first.size)
+        )
+        matrix.sum_duplicates()
+        ngram_starts = starts[first]
+        keys = np.stack([self.ids[ngram_starts + k] for k in range(n)], axis=1)
+        return {"matrix": matrix, "starts": ngram_starts, "keys": keys}
+
+    def spell(self, keys: np.ndarray) -> List[str]:
+        """Terms for rows of n-gram ids"""
+        words = self.vocabulary[keys]
+        return [" ".join(row) for row in words.tolist()]
+
+
+def _ngram_table(corpus: _Corpus, ngrams: Dict[str, Any], columns: np.ndarray, top_n: int) -> Dict[str, Any]:
+    """Most frequent n-grams among `columns` with corpus count and document frequency"""
+    matrix = ngrams["matrix"]
+    counts = np.asarray(matrix.sum(axis=0)).ravel()[columns]
+    document_frequency = np.diff(matrix.tocsc().indptr)[columns]
+    order = np.lexsort((columns, -counts))[:top_n]
+    return {
+        "terms": corpus.spell(ngrams["keys"][columns[order]]),
+        "counts": counts[order].tolist(),
+        "document_frequency": document_frequency[order].tolist()
+    }
+
+
+def _tfidf(counts: sparse.csr_matrix) -> sparse.csr_matrix:
+    """
+    TF-IDF with smoothed idf = ln((1 + N) / (1 + df)) + 1 and L2-normalized rows
+    (the weighting of scikit-learn's TfidfTransformer defaults)
+    """
+    document_count = counts.shape[0]
+    document_frequency = np.diff(counts.tocsc().indptr)
+    idf = np.log((1.0 + document_count) / (1.0 + document_frequency)) + 1.0
+    weights = sparse.csr_matrix(counts, dtype=np.float64) @ sparse.diags(idf)
+    weights = sparse.csr_matrix(weights)
+    norms = np.sqrt(np.asarray(weights.multiply(weights).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.csr_matrix(sparse.diags(1.0 / norms) @ weights)
+
+
+def _top_per_row(matrix: sparse.csr_matrix, top_k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """(column indices, values) of the top_k largest entries of every row"""
+    result = []
+    for row in range(matrix.shape[0]):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        values = matrix.data[start:end]
+        columns = matrix.indices[start:end]
+        if values.size > top_k:
+            keep = np.argpartition(-values, top_k - 1)[:top_k]
+            values, columns = values[keep], columns[keep]
+        order = np.lexsort((columns, -values))
+        result.append((columns[order], values[order]))
+    return result
+
+
+def _collocations(corpus: _Corpus, unigrams: Dict[str, Any], bigrams: Dict[str, Any],
+                  min_count: int, top_n: int) -> Dict[str, Any]:
+    """Bigrams that occur together more often than chance, ranked by pointwise mutual information"""
+    bigram_counts = np.asarray(bigrams["matrix"].sum(axis=0)).ravel()
+    candidates = np.flatnonzero(bigram_counts >= min_count)
+    if candidates.size == 0:
+        return {"terms": [], "counts": [], "pmi": []}
+
+    word_counts = np.bincount(unigrams["keys"][:, 0],
+                              weights=np.asarray(unigrams["matrix"].sum(axis=0)).ravel(),
+                              minlength=corpus.vocabulary.size)
+    total = word_counts.sum()
+    keys = bigrams["keys"][candidates]
+    observed = bigram_counts[candidates]
+    pmi = np.log2(observed * total / (word_counts[keys[:, 0]] * word_counts[keys[:, 1]]))
+    order = np.lexsort((-observed, -pmi))[:top_n]
+    return {
+        "terms": corpus.spell(keys[order]),
+        "counts": observed[order].tolist(),
+        "pmi": np.round(pmi[order], 4).tolist()
+    }
+
+
+def analyze_terms(paths: List[str], max_n: int = 3, top_n: int = 50, min_df: int = 1,
+                  keywords_per_document: int = 10, min_collocation_count: int = 3,
+                  max_workers: int = 0, use_cache: bool = True,
+                  tokenizer: str = "fast", language: str = "english") -> Dict[str, Any]:
+    """
+    N-gram frequencies, TF-IDF keywords per document and collocations
+
+    Args:
+        paths: Files and/or folders (folders are scanned for supported files)
+        max_n: Longest n-gram (1 = words only, 2 = + bigrams, 3 = + trigrams)
+        top_n: Number of entries in each n-gram and collocation table
+        min_df: Ignore n-grams found in fewer documents than this
+        keywords_per_document: Number of TF-IDF keywords per document
+        min_collocation_count: Minimum bigram count for a collocation
+        max_workers: Worker processes for extraction (0 = one per CPU core)
+        use_cache: Reuse cached document text
+        tokenizer: "fast" or "nltk" (see clean_and_tokenize_text)
+        language: Stop word language(s)
+
+    Returns:
+        Dictionary with "success", "error", "document_count", "word_count",
+        "files" (analyzed files), "errors" (file -> error message),
+        "ngrams" (per n: "n", "terms", "counts", "document_frequency"),
+        "keywords" (per document: "file", "terms", "scores") and
+        "collocations" ("terms", "counts", "pmi")
+    """
+    files = list_corpus_files(paths)
+    max_workers = worker_count(max_workers, len(files))
+    print(f"Analyzing terms: {len(files)} files, {max_workers} worker(s)")
+
+    vocabulary = _Vocabulary()
+    documents, errors = {}, {}
+    for file_path, tokens, error in map_documents(_tokenize_document, files, max_workers,
+                                                   use_cache, tokenizer, language):
+        if error:
+            errors[file_path] = error
+        else:
+            documents[file_path] = vocabulary.encode(tokens)
+    analyzed = [file_path for file_path in files if file_path in documents]
+
+    if not analyzed:
+        return {
+            "success": False,
+            "error": "No files found" if not files else "No meaningful words found in any file",
+            "document_count": 0,
+            "word_count": 0,
+            "files": [],
+            "errors": {os.path.basename(file_path): error for file_path, error in errors.items()},
+            "ngrams": [],
+            "keywords": [],
+            "collocations": {"terms": [], "counts": [], "pmi": []}
+        }
+
+    # Step 1: Every token as a vocabulary id (sorted vocabulary)
+    corpus = _Corpus(vocabulary, [documents.pop(file_path) for file_path in analyzed])
+    word_count = int(np.count_nonzero(corpus.ids))
+
+    # Step 2: Sparse document-ngram count matrices
+    ngram_tables, tfidf_blocks, block_keys = [], [], []
+    by_n = {}
+    for n in range(1, max(max_n, 1) + 1):
+        ngrams = corpus.ngrams(n)
+        by_n[n] = ngrams
+        matrix = ngrams["matrix"]
+        document_frequency = np.diff(matrix.tocsc().indptr)
+        columns = np.flatnonzero(document_frequency >= min_df)
+        ngram_table = _ngram_table(corpus, ngrams, columns, top_n)
+        ngram_table["n"] = n
+        ngram_tables.append(ngram_table)
+        tfidf_blocks.append(matrix[:, columns])
+        block_keys.append(ngrams["keys"][columns])
+
+    # Step 3: TF-IDF over all n-gram lengths together
+    weights = _tfidf(sparse.hstack(tfidf_blocks, format="csr"))
+    offsets = np.cumsum([0] + [block.shape[1] for block in tfidf_blocks])
+    keywords = []
+    for file_path, (columns, scores) in zip(analyzed, _top_per_row(weights, keywords_per_document)):
+        block = np.searchsorted(offsets, columns, side="right") - 1
+        terms = [corpus.spell(block_keys[b][[c - offsets[b]]])[0] for b, c in zip(block, columns)]
+        keywords.append({
+            "file": os.path.basename(file_path),
+            "terms": terms,
+            "scores": np.round(scores, 4).tolist()
+        })
+
+    # Step 4: Collocations
+    collocations = {"terms": [], "counts": [], "pmi": []}
+    if max_n >= 2:
+        collocations = _collocations(corpus, by_n[1], by_n[2], min_collocation_count, top_n)
+
+    print(f"Analyzed {word_count} tokens, {corpus.vocabulary.size - 1} unique words")
+    return {
+        "success": True,
+        "error": "",
+        "document_count": len(analyzed),
+        "word_count": word_count,
+        "files": [os.path.basename(file_path) for file_path in analyzed],
+        "errors": {os.path.basename(file_path): error for file_path, error in errors.items()},
+        "ngrams": ngram_tables,
+        "keywords": keywords,
+        "collocations": collocations
+    }
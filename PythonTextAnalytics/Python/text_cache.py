@@ -0,0 +1,241 @@
+"""
+Result Cache for the Text Processor
+Keeps extraction and analysis results on disk so re-analyzing an unchanged
+file skips the PDF/DOCX parse, tokenization and word-cloud render
+"""
+
+import os
+import sys
+import json
+import codecs
+import time
+import zlib
+import hashlib
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+
+def _user_cache_dir(app: str) -> str:
+    """Per-user cache folder of the app (platformdirs layout, without the dependency)"""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Local")
+        return os.path.join(base, app, "Cache")
+    if sys.platform == "darwin":
+        return os.path.join(os.path.expanduser("~/Library/Caches"), app)
+    return os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), app)
+
+
+# Default location (per user, outside the app folder, which may be read-only) and
+# size limit of the cache
+DEFAULT_CACHE_DIR = os.environ.get("TEXT_PROCESSOR_CACHE_DIR", _user_cache_dir("PythonTextAnalytics"))
+DEFAULT_MAX_BYTES = int(os.environ.get("TEXT_PROCESSOR_CACHE_MB", "256")) * 1024 * 1024
+
+HASH_BLOCK_BYTES = 1 << 20
+
+# Streamed text: decompressed in blocks of this size; a text whose compressed size
+# passes MAX_STREAM_BYTES is not stored (its counts and image still are)
+STREAM_BLOCK_BYTES = 1 << 20
+STREAM_INPUT_BYTES = 1 << 16
+MAX_STREAM_BYTES = 32 * 1024 * 1024
+
+
+class TextCache:
+    """
+    On-disk cache of stage results, stored in one SQLite file
+
+    Entries are grouped by stage ("text", "counts", "image") and keyed with
+    TextCache.make_key from the file content hash plus the options of that stage, so a
+    changed option only invalidates the stages that depend on it. When the
+    stored values exceed max_bytes, the least recently used entries are evicted.
+    Every operation opens its own connection, so the cache can be shared by
+    threads and by the corpus worker processes.
+    """
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Build a cache key from a content hash and the options a stage depends on
+
+        Args:
+            parts: Strings, numbers or JSON-serializable option dictionaries
+
+        Returns:
+            Hex digest identifying the stage result
+        """
+        payload = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.path = os.path.join(directory, "text_cache.sqlite")
+        self._hashes = {}                      # (path, size, mtime_ns) -> content hash
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""CREATE TABLE IF NOT EXISTS entries (
+                              key TEXT PRIMARY KEY, stage TEXT NOT NULL, value BLOB NOT NULL,
+                              size INTEGER NOT NULL, accessed REAL NOT NULL)""")
+            db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)")
+            db.execute("""CREATE TABLE IF NOT EXISTS file_hashes (
+                              path TEXT PRIMARY KEY, size INTEGER NOT NULL,
+                              mtime_ns INTEGER NOT NULL, digest TEXT NOT NULL)""")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connection that commits on success and is always closed"""
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def file_hash(self, file_path: str) -> str:
+        """
+        SHA-256 of the file content. The digest is remembered per
+        (path, size, modification time), so an unchanged file is read only once.
+        """
+        path = os.path.abspath(file_path)
+        st = os.stat(path)
+        stat_key = (path, st.st_size, st.st_mtime_ns)
+        with self._lock:
+            digest = self._hashes.get(stat_key)
+        if digest is not None:
+            return digest
+
+        with self._connect() as db:
+            row = db.execute("SELECT digest FROM file_hashes WHERE path=? AND size=? AND mtime_ns=?",
+                             stat_key).fetchone()
+        if row is not None:
+            digest = row[0]
+        else:
+            h = hashlib.sha256()
+            with open(path, "rb") as file:
+                for block in iter(lambda: file.read(HASH_BLOCK_BYTES), b""):
+                    h.update(block)
+            digest = h.hexdigest()
+            with self._connect() as db:
+                db.execute("INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?)", stat_key + (digest,))
+
+        with self._lock:
+            self._hashes[stat_key] = digest
+        return digest
+
+    def _get_blob(self, key: str) -> Optional[bytes]:
+        """Compressed value for key (and mark it recently used), or None"""
+        with self._connect() as db:
+            row = db.execute("SELECT value FROM entries WHERE key=?", (key,)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE entries SET accessed=? WHERE key=?", (time.time(), key))
+        return row[0]
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Stored value for key (and mark it recently used), or None"""
+        blob = self._get_blob(key)
+        return zlib.decompress(blob) if blob is not None else None
+
+    def put(self, stage: str, key: str, value: bytes):
+        """Store value under key, then evict least recently used entries over the size limit"""
+        self._put_blob(stage, key, zlib.compress(value, 6))
+
+    def _put_blob(self, stage: str, key: str, blob: bytes):
+        if len(blob) > self.max_bytes:
+            return
+        with self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                       (key, stage, blob, len(blob), time.time()))
+            self._evict(db)
+
+    def _evict(self, db: sqlite3.Connection):
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in db.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall():
+            db.execute("DELETE FROM entries WHERE key=?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def get_text(self, key: str) -> Optional[str]:
+        value = self.get(key)
+        return value.decode("utf-8") if value is not None else None
+
+    def put_text(self, stage: str, key: str, text: str):
+        self.put(stage, key, text.encode("utf-8"))
+
+    def iter_text(self, key: str) -> Optional[Iterator[str]]:
+        """
+        Stored text for key as consecutive pieces, decompressed and decoded one
+        block at a time (so the whole text is never in memory), or None
+        """
+        blob = self._get_blob(key)
+        if blob is None:
+            return None
+        return self._decompress_text(blob)
+
+    @staticmethod
+    def _decompress_text(blob: bytes) -> Iterator[str]:
+        decompressor = zlib.decompressobj()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        view = memoryview(blob)
+        # Small input slices, so unconsumed_tail never copies much of the blob
+        for offset in range(0, len(blob), STREAM_INPUT_BYTES):
+            data = view[offset:offset + STREAM_INPUT_BYTES]
+            while data:
+                yield decoder.decode(decompressor.decompress(data, STREAM_BLOCK_BYTES))
+                data = decompressor.unconsumed_tail
+        yield decoder.decode(decompressor.flush(), final=True)
+
+    def put_text_stream(self, stage: str, key: str, pieces: Iterable[str]) -> Iterator[str]:
+        """
+        Pass text pieces through and store their concatenation once they are
+        exhausted. The text is compressed piece by piece, so only the compressed
+        form is held; past MAX_STREAM_BYTES (or max_bytes) it is not stored.
+        """
+        compressor = zlib.compressobj(6)
+        parts, size = [], 0
+        limit = min(MAX_STREAM_BYTES, self.max_bytes)
+        for piece in pieces:
+            if parts is not None:
+                part = compressor.compress(piece.encode("utf-8"))
+                parts.append(part)
+                size += len(part)
+                if size > limit:
+                    parts = None
+            yield piece
+        if parts is not None:
+            parts.append(compressor.flush())
+            self._put_blob(stage, key, b"".join(parts))
+
+    def get_json(self, key: str) -> Any:
+        value = self.get(key)
+        return json.loads(value) if value is not None else None
+
+    def put_json(self, stage: str, key: str, obj: Any):
+        self.put(stage, key, json.dumps(obj, separators=(",", ":")).encode("utf-8"))
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count and stored bytes per stage"""
+        with self._connect() as db:
+            rows = db.execute("SELECT stage, COUNT(*), COALESCE(SUM(size), 0) FROM entries GROUP BY stage").fetchall()
+        stages = {stage: {"entries": count, "bytes": size} for stage, count, size in rows}
+        return {
+            "directory": self.directory,
+            "max_bytes": self.max_bytes,
+            "entries": sum(s["entries"] for s in stages.values()),
+            "bytes": sum(s["bytes"] for s in stages.values()),
+            "stages": stages
+        }
+
+    def clear(self):
+        """Remove every cached result"""
+        with self._connect() as db:
+            db.execute("DELETE FROM entries")
+            db.execute("DELETE FROM file_hashes")
+        with self._lock:
+            self._hashes.clear()
@@ -5,43 +5,80 @@ Handles file reading, text extraction, and word cloud generation
 
 import os
 import io
+import time
 import base64
-from typing import Dict, List, Tuple, Any
+from functools import lru_cache
+from typing import Dict, List, Tuple, Any, Generator, Iterable, Union
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 import re
 
-# Text processing libraries
-import nltk
+# Text processing libraries (NLTK is imported on first use, see initialize_nltk)
 from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
+from PIL import Image, ImageDraw, ImageFont
 
 # File processing libraries
 import PyPDF2
 from docx import Document
 import markdown
 
-# Download NLTK data if not present
-def ensure_nltk_data():
-    """Download required NLTK data if not present"""
-    required_datasets = [
-        ('tokenizers/punkt_tab', 'punkt_tab'),
-        ('corpora/stopwords', 'stopwords')
-    ]
+from text_cache import TextCache
+from text_support import (TOKENIZER_DATASETS, load_nltk, initialize_datasets, missing_message,
+                          nltk_state, require_nltk, stop_words, ensure_worker_executable,
+                          worker_count, map_documents)
+
+
+def initialize_nltk(data_dir: str = "", allow_download: bool = True, force: bool = False,
+                    tokenizer: str = "fast") -> Dict[str, Any]:
+    """
+    One-time NLTK setup: look up the datasets a tokenizer mode needs and download
+    missing ones. The outcome is cached, so later calls (and every processed file)
+    skip the lookups; call it once when the application starts.
     
-    for data_path, dataset_name in required_datasets:
-        try:
-            nltk.data.find(data_path)
-        except LookupError:
-            print(f"Downloading NLTK dataset: {dataset_name}")
-            nltk.download(dataset_name, quiet=True)
+    Args:
+        data_dir: Folder with bundled NLTK data (default: the nltk_data folder beside this
+                  module). It is searched first and receives downloads. Copy the
+                  data there to run without network access.
+        allow_download: Download missing datasets (after a quick connectivity check)
+        force: Run the lookups again even if a previous call already did
+        tokenizer: Mode the readiness is reported for: "fast" needs the stop words,
+                   "nltk" also Punkt
+        
+    Returns:
+        Dictionary with "ready" (every dataset the mode needs is available), "error",
+        "data_dir", "missing" (needed but unavailable), "datasets" (name -> available,
+        for every dataset looked up), "downloaded" and "seconds"
+    """
+    if tokenizer not in TOKENIZER_DATASETS:
+        raise ValueError(f"Unknown tokenizer: {tokenizer}")
+    needed = TOKENIZER_DATASETS[tokenizer]
+    state = initialize_datasets(needed, data_dir, allow_download, force)
+    missing = [name for name in needed if not state["datasets"][name]]
+    if missing:
+        print(f"ERROR: {missing_message(state, missing)}")
+    return {
+        "ready": not missing,
+        "error": missing_message(state, missing) if missing else "",
+        "data_dir": state["data_dir"],
+        "missing": missing,
+        "datasets": dict(state["datasets"]),
+        "downloaded": list(state["downloaded"]),
+        "seconds": state["seconds"]
+    }
+
+
+def is_nltk_ready(tokenizer: str = "fast") -> bool:
+    """
+    Whether initialize_nltk has run and found every dataset the tokenizer mode needs
+    """
+    state = nltk_state()
+    return state is not None and all(state["datasets"].get(name, False) for name in TOKENIZER_DATASETS[tokenizer])
 
-# Ensure NLTK data is available
-ensure_nltk_data()
 
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
+def ensure_nltk_data():
+    """Download required NLTK data if not present (kept for callers of the old API, see initialize_nltk)"""
+    initializeload_nltk()
 
 
 def get_version() -> str:
@@ -51,6 +88,25 @@ def get_version() -> str:
     return "Text Processor v1.0 - NLTK, WordCloud, PyPDF2, python-docx"
 
 
+# Plain text files are streamed in blocks of about this many characters
+TEXT_CHUNK_CHARS = 1 << 20
+
+# File types extract_text_from_file understands (used when scanning a folder)
+SUPPORTED_EXTENSIONS = ('.txt', '.pdf', '.docx', '.md', '.markdown')
+
+# Tokens shorter than this are dropped by clean_and_tokenize_text
+MIN_TOKEN_LENGTH = 3
+
+# Bump when extraction or tokenization changes, to invalidate cached results
+CACHE_VERSION = 1
+
+# PDFs with at least this many pages are extracted by a process pool
+PDF_PARALLEL_MIN_PAGES = 64
+
+# Page batches per worker process (more batches balance slow pages better)
+PDF_BATCHES_PER_WORKER = 2
+
+
 def extract_text_from_file(file_path: str) -> str:
     """
     Extracts text from various file formats
@@ -61,6 +117,26 @@ def extract_text_from_file(file_path: str) -> str:
     Returns:
         Extracted text as string
         
+    Raises:
+        ValueError: If file type is not supported
+        FileNotFoundError: If file doesn't exist
+    """
+    return "".join(iter_text_chunks(file_path))
+
+
+def iter_text_chunks(file_path: str) -> Generator[str, None, None]:
+    """
+    Streams the text of a file piece by piece instead of building one string:
+    PDF pages, DOCX paragraphs and table rows, blocks of about TEXT_CHUNK_CHARS
+    characters (cut at a line break) for text files. Joined, the chunks equal
+    extract_text_from_file.
+    
+    Args:
+        file_path: Path to the file to process
+        
+    Yields:
+        Consecutive pieces of the document text
+        
     Raises:
         ValueError: If file type is not supported
         FileNotFoundError: If file doesn't exist
@@ -72,55 +148,236 @@ def extract_text_from_file(file_path: str) -> str:
     
     try:
         if file_extension == '.txt':
-            return _extract_from_txt(file_path)
+            yield from _iter_txt(file_path)
         elif file_extension == '.pdf':
-            return _extract_from_pdf(file_path)
+            yield from _iter_pdf(file_path)
         elif file_extension == '.docx':
-            return _extract_from_docx(file_path)
+            yield from _iter_docx(file_path)
         elif file_extension in ['.md', '.markdown']:
-            return _extract_from_markdown(file_path)
+            yield _extract_from_markdown(file_path)
         else:
             raise ValueError(f"Unsupported file type: {file_extension}")
     except Exception as e:
         raise ValueError(f"Error processing {file_extension} file: {str(e)}")
 
 
-def _extract_from_txt(file_path: str) -> str:
-    """Extract text from plain text file"""
+def _iter_txt(file_path: str) -> Generator[str, None, None]:
+    """Stream a plain text file in blocks that end at a line break"""
     with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-        return file.read()
+        carry = ""
+        while True:
+            block = file.read(TEXT_CHUNK_CHARS)
+            if not block:
+                break
+            block = carry + block
+            cut = block.rfind("\n") + 1
+            if cut == 0:
+                # No line break yet: keep the block, unless it is getting very long
+                if len(block) < 4 * TEXT_CHUNK_CHARS:
+                    carry = block
+                    continue
+                cut = len(block)
+            carry = block[cut:]
+            yield block[:cut]
+        if carry:
+            yield carry
 
 
-def _extract_from_pdf(file_path: str) -> str:
-    """Extract text from PDF file using PyPDF2"""
-    text = ""
+def _iter_pdf(file_path: str) -> Generator[str, None, None]:
+    """Stream the text of a PDF file page by page using PyPDF2 (long PDFs in parallel)"""
     with open(file_path, 'rb') as file:
         pdf_reader = PyPDF2.PdfReader(file)
+        page_count = len(pdf_reader.pages)
         
-        for page_num in range(len(pdf_reader.pages)):
-            page = pdf_reader.pages[page_num]
-            text += page.extract_text() + "\n"
+        if _pdfworker_count(page_count, 0) <= 1:
+            for page in pdf_reader.pages:
+                yield page.extract_text() + "\n"
+            return
     
-    return text
+    for _, text, _ in _iter_pdf_pages(file_path, list(range(page_count)), 0):
+        yield text + "\n"
 
 
-def _extract_from_docx(file_path: str) -> str:
-    """Extract text from Word document"""
+def parse_page_ranges(pages: str, page_count: int) -> List[int]:
+    """
+    Parse 1-based page ranges such as "1-10,15,40-" ("-5" = first five pages,
+    "40-" = page 40 to the end) into sorted 0-based page indices
+    
+    Args:
+        pages: Page ranges, or "" for all pages
+        page_count: Number of pages in the document
+        
+    Returns:
+        Sorted list of 0-based page indices within the document
+        
+    Raises:
+        ValueError: If a range is malformed
+    """
+    if not pages.strip():
+        return list(range(page_count))
+    
+    selected = set()
+    for part in pages.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        match = re.fullmatch(r'(\d*)\s*-\s*(\d*)|(\d+)', part)
+        if not match or part == '-':
+            raise ValueError(f"Invalid page range: {part}")
+        if match.group(3):
+            first = last = int(match.group(3))
+        else:
+            first = int(match.group(1) or 1)
+            last = int(match.group(2) or page_count)
+        selected.update(range(max(first, 1) - 1, min(last, page_count)))
+    return sorted(selected)
+
+
+def _sample_pages(pages: List[int], sample: int) -> List[int]:
+    """`sample` pages spread evenly over `pages` (first and last included)"""
+    if sample <= 0 or sample >= len(pages):
+        return pages
+    if sample == 1:
+        return pages[:1]
+    step = (len(pages) - 1) / (sample - 1)
+    return sorted({pages[round(i * step)] for i in range(sample)})
+
+
+def _pdfworker_count(page_count: int, max_workers: int) -> int:
+    """Worker processes for extracting page_count pages (1 = in-process)"""
+    if max_workers == 1 or multiprocessing.parent_process() is not None:
+        # Serial on request, and inside pool workers (corpus analysis) to avoid nested pools
+        return 1
+    if max_workers <= 0:
+        if page_count < PDF_PARALLEL_MIN_PAGES:
+            return 1
+        max_workers = os.cpu_count() or 1
+    return max(1, min(max_workers, page_count))
+
+
+def _extract_pdf_batch(file_path: str, pages: List[int]) -> List[Tuple[int, str, float]]:
+    """Worker: (page index, text, seconds) for each page of one batch"""
+    results = []
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for index in pages:
+            start = time.perf_counter()
+            text = pdf_reader.pages[index].extract_text()
+            results.append((index, text, time.perf_counter() - start))
+    return results
+
+
+def _iter_pdf_pages(file_path: str, pages: List[int], max_workers: int) -> Generator[Tuple[int, str, float], None, None]:
+    """
+    Yield (page index, text, seconds) for `pages` in order. Contiguous page batches
+    are extracted by a process pool (each worker opens the PDF itself); batches are
+    yielded in page order as soon as they and all earlier ones are done.
+    """
+    workers = _pdfworker_count(len(pages), max_workers)
+    if workers <= 1:
+        yield from _extract_pdf_batch(file_path, pages)
+        return
+    
+    batch_count = min(len(pages), workers * PDF_BATCHES_PER_WORKER)
+    bounds = [len(pages) * i // batch_count for i in range(batch_count + 1)]
+    batches = [pages[bounds[i]:bounds[i + 1]] for i in range(batch_count)]
+    
+    ensure_worker_executable()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for batch in pool.map(_extract_pdf_batch, [file_path] * batch_count, batches):
+            yield from batch
+
+
+def extract_pdf_text(file_path: str, pages: str = "", sample: int = 0, max_workers: int = 0) -> Dict[str, Any]:
+    """
+    Extract the text of selected PDF pages, in parallel for long documents,
+    with the extraction time of every page
+    
+    Args:
+        file_path: Path to the PDF file
+        pages: 1-based page ranges, e.g. "1-10,15,40-" (empty = all pages)
+        sample: Only extract this many pages spread evenly over the selection,
+                for a quick preview (0 = every selected page)
+        max_workers: Worker processes (0 = one per CPU core for PDFs of at least
+                     PDF_PARALLEL_MIN_PAGES pages, 1 = in-process)
+        
+    Returns:
+        Dictionary with "success", "error", "text" (pages in order, one line break
+        after each), "page_count", "pages" (1-based page numbers extracted),
+        "page_seconds" (per extracted page), "slowest_pages" (1-based, slowest
+        first) and "seconds" (total)
+    """
+    try:
+        start = time.perf_counter()
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+        
+        with open(file_path, 'rb') as file:
+            page_count = len(PyPDF2.PdfReader(file).pages)
+        selected = _sample_pages(parse_page_ranges(pages, page_count), sample)
+        print(f"Extracting {len(selected)} of {page_count} PDF pages "
+              f"with {_pdfworker_count(len(selected), max_workers)} worker(s)")
+        
+        texts, numbers, seconds = [], [], []
+        for index, text, page_seconds in _iter_pdf_pages(file_path, selected, max_workers):
+            texts.append(text + "\n")
+            numbers.append(index + 1)
+            seconds.append(page_seconds)
+        
+        slowest = sorted(range(len(numbers)), key=lambda i: seconds[i], reverse=True)[:10]
+        if slowest:
+            print(f"Slowest page: {numbers[slowest[0]]} ({seconds[slowest[0]]:.3f}s)")
+        return {
+            "success": True,
+            "error": "",
+            "text": "".join(texts),
+            "page_count": page_count,
+            "pages": numbers,
+            "page_seconds": seconds,
+            "slowest_pages": [numbers[i] for i in slowest],
+            "seconds": time.perf_counter() - start
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "text": "",
+            "page_count": 0,
+            "pages": [],
+            "page_seconds": [],
+            "slowest_pages": [],
+            "seconds": 0.0
+        }
+
+
+def _iter_docx(file_path: str) -> Generator[str, None, None]:
+    """Stream a Word document paragraph by paragraph, then table row by row"""
     doc = Document(file_path)
-    text = ""
     
     # Extract text from paragraphs
     for paragraph in doc.paragraphs:
-        text += paragraph.text + "\n"
+        yield paragraph.text + "\n"
     
     # Extract text from tables
     for table in doc.tables:
         for row in table.rows:
-            for cell in row.cells:
-                text += cell.text + " "
-        text += "\n"
-    
-    return text
+            yield "".join(cell.text + " " for cell in row.cells)
+        yield "\n"
+
+
+def _extract_from_txt(file_path: str) -> str:
+    """Extract text from plain text file"""
+    return "".join(_iter_txt(file_path))
+
+
+def _extract_from_pdf(file_path: str) -> str:
+    """Extract text from PDF file using PyPDF2"""
+    return "".join(_iter_pdf(file_path))
+
+
+def _extract_from_docx(file_path: str) -> str:
+    """Extract text from Word document"""
+    return "".join(_iter_docx(file_path))
 
 
 def _extract_from_markdown(file_path: str) -> str:
@@ -137,43 +394,92 @@ def _extract_from_markdown(file_path: str) -> str:
     return clean_text
 
 
-def clean_and_tokenize_text(text: str) -> List[str]:
+@lru_cache(maxsize=None)
+def _word_pattern(min_length: int) -> re.Pattern:
+    # Runs of letters (no digits or underscores) of at least min_length characters.
+    # A shorter run never matches, not even in part, so no length check is needed.
+    return re.compile(r"[^\W\d_]{%d,}" % min_length)
+
+
+def get_stopword_languages() -> List[str]:
+    """
+    Languages with an NLTK stop word list (for the language argument)
+    
+    Returns:
+        Sorted list of language names
+    """
+    require_nltk('stopwords')
+    return sorted(load_nltk().corpus.stopwords.fileids())
+
+
+def clean_and_tokenize_text(text: str, tokenizer: str = "fast", language: str = "english") -> List[str]:
     """
     Clean and tokenize text, removing stop words and non-alphabetic tokens
     
     Args:
         text: Raw text to process
+        tokenizer: "fast" - one compiled regex over the text, or
+                   "nltk" - NLTK word_tokenize (slower, more accurate around
+                   punctuation and contractions)
+        language: Stop word language, or several separated by commas
         
     Returns:
         List of cleaned tokens
     """
-    # Convert to lowercase and tokenize
-    tokens = word_tokenize(text.lower())
+    # Stop words (built once per language selection, not per call)
+    excluded = stop_words(language)
+    
+    if tokenizer == "fast":
+        # Runs of letters that are long enough, then drop stop words
+        return [token for token in _word_pattern(MIN_TOKEN_LENGTH).findall(text.lower())
+                if token not in excluded]
+    if tokenizer != "nltk":
+        raise ValueError(f"Unknown tokenizer: {tokenizer}")
     
-    # Get English stop words
-    stop_words = set(stopwords.words('english'))
+    # Convert to lowercase and tokenize
+    require_nltk('punkt_tab')
+    tokens = load_nltk().word_tokenize(text.lower())
     
     # Filter tokens: only alphabetic, not stop words, length > 2
     cleaned_tokens = [
         token for token in tokens 
-        if token.isalpha() and token not in stop_words and len(token) > 2
+        if token.isalpha() and token not in excluded and len(token) >= MIN_TOKEN_LENGTH
     ]
     
     return cleaned_tokens
 
 
-def generate_word_frequencies(tokens: List[str], top_n: int = 50) -> str:
+def count_tokens(chunks: Iterable[str], tokenizer: str = "fast", language: str = "english") -> Counter:
+    """
+    Tokenize text chunks one at a time (see iter_text_chunks) and count the
+    cleaned tokens, so no chunk or token list outlives its iteration
+    
+    Args:
+        chunks: Iterable of text pieces
+        tokenizer: "fast" or "nltk" (see clean_and_tokenize_text)
+        language: Stop word language(s)
+        
+    Returns:
+        Counter of cleaned tokens
+    """
+    counts = Counter()
+    for chunk in chunks:
+        counts.update(clean_and_tokenize_text(chunk, tokenizer, language))
+    return counts
+
+
+def generate_word_frequencies(tokens: Union[List[str], Counter], top_n: int = 50) -> str:
     """
     Generate word frequency analysis
     
     Args:
-        tokens: List of cleaned tokens
+        tokens: List of cleaned tokens, or a Counter of them (count_tokens)
         top_n: Number of top words to return
         
     Returns:
         Formatted string with word frequencies
     """
-    word_counts = Counter(tokens)
+    word_counts = tokens if isinstance(tokens, Counter) else Counter(tokens)
     
     # Get top N words
     top_words = word_counts.most_common(top_n)
@@ -186,30 +492,30 @@ def generate_word_frequencies(tokens: List[str], top_n: int = 50) -> str:
     return "\n".join(lines)
 
 
-def create_word_cloud_image(tokens: List[str], width: int = 800, height: int = 400) -> str:
+def create_word_cloud_png(tokens: Union[List[str], Counter], width: int = 800, height: int = 400) -> bytes:
     """
-    Create a word cloud image and return as base64 string
+    Create a word cloud image as PNG bytes
     
     Args:
-        tokens: List of cleaned tokens
+        tokens: List of cleaned tokens, or a Counter of them (count_tokens)
         width: Image width in pixels
         height: Image height in pixels
         
     Returns:
-        Base64 encoded PNG image
+        PNG image data
     """
-    # Join tokens back into text for WordCloud
-    text_for_wordcloud = ' '.join(tokens)
+    # Lay out from the counts we already have instead of letting WordCloud re-tokenize text
+    counts = tokens if isinstance(tokens, Counter) else Counter(tokens)
     
-    if not text_for_wordcloud.strip():
+    if not counts:
         # Create empty image if no text
-        fig, ax = plt.subplots(figsize=(width/100, height/100))
-        ax.text(0.5, 0.5, 'No text to display', 
-               horizontalalignment='center', verticalalignment='center', 
-               transform=ax.transAxes, fontsize=20)
-        ax.set_xlim(0, 1)
-        ax.set_ylim(0, 1)
-        ax.axis('off')
+        image = Image.new('RGB', (width, height), 'white')
+        draw = ImageDraw.Draw(image)
+        try:
+            font = ImageFont.load_default(size=20)
+        except TypeError:                      # Pillow < 10.1 has a single bitmap font
+            font = ImageFont.load_default()
+        draw.text((width / 2, height / 2), 'No text to display', fill='black', font=font, anchor='mm')
     else:
         # Generate word cloud
         wordcloud = WordCloud(
@@ -220,35 +526,183 @@ def create_word_cloud_image(tokens: List[str], width: int = 800, height: int = 4
             colormap='viridis',
             relative_scaling=0.5,
             random_state=42
-        ).generate(text_for_wordcloud)
-        
-        # Create matplotlib figure
-        fig, ax = plt.subplots(figsize=(width/100, height/100))
-        ax.imshow(wordcloud, interpolation='bilinear')
-        ax.axis('off')
+        )
+        wordcloud.generate_from_frequencies(counts)
+        image = wordcloud.to_image()
     
-    # Save to bytes buffer
+    # Encode straight to PNG bytes
     img_buffer = io.BytesIO()
-    plt.savefig(img_buffer, format='png', bbox_inches='tight', 
-                dpi=100, facecolor='white', edgecolor='none')
-    img_buffer.seek(0)
+    image.save(img_buffer, format='PNG')
+    return img_buffer.getvalue()
+
+
+def create_word_cloud_image(tokens: Union[List[str], Counter], width: int = 800, height: int = 400) -> str:
+    """
+    Create a word cloud image and return as base64 string
+    
+    Args:
+        tokens: List of cleaned tokens, or a Counter of them (count_tokens)
+        width: Image width in pixels
+        height: Image height in pixels
+        
+    Returns:
+        Base64 encoded PNG image (prefer create_word_cloud_png for raw bytes)
+    """
+    return base64.b64encode(create_word_cloud_png(tokens, width, height)).decode('utf-8')
+
+
+_cache = None
+
+
+def _get_cache() -> TextCache:
+    global _cache
+    if _cache is None:
+        _cache = TextCache()
+    return _cache
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """
+    Size of the result cache
+    
+    Returns:
+        Dictionary with the cache directory, size limit, entry count and bytes per stage
+    """
+    return _get_cache().stats()
+
+
+def clear_cache() -> None:
+    """Remove every cached extraction and analysis result"""
+    _get_cache().clear()
+
+
+def _tokenizer_options(tokenizer: str, language: str) -> Dict[str, Any]:
+    """Options the token counts depend on (part of the counts cache key)"""
+    return {"tokenizer": tokenizer, "stopwords": language, "min_length": MIN_TOKEN_LENGTH}
+
+
+def _split_text(text: Union[str, Iterable[str]]) -> Generator[str, None, None]:
+    """
+    Cut cached text (a string, or consecutive pieces of one) back into blocks of
+    about TEXT_CHUNK_CHARS that end at a line break
+    """
+    pieces = [text] if isinstance(text, str) else text
+    buffer = ""
+    for piece in pieces:
+        buffer += piece
+        start = 0
+        while True:
+            end = buffer.find("\n", start + TEXT_CHUNK_CHARS)
+            if end == -1:
+                break
+            yield buffer[start:end + 1]
+            start = end + 1
+        buffer = buffer[start:]
+    if buffer:
+        yield buffer
+
+
+def _text_cache_key(file_path: str) -> str:
+    """Cache key of the extracted text: file content hash plus extension"""
+    digest = _get_cache().file_hash(file_path)
+    return TextCache.make_key("text", CACHE_VERSION, digest, os.path.splitext(file_path)[1].lower())
+
+
+def iter_document_chunks(file_path: str, use_cache: bool = True) -> Generator[str, None, None]:
+    """
+    iter_text_chunks through the result cache: the text of an unchanged file is
+    read from the cache instead of parsing the file again, and a parsed file's
+    text is stored once it has been read to the end. Both directions stream:
+    the text is compressed and decompressed chunk by chunk (see TextCache.iter_text)
+    
+    Args:
+        file_path: Path to the file to process
+        use_cache: Whether to read and write the result cache
+        
+    Yields:
+        Consecutive pieces of the document text
+    """
+    if not use_cache:
+        yield from iter_text_chunks(file_path)
+        return
+    
+    cache = _get_cache()
+    text_key = _text_cache_key(file_path)
+    cached = cache.iter_text(text_key)
+    if cached is not None:
+        print("Using cached text")
+        yield from _split_text(cached)
+        return
+    
+    yield from cache.put_text_stream("text", text_key, iter_text_chunks(file_path))
+
+
+def _count_file(file_path: str, use_cache: bool = True, tokenizer: str = "fast",
+                language: str = "english") -> Tuple[Counter, int, bool, str]:
+    """
+    Extract and tokenize one file, reusing cached stages where their inputs are unchanged:
+    the token counts (same content and tokenizer options), else the extracted text
+    (same content), else the file is parsed again
     
-    # Convert to base64
-    img_base64 = base64.b64encode(img_buffer.getvalue()).decode('utf-8')
+    Args:
+        file_path: Path to the file to process
+        use_cache: Whether to read and write the result cache
+        tokenizer: "fast" or "nltk" (see clean_and_tokenize_text)
+        language: Stop word language(s)
+        
+    Returns:
+        (token counts, characters of text, whether any text was found, cache key of
+        the counts or "" without cache)
+    """
+    counts_key = ""
+    if use_cache:
+        counts_key = TextCache.make_key("counts", CACHE_VERSION, _text_cache_key(file_path),
+                                        _tokenizer_options(tokenizer, language))
+        cached = _get_cache().get_json(counts_key)
+        if cached is not None:
+            print("Using cached token counts")
+            return Counter(cached["counts"]), cached["chars"], cached["has_text"], counts_key
     
-    # Clean up
-    plt.close(fig)
-    img_buffer.close()
+    chars = 0
+    has_text = False
+    counts = Counter()
+    for chunk in iter_document_chunks(file_path, use_cache):
+        chars += len(chunk)
+        has_text = has_text or bool(chunk.strip())
+        counts.update(clean_and_tokenize_text(chunk, tokenizer, language))
     
-    return img_base64
+    if use_cache:
+        _get_cache().put_json("counts", counts_key, {"chars": chars, "has_text": has_text, "counts": counts})
+    return counts, chars, has_text, counts_key
+
+
+def _word_cloud_cached(counts: Counter, counts_key: str, width: int, height: int) -> bytes:
+    """create_word_cloud_png for token counts, cached per (counts, size)"""
+    if not counts_key:
+        return create_word_cloud_png(counts, width=width, height=height)
+    cache = _get_cache()
+    image_key = TextCache.make_key("png", CACHE_VERSION, counts_key, width, height)
+    image = cache.get(image_key)
+    if image is None:
+        image = create_word_cloud_png(counts, width=width, height=height)
+        cache.put("image", image_key, image)
+    else:
+        print("Using cached word cloud")
+    return image
 
 
-def process_file_complete(file_path: str) -> Dict[str, Any]:
+def process_file_complete(file_path: str, top_n: int = 50, use_cache: bool = True,
+                          tokenizer: str = "fast", language: str = "english") -> Dict[str, Any]:
     """
     Complete file processing pipeline: extract text, analyze, and create word cloud
     
     Args:
         file_path: Path to the file to process
+        top_n: Number of top words to return
+        use_cache: Reuse extracted text, token counts and word cloud of an
+                   unchanged file from the result cache
+        tokenizer: "fast" (regex) or "nltk" (word_tokenize, accuracy mode)
+        language: Stop word language, or several separated by commas
         
     Returns:
         Dictionary containing analysis results
@@ -256,58 +710,53 @@ def process_file_complete(file_path: str) -> Dict[str, Any]:
     try:
         print(f"Processing file: {file_path}")
         
-        # Ensure NLTK data is available before processing
-        ensure_nltk_data()
-        
-        # Step 1: Extract text
+        # Steps 1 + 2: Extract text and tokenize it chunk by chunk (page, paragraph, block)
         print("Step 1: Extracting text from file")
-        raw_text = extract_text_from_file(file_path)
+        print("Step 2: Cleaning and tokenizing text")
+        counts, chars, has_text, counts_key = _count_file(file_path, use_cache, tokenizer, language)
         
-        if not raw_text.strip():
+        if not has_text:
             return {
                 "success": False,
                 "error": "No text content found in file",
                 "word_count": 0,
                 "unique_words": 0,
                 "frequencies": [],
-                "word_cloud_base64": ""
+                "word_cloud_png": b""
             }
         
-        print(f"Extracted {len(raw_text)} characters of text")
+        print(f"Extracted {chars} characters of text")
         
-        # Step 2: Clean and tokenize
-        print("Step 2: Cleaning and tokenizing text")
-        tokens = clean_and_tokenize_text(raw_text)
-        
-        if not tokens:
+        if not counts:
             return {
                 "success": False,
                 "error": "No meaningful words found after processing",
                 "word_count": 0,
                 "unique_words": 0,
                 "frequencies": [],
-                "word_cloud_base64": ""
+                "word_cloud_png": b""
             }
         
-        print(f"Processed {len(tokens)} tokens, {len(set(tokens))} unique words")
+        word_count = sum(counts.values())
+        print(f"Processed {word_count} tokens, {len(counts)} unique words")
         
         # Step 3: Generate frequencies
         print("Step 3: Generating word frequencies")
-        frequencies_text = generate_word_frequencies(tokens, top_n=50)
+        frequencies_text = generate_word_frequencies(counts, top_n=top_n)
         
         # Step 4: Create word cloud
         print("Step 4: Creating word cloud image")
-        word_cloud_base64 = create_word_cloud_image(tokens, width=800, height=400)
+        word_cloud_png = _word_cloud_cached(counts, counts_key, width=800, height=400)
         
         # Step 5: Return results
         print("Step 5: Processing complete, returning results")
         return {
             "success": True,
             "error": "",
-            "word_count": len(tokens),
-            "unique_words": len(set(tokens)),
+            "word_count": word_count,
+            "unique_words": len(counts),
             "frequencies_text": frequencies_text,
-            "word_cloud_base64": word_cloud_base64,
+            "word_cloud_png": word_cloud_png,
             "file_processed": os.path.basename(file_path)
         }
         
@@ -318,5 +767,165 @@ def process_file_complete(file_path: str) -> Dict[str, Any]:
             "word_count": 0,
             "unique_words": 0,
             "frequencies": [],
-            "word_cloud_base64": ""
-        }
\ No newline at end of file
+            "word_cloud_png": b""
+        }
+
+
+def list_corpus_files(source: Union[str, List[str]]) -> List[str]:
+    """
+    Resolve a corpus source into the list of files to analyze
+    
+    Args:
+        source: A folder (scanned recursively for supported files), a single
+                file, or a list of files and folders
+        
+    Returns:
+        List of file paths (the files of each folder sorted)
+    """
+    files = []
+    for entry in ([source] if isinstance(source, str) else source):
+        if not os.path.isdir(entry):
+            files.append(entry)
+            continue
+        found = []
+        for root, _, names in os.walk(entry):
+            for name in names:
+                if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS:
+                    found.append(os.path.join(root, name))
+        files.extend(sorted(found))
+    return files
+
+
+def _count_document(file_path: str, use_cache: bool = True, tokenizer: str = "fast",
+                    language: str = "english") -> Tuple[str, Counter, str]:
+    """
+    Worker for corpus processing: extract and tokenize one document
+    
+    Returns:
+        (file_path, token counts, error message or "")
+    """
+    try:
+        counts, _, has_text, _ = _count_file(file_path, use_cache, tokenizer, language)
+        if not has_text:
+            return file_path, Counter(), "No text content found in file"
+        if not counts:
+            return file_path, Counter(), "No meaningful words found after processing"
+        return file_path, counts, ""
+    except Exception as e:
+        return file_path, Counter(), str(e)
+
+
+def process_corpus_stream(source: Union[str, List[str]], max_workers: int = 0,
+                          top_n: int = 50, word_cloud: bool = True, use_cache: bool = True,
+                          tokenizer: str = "fast", language: str = "english") -> Generator[Dict[str, Any], None, None]:
+    """
+    Analyze many documents at once: every document is extracted and tokenized
+    in a process pool, and the per-document Counters are merged into corpus-wide
+    frequencies.
+    
+    Args:
+        source: A folder, a file, or a list of file paths (see list_corpus_files)
+        max_workers: Number of worker processes (0 = one per CPU core, 1 = in-process)
+        top_n: Number of top words in each frequency table
+        word_cloud: Whether to render a word cloud of the whole corpus
+        use_cache: Reuse cached token counts of unchanged documents
+        tokenizer: "fast" or "nltk" (see clean_and_tokenize_text)
+        language: Stop word language(s)
+        
+    Yields:
+        One progress dictionary per finished document
+        ("type": "document", "done", "total", "file", "success", "error",
+        "word_count", "unique_words"), then the combined result ("type": "result",
+        same keys as process_file_complete plus "document_count", "failed_count"
+        and "documents" with the per-document frequency tables)
+    """
+    files = list_corpus_files(source)
+    total = len(files)
+    max_workers = worker_count(max_workers, total)
+    print(f"Processing corpus: {total} files, {max_workers} worker(s)")
+    
+    corpus_counts = Counter()
+    documents = {}
+    done = 0
+    for file_path, counts, error in map_documents(_count_document, files, max_workers,
+                                                    use_cache, tokenizer, language):
+        done += 1
+        corpus_counts.update(counts)
+        documents[file_path] = {
+            "file": file_path,
+            "success": not error,
+            "error": error,
+            "word_count": sum(counts.values()),
+            "unique_words": len(counts),
+            "frequencies_text": generate_word_frequencies(counts, top_n=top_n)
+        }
+        yield {
+            "type": "document",
+            "done": done,
+            "total": total,
+            "file": os.path.basename(file_path),
+            "success": not error,
+            "error": error,
+            "word_count": documents[file_path]["word_count"],
+            "unique_words": documents[file_path]["unique_words"]
+        }
+    
+    # Per-document tables in input order, independent of completion order
+    documents = [documents[file_path] for file_path in files]
+    failed = sum(1 for document in documents if not document["success"])
+    word_count = sum(corpus_counts.values())
+    print(f"Corpus processed: {word_count} tokens, {len(corpus_counts)} unique words, {failed} failed file(s)")
+    
+    if not corpus_counts:
+        error = "No files found" if total == 0 else "No meaningful words found in any file"
+        yield {
+            "type": "result",
+            "success": False,
+            "error": error,
+            "document_count": total,
+            "failed_count": failed,
+            "word_count": 0,
+            "unique_words": 0,
+            "frequencies_text": "",
+            "word_cloud_png": b"",
+            "documents": documents
+        }
+        return
+    
+    yield {
+        "type": "result",
+        "success": True,
+        "error": "",
+        "document_count": total,
+        "failed_count": failed,
+        "word_count": word_count,
+        "unique_words": len(corpus_counts),
+        "frequencies_text": generate_word_frequencies(corpus_counts, top_n=top_n),
+        "word_cloud_png": create_word_cloud_png(corpus_counts, width=800, height=400) if word_cloud else b"",
+        "documents": documents
+    }
+
+
+def process_corpus(source: Union[str, List[str]], max_workers: int = 0,
+                   top_n: int = 50, word_cloud: bool = True, use_cache: bool = True,
+                   tokenizer: str = "fast", language: str = "english") -> Dict[str, Any]:
+    """
+    process_corpus_stream without progress: returns only the combined result
+    
+    Args:
+        source: A folder, a file, or a list of file paths
+        max_workers: Number of worker processes (0 = one per CPU core)
+        top_n: Number of top words in each frequency table
+        word_cloud: Whether to render a word cloud of the whole corpus
+        use_cache: Reuse cached token counts of unchanged documents
+        tokenizer: "fast" or "nltk" (see clean_and_tokenize_text)
+        language: Stop word language(s)
+        
+    Returns:
+        Dictionary containing the corpus analysis results
+    """
+    result = {}
+    for result in process_corpus_stream(source, max_workers, top_n, word_cloud, use_cache,
+                                        tokenizer, language):
+        pass
+    return result
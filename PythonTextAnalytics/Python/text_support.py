@@ -0,0 +1,197 @@
+"""
+Shared Helpers for the Text Processor and Text Analysis
+NLTK data lookup (one cached state per process), stop word lists and the
+process pool that text_processor and text_analysis run their per-document
+workers in
+"""
+
+import os
+import sys
+import time
+import socket
+import threading
+import multiprocessing
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Any, Generator
+
+# NLTK data shipped with the app (searched first; downloads are stored here too)
+NLTK_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nltk_data")
+
+# NLTK datasets used: stop words (both tokenizers) and Punkt (tokenizer="nltk" only)
+NLTK_RESOURCES = {
+    'stopwords': 'corpora/stopwords',
+    'punkt_tab': 'tokenizers/punkt_tab'
+}
+
+# Datasets each tokenizer mode needs (see text_processor.clean_and_tokenize_text)
+TOKENIZER_DATASETS = {
+    'fast': ['stopwords'],
+    'nltk': ['stopwords', 'punkt_tab']
+}
+
+# Host the NLTK downloader fetches from, probed before downloading
+NLTK_DOWNLOAD_HOST = ('raw.githubusercontent.com', 443)
+
+_nltk_state = None                             # datasets looked up so far (see initialize_datasets)
+_nltk_lock = threading.Lock()
+_nltk_data_dir = NLTK_DATA_DIR                 # default data_dir; the parent's in corpus worker processes
+_nltk_allow_download = True                    # False in corpus worker processes
+
+
+def load_nltk():
+    """The nltk module"""
+    # Importing nltk takes about two seconds, so it is deferred until NLTK is needed
+    import nltk
+    return nltk
+
+
+def _network_available(timeout: float = 3.0) -> bool:
+    try:
+        with socket.create_connection(NLTK_DOWNLOAD_HOST, timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def initialize_datasets(names: List[str], data_dir: str = "", allow_download: bool = True,
+                         force: bool = False) -> Dict[str, Any]:
+    """
+    Look up the named datasets (downloading missing ones if allowed) unless an
+    earlier call already did, and return the state of every dataset looked up so far
+    """
+    global _nltk_state
+    with _nltk_lock:
+        if _nltk_state is not None and not force and all(name in _nltk_state["datasets"] for name in names):
+            return _nltk_state
+        
+        start = time.perf_counter()
+        data_dir = data_dir or (_nltk_state["data_dir"] if _nltk_state is not None else _nltk_data_dir)
+        # Worker processes read NLTK_DATA when they import nltk
+        search_path = os.environ.get('NLTK_DATA', '').split(os.pathsep)
+        if data_dir not in search_path:
+            os.environ['NLTK_DATA'] = os.pathsep.join([data_dir] + [p for p in search_path if p])
+        nltk = load_nltk()
+        if data_dir not in nltk.data.path:
+            nltk.data.path.insert(0, data_dir)
+        
+        def found(name: str) -> bool:
+            try:
+                nltk.data.find(NLTK_RESOURCES[name])
+                return True
+            except LookupError:
+                return False
+        
+        datasets = dict(_nltk_state["datasets"]) if _nltk_state is not None and not force else {}
+        datasets.update({name: found(name) for name in names})
+        downloaded = list(_nltk_state["downloaded"]) if _nltk_state is not None else []
+        download_error = ""
+        missing = [name for name in names if not datasets[name]]
+        if missing and allow_download:
+            if _network_available():
+                os.makedirs(data_dir, exist_ok=True)
+                for name in missing:
+                    print(f"Downloading NLTK dataset: {name}")
+                    if nltk.download(name, download_dir=data_dir, quiet=True):
+                        downloaded.append(name)
+                    datasets[name] = found(name)
+            else:
+                download_error = f"no network connection to {NLTK_DOWNLOAD_HOST[0]} to download them"
+        elif missing:
+            download_error = "downloads disabled"
+        
+        _nltk_state = {
+            "data_dir": data_dir,
+            "datasets": datasets,
+            "downloaded": downloaded,
+            "download_error": download_error,
+            "seconds": time.perf_counter() - start
+        }
+        return _nltk_state
+
+
+def missing_message(state: Dict[str, Any], missing: List[str]) -> str:
+    data_dir = state["data_dir"]
+    return (f"NLTK data not found: {', '.join(missing)} ({state['download_error'] or 'download failed'}). "
+            f"Install it with 'python -m nltk.downloader -d \"{data_dir}\" {' '.join(missing)}', "
+            f"or copy the nltk_data folder from a connected machine to {data_dir}")
+
+def nltk_state() -> Dict[str, Any]:
+    """State of every dataset looked up so far (see initialize_datasets), or None before the first lookup"""
+    return _nltk_state
+
+
+def require_nltk(*names: str):
+    """Fail fast with initialize_nltk's message if one of the named datasets is unavailable"""
+    state = initialize_datasets(list(names), allow_download=_nltk_allow_download)
+    missing = [name for name in names if not state["datasets"][name]]
+    if missing:
+        raise RuntimeError(missing_message(state, missing))
+
+
+def _init_worker(data_dir: str):
+    """Pool worker initializer: use the parent's NLTK data folder and never download"""
+    global _nltk_data_dir, _nltk_allow_download
+    _nltk_data_dir = data_dir or NLTK_DATA_DIR
+    _nltk_allow_download = False
+
+
+@lru_cache(maxsize=None)
+def stop_words(language: str) -> frozenset:
+    """
+    Stop words of one or more NLTK languages ("english", "english,german"),
+    built once per language selection
+    """
+    require_nltk('stopwords')
+    stopwords = load_nltk().corpus.stopwords
+    words = set()
+    for name in language.split(','):
+        words.update(stopwords.words(name.strip()))
+    return frozenset(words)
+
+
+def ensure_worker_executable():
+    """
+    Worker processes are started with sys.executable. When Python is embedded
+    (CSnakes), that is the host application, so point multiprocessing at the
+    interpreter of the environment instead.
+    """
+    if os.path.basename(sys.executable).lower().startswith('python'):
+        return
+    candidates = [
+        os.path.join(sys.prefix, 'Scripts', 'python.exe'),
+        os.path.join(sys.prefix, 'bin', 'python'),
+        os.path.join(sys.base_prefix, 'python.exe'),
+        os.path.join(sys.base_prefix, 'bin', 'python3'),
+    ]
+    for candidate in candidates:
+        if os.path.exists(candidate):
+            multiprocessing.set_executable(candidate)
+            return
+
+
+def worker_count(max_workers: int, total: int) -> int:
+    """Worker processes for `total` documents (max_workers 0 = one per CPU core)"""
+    if max_workers <= 0:
+        max_workers = os.cpu_count() or 1
+    return min(max_workers, max(total, 1))
+
+
+def map_documents(worker, files: List[str], max_workers: int, *args) -> Generator[Any, None, None]:
+    """
+    Yield worker(file_path, *args) for every file as documents finish (in completion
+    order), in a process pool, or in-process for one worker or one file. The worker
+    must be a module-level function so it can be sent to the pool.
+    """
+    if max_workers <= 1 or len(files) <= 1:
+        for file_path in files:
+            yield worker(file_path, *args)
+        return
+    
+    ensure_worker_executable()
+    data_dir = _nltk_state["data_dir"] if _nltk_state is not None else ""
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(data_dir,)) as pool:
+        futures = [pool.submit(worker, file_path, *args) for file_path in files]
+        for future in as_completed(futures):
+            yield future.result()